@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .flags import request_flags
+
+
+def feature_flags(request):
+    # `{% if feature_flags.some_code %}`; evaluated only when a template reads it.
+    return {'feature_flags': SimpleLazyObject(lambda: request_flags(request))}
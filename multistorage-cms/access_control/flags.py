@@ -0,0 +1,138 @@
+"""Feature flag evaluation from in-process snapshots.
+
+Each process keeps every flag's global state plus recently used users' overrides in
+memory, so a check is a dict lookup. Freshness comes from version numbers in the shared
+cache (Redis when ``ENABLE_REDIS_CACHE=1``). `access_control.signals` bumps the global
+version when flags change and a user's version when their overrides change. A request
+reads both versions in one ``get_many`` and memoizes the resulting `FlagSnapshot`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import FeatureFlag, UserFeatureOverride
+
+GLOBAL_VERSION_KEY = 'flags:version'
+
+
+def _user_version_key(user_id: int) -> str:
+    return f'flags:user-version:{user_id}'
+
+
+class FlagSnapshot:
+    """Effective flags for one user. ``snapshot['code']`` and `is_enabled` return booleans."""
+
+    __slots__ = ('enabled',)
+
+    def __init__(self, enabled: dict[str, bool]):
+        self.enabled = enabled
+
+    def is_enabled(self, code: str) -> bool:
+        return self.enabled.get(code, False)
+
+    __getitem__ = is_enabled
+
+    def __contains__(self, code: str) -> bool:
+        return self.enabled.get(code, False)
+
+    def as_dict(self) -> dict[str, bool]:
+        return dict(self.enabled)
+
+
+class _ProcessState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.flags: dict[str, bool] = {}
+        self.users: OrderedDict[int, tuple] = OrderedDict()
+
+
+_state = _ProcessState()
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _invalidate(key: str) -> None:
+    # Bump now and after commit, as for the authorization cache.
+    _bump(key)
+    transaction.on_commit(partial(_bump, key))
+
+
+def invalidate_flags() -> None:
+    _invalidate(GLOBAL_VERSION_KEY)
+
+
+def invalidate_user_flags(user_id: int) -> None:
+    _invalidate(_user_version_key(user_id))
+
+
+def _versions(user_id: int | None) -> tuple:
+    keys = [GLOBAL_VERSION_KEY] + ([_user_version_key(user_id)] if user_id else [])
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        # Fresh, time-based versions so an evicted key never matches an old snapshot.
+        cache.add(key, time.time_ns(), None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return found.get(GLOBAL_VERSION_KEY), found.get(_user_version_key(user_id)) if user_id else None
+
+
+def _global_flags(version) -> dict[str, bool]:
+    if _state.version != version or version is None:
+        flags = dict(FeatureFlag.objects.values_list('code', 'enabled_globally'))
+        with _state.lock:
+            _state.flags, _state.version = flags, version
+            _state.users.clear()
+    return _state.flags
+
+
+def evaluate(user) -> FlagSnapshot:
+    """Return the effective flags of ``user`` (anonymous users get the global states)."""
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    global_version, user_version = _versions(user_id)
+    flags = _global_flags(global_version)
+    if user_id is None:
+        return FlagSnapshot(flags)
+
+    cached = _state.users.get(user_id)
+    if cached is not None and cached[0] == (global_version, user_version):
+        return cached[1]
+    overrides = dict(
+        UserFeatureOverride.objects.filter(user_id=user_id).values_list('feature_flag__code', 'is_enabled')
+    )
+    snapshot = FlagSnapshot({**flags, **overrides} if overrides else flags)
+    with _state.lock:
+        _state.users[user_id] = ((global_version, user_version), snapshot)
+        _state.users.move_to_end(user_id)
+        while len(_state.users) > settings.FEATURE_FLAG_USER_CACHE_SIZE:
+            _state.users.popitem(last=False)
+    return snapshot
+
+
+def request_flags(request) -> FlagSnapshot:
+    """Evaluate once per request; views, templates and API views of the request share it."""
+    request = getattr(request, '_request', request)
+    snapshot = getattr(request, '_feature_flags', None)
+    if snapshot is None:
+        snapshot = request._feature_flags = evaluate(getattr(request, 'user', None))
+    return snapshot
+
+
+def is_enabled(request_or_user, code: str) -> bool:
+    if hasattr(request_or_user, 'user') or hasattr(request_or_user, '_request'):
+        return request_flags(request_or_user).is_enabled(code)
+    return evaluate(request_or_user).is_enabled(code)
@@ -0,0 +1,183 @@
+"""Maintenance of the materialized `UserDocumentAccess` table.
+
+Every write bumps the fragment-cache generation of the hubs it touched and moves the
+per-user tag counters (`documents.models.UserTagCount`) by the access it added or removed.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from documents import tags
+from documents.fragments import bump_hubs
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+from .models import DocumentAccess, UserDocumentAccess
+
+ROLE_RANK = {
+    DocumentAccess.Role.VIEWER: 1,
+    DocumentAccess.Role.EDITOR: 2,
+    DocumentAccess.Role.OWNER: 3,
+}
+BATCH_SIZE = 1000
+
+
+def _chunks(values: list, size: int = BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _hub_users(hub_ids: Iterable[int]) -> dict[int, set[int]]:
+    hub_ids = list(set(hub_ids))
+    users: dict[int, set[int]] = defaultdict(set)
+    for hub_id, owner_id in ProjectHub.objects.filter(id__in=hub_ids).values_list('id', 'owner_id'):
+        users[hub_id].add(owner_id)
+    memberships = ProjectMembership.objects.filter(project_hub_id__in=hub_ids).values_list('project_hub_id', 'user_id')
+    for hub_id, user_id in memberships:
+        users[hub_id].add(user_id)
+    return users
+
+
+def compute_entries(
+    document_rows: list[tuple],
+    user_ids: set[int] | None = None,
+) -> dict[tuple[int, object], tuple[int, str]]:
+    """Return ``{(user_id, document_id): (hub_id, role)}`` for ``(id, owner_id, hub_id)`` rows."""
+    if not document_rows:
+        return {}
+    document_hubs = {doc_id: hub_id for doc_id, _owner_id, hub_id in document_rows}
+    hub_users = _hub_users(document_hubs.values())
+    entries: dict[tuple[int, object], tuple[int, str]] = {}
+
+    def grant(user_id, doc_id, role):
+        hub_id = document_hubs[doc_id]
+        if user_id not in hub_users.get(hub_id, ()):
+            return
+        if user_ids is not None and user_id not in user_ids:
+            return
+        current = entries.get((user_id, doc_id))
+        if current is None or ROLE_RANK[role] > ROLE_RANK[current[1]]:
+            entries[(user_id, doc_id)] = (hub_id, role)
+
+    for doc_id, owner_id, _hub_id in document_rows:
+        grant(owner_id, doc_id, DocumentAccess.Role.OWNER)
+
+    rules = DocumentAccess.objects.filter(document_id__in=list(document_hubs)).values_list(
+        'document_id', 'subject_user_id', 'subject_group_id', 'role'
+    )
+    group_rules = []
+    for doc_id, user_id, group_id, role in rules:
+        if user_id is not None:
+            grant(user_id, doc_id, role)
+        else:
+            group_rules.append((doc_id, group_id, role))
+
+    if group_rules:
+        members: dict[int, list[int]] = defaultdict(list)
+        through = get_user_model().groups.through
+        group_ids = {group_id for _doc_id, group_id, _role in group_rules}
+        member_rows = through.objects.filter(group_id__in=group_ids)
+        if user_ids is not None:
+            member_rows = member_rows.filter(user_id__in=user_ids)
+        for group_id, user_id in member_rows.values_list('group_id', 'user_id'):
+            members[group_id].append(user_id)
+        for doc_id, group_id, role in group_rules:
+            for user_id in members.get(group_id, ()):
+                grant(user_id, doc_id, role)
+    return entries
+
+
+def _document_rows(document_ids: list) -> list[tuple]:
+    return list(
+        Document.objects.filter(id__in=document_ids, project_hub__isnull=False).values_list(
+            'id', 'owner_id', 'project_hub_id'
+        )
+    )
+
+
+def _create(entries: dict[tuple[int, object], tuple[int, str]]) -> None:
+    UserDocumentAccess.objects.bulk_create(
+        [
+            UserDocumentAccess(user_id=user_id, document_id=doc_id, project_hub_id=hub_id, role=role)
+            for (user_id, doc_id), (hub_id, role) in entries.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def sync_documents(document_ids: Iterable) -> None:
+    """Recompute every access row of the given documents."""
+    document_ids = list(set(document_ids))
+    for chunk in _chunks(document_ids):
+        with transaction.atomic():
+            access = UserDocumentAccess.objects.filter(document_id__in=chunk)
+            before = tags.access_tag_totals(access)
+            access.delete()
+            rows = _document_rows(chunk)
+            _create(compute_entries(rows))
+            tags.apply_user_tag_deltas(before, tags.access_tag_totals(access))
+        bump_hubs(hub_id for _, _, hub_id in rows)
+
+
+def sync_user(user_id: int, hub_id: int | None = None) -> None:
+    """Recompute the access rows of one user, optionally limited to one hub."""
+    hub_ids = set(ProjectHub.objects.filter(owner_id=user_id).values_list('id', flat=True))
+    hub_ids |= set(ProjectMembership.objects.filter(user_id=user_id).values_list('project_hub_id', flat=True))
+    if hub_id is not None:
+        hub_ids &= {hub_id}
+
+    document_ids: set = set()
+    if hub_ids:
+        document_ids |= set(
+            Document.objects.filter(owner_id=user_id, project_hub_id__in=hub_ids).values_list('id', flat=True)
+        )
+        group_ids = list(get_user_model().groups.through.objects.filter(user_id=user_id).values_list('group_id', flat=True))
+        rules = DocumentAccess.objects.filter(document__project_hub_id__in=hub_ids)
+        document_ids |= set(rules.filter(subject_user_id=user_id).values_list('document_id', flat=True))
+        if group_ids:
+            document_ids |= set(rules.filter(subject_group_id__in=group_ids).values_list('document_id', flat=True))
+
+    with transaction.atomic():
+        stale = UserDocumentAccess.objects.filter(user_id=user_id)
+        if hub_id is not None:
+            stale = stale.filter(project_hub_id=hub_id)
+        before = tags.access_tag_totals(stale)
+        stale.delete()
+        for chunk in _chunks(list(document_ids)):
+            _create(compute_entries(_document_rows(chunk), user_ids={user_id}))
+        tags.apply_user_tag_deltas(before, tags.access_tag_totals(stale))
+    bump_hubs(hub_ids | {hub_id})
+
+
+def rebuild(hub_id: int | None = None, batch_size: int = BATCH_SIZE) -> int:
+    """Rebuild the index from scratch (for one hub or all hubs). Returns the number of rows written."""
+    documents = Document.objects.filter(project_hub__isnull=False)
+    stale = UserDocumentAccess.objects.all()
+    if hub_id is not None:
+        documents = documents.filter(project_hub_id=hub_id)
+        stale = stale.filter(project_hub_id=hub_id)
+
+    written = 0
+    with transaction.atomic():
+        before = tags.access_tag_totals(stale)
+        stale.delete()
+        rows: list[tuple] = []
+        for row in documents.values_list('id', 'owner_id', 'project_hub_id').order_by('pk').iterator(chunk_size=batch_size):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                entries = compute_entries(rows)
+                _create(entries)
+                written += len(entries)
+                rows = []
+        if rows:
+            entries = compute_entries(rows)
+            _create(entries)
+            written += len(entries)
+        tags.apply_user_tag_deltas(before, tags.access_tag_totals(stale))
+    bump_hubs([hub_id] if hub_id is not None else ProjectHub.objects.values_list('id', flat=True))
+    return written
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from access_control import indexing
+from project_hubs.models import ProjectHub
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized per-user document access index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only rebuild rows for the hub with this slug.')
+        parser.add_argument('--batch-size', type=int, default=indexing.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        hub_id = None
+        if options['hub']:
+            hub_id = ProjectHub.objects.filter(slug=options['hub']).values_list('id', flat=True).first()
+            if hub_id is None:
+                raise CommandError(f'Unknown hub: {options["hub"]}')
+        written = indexing.rebuild(hub_id=hub_id, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} access rows.'))
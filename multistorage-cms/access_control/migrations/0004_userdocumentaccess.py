@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access_control', '0003_documentaccess_uniq_document_user_role_access_and_more'),
+        ('documents', '0003_documentversion_error_message_and_more'),
+        ('project_hubs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDocumentAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('VIEWER', 'Viewer'), ('EDITOR', 'Editor'), ('OWNER', 'Owner')], max_length=20)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_access', to='documents.document')),
+                ('project_hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='project_hubs.projecthub')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_access_index', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'project_hub'], name='user_doc_access_user_hub')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'document'), name='uniq_user_document_access')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+ROLE_RANK = {'VIEWER': 1, 'EDITOR': 2, 'OWNER': 3}
+
+
+def populate(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    DocumentAccess = apps.get_model('access_control', 'DocumentAccess')
+    UserDocumentAccess = apps.get_model('access_control', 'UserDocumentAccess')
+    ProjectHub = apps.get_model('project_hubs', 'ProjectHub')
+    ProjectMembership = apps.get_model('project_hubs', 'ProjectMembership')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    hub_users = defaultdict(set)
+    for hub_id, owner_id in ProjectHub.objects.values_list('id', 'owner_id'):
+        hub_users[hub_id].add(owner_id)
+    for hub_id, user_id in ProjectMembership.objects.values_list('project_hub_id', 'user_id'):
+        hub_users[hub_id].add(user_id)
+    group_members = defaultdict(list)
+    for group_id, user_id in User.groups.through.objects.values_list('group_id', 'user_id'):
+        group_members[group_id].append(user_id)
+
+    document_hubs = {}
+    entries = {}
+
+    def grant(user_id, doc_id, role):
+        hub_id = document_hubs[doc_id]
+        if user_id not in hub_users[hub_id]:
+            return
+        current = entries.get((user_id, doc_id))
+        if current is None or ROLE_RANK[role] > ROLE_RANK[current[1]]:
+            entries[(user_id, doc_id)] = (hub_id, role)
+
+    for doc_id, owner_id, hub_id in Document.objects.filter(project_hub__isnull=False).values_list(
+        'id', 'owner_id', 'project_hub_id'
+    ):
+        document_hubs[doc_id] = hub_id
+        grant(owner_id, doc_id, 'OWNER')
+    for doc_id, user_id, group_id, role in DocumentAccess.objects.filter(
+        document__project_hub__isnull=False
+    ).values_list('document_id', 'subject_user_id', 'subject_group_id', 'role'):
+        if user_id is not None:
+            grant(user_id, doc_id, role)
+        else:
+            for member_id in group_members[group_id]:
+                grant(member_id, doc_id, role)
+
+    UserDocumentAccess.objects.bulk_create(
+        [
+            UserDocumentAccess(user_id=user_id, document_id=doc_id, project_hub_id=hub_id, role=role)
+            for (user_id, doc_id), (hub_id, role) in entries.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access_control', '0004_userdocumentaccess'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
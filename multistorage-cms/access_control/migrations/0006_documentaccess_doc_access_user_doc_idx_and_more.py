@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access_control', '0005_populate_userdocumentaccess'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('documents', '0003_documentversion_error_message_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='documentaccess',
+            index=models.Index(fields=['subject_user', 'document'], name='doc_access_user_doc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentaccess',
+            index=models.Index(fields=['subject_group', 'document'], name='doc_access_group_doc_idx'),
+        ),
+    ]
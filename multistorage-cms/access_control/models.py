@@ -47,6 +47,39 @@ class DocumentAccess(models.Model):
                 name='uniq_document_group_role_access',
             ),
         ]
+        indexes = [
+            models.Index(fields=['subject_user', 'document'], name='doc_access_user_doc_idx'),
+            models.Index(fields=['subject_group', 'document'], name='doc_access_group_doc_idx'),
+        ]
+
+
+class UserDocumentAccess(models.Model):
+    """Materialized (user, document) access row.
+
+    Derived from document ownership, `DocumentAccess` rules (direct and via groups) and
+    hub membership, and kept current by `access_control.signals`. Document queries join
+    this table instead of OR-ing across the ACL relations.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='document_access_index',
+    )
+    document = models.ForeignKey('documents.Document', on_delete=models.CASCADE, related_name='user_access')
+    project_hub = models.ForeignKey('project_hubs.ProjectHub', on_delete=models.CASCADE, related_name='+')
+    role = models.CharField(max_length=20, choices=DocumentAccess.Role.choices)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'document'], name='uniq_user_document_access'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'project_hub'], name='user_doc_access_user_hub'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user_id}->{self.document_id}:{self.role}'
 
 
 class FeatureFlag(models.Model):
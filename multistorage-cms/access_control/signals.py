@@ -0,0 +1,92 @@
+"""Keep `UserDocumentAccess` in step with the tables it is derived from.
+
+Recomputation runs after commit so cascading deletes never re-insert rows that point
+at objects which are about to disappear. Feature flag changes bump the versions that
+`access_control.flags` snapshots are checked against.
+"""
+
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+from . import flags, indexing
+from .models import DocumentAccess, FeatureFlag, UserFeatureOverride
+
+DOCUMENT_ACCESS_FIELDS = {'owner', 'owner_id', 'project_hub', 'project_hub_id'}
+
+
+def _schedule(func, *args) -> None:
+    transaction.on_commit(partial(func, *args))
+
+
+@receiver(post_save, sender=Document, dispatch_uid='access_index_document_saved')
+def document_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not (set(update_fields) & DOCUMENT_ACCESS_FIELDS):
+        return
+    _schedule(indexing.sync_documents, [instance.pk])
+
+
+@receiver(post_save, sender=DocumentAccess, dispatch_uid='access_index_rule_saved')
+def document_access_saved(sender, instance, **kwargs):
+    _schedule(indexing.sync_documents, [instance.document_id])
+
+
+@receiver(post_delete, sender=DocumentAccess, dispatch_uid='access_index_rule_deleted')
+def document_access_deleted(sender, instance, **kwargs):
+    _schedule(indexing.sync_documents, [instance.document_id])
+
+
+@receiver(post_save, sender=ProjectMembership, dispatch_uid='access_index_membership_saved')
+@receiver(post_delete, sender=ProjectMembership, dispatch_uid='access_index_membership_deleted')
+def membership_changed(sender, instance, **kwargs):
+    _schedule(indexing.sync_user, instance.user_id, instance.project_hub_id)
+
+
+@receiver(post_save, sender=ProjectHub, dispatch_uid='access_index_hub_saved')
+def hub_saved(sender, instance, created, **kwargs):
+    # `_previous_owner_id` is recorded by the pre_save handler in `project_hubs.signals`.
+    previous_owner_id = getattr(instance, '_previous_owner_id', None)
+    if created or previous_owner_id == instance.owner_id:
+        return
+    _schedule(indexing.sync_user, instance.owner_id, instance.pk)
+    if previous_owner_id:
+        _schedule(indexing.sync_user, previous_owner_id, instance.pk)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through, dispatch_uid='access_index_user_groups')
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            _schedule(indexing.sync_user, instance.pk)
+        return
+
+    # Reverse side: `instance` is a Group and `pk_set` holds user ids.
+    if action == 'pre_clear':
+        instance._cleared_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        user_ids = getattr(instance, '_cleared_user_ids', [])
+    elif action in {'post_add', 'post_remove'}:
+        user_ids = pk_set or []
+    else:
+        return
+    for user_id in user_ids:
+        _schedule(indexing.sync_user, user_id)
+
+
+@receiver(post_save, sender=FeatureFlag, dispatch_uid='feature_flag_saved')
+@receiver(post_delete, sender=FeatureFlag, dispatch_uid='feature_flag_deleted')
+def feature_flag_changed(sender, instance, **kwargs):
+    flags.invalidate_flags()
+
+
+@receiver(post_save, sender=UserFeatureOverride, dispatch_uid='feature_override_saved')
+@receiver(post_delete, sender=UserFeatureOverride, dispatch_uid='feature_override_deleted')
+def feature_override_changed(sender, instance, **kwargs):
+    flags.invalidate_user_flags(instance.user_id)
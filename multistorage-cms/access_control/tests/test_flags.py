@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+
+from access_control import flags
+from access_control.context_processors import feature_flags
+from access_control.models import FeatureFlag, UserFeatureOverride
+from accounts.models import User
+
+
+class FeatureFlagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='x')
+        self.other = User.objects.create_user(email='other@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beta = FeatureFlag.objects.create(code='beta', name='Beta', enabled_globally=False)
+            FeatureFlag.objects.create(code='search', name='Search', enabled_globally=True)
+            UserFeatureOverride.objects.create(user=self.user, feature_flag=self.beta, is_enabled=True)
+
+    def test_overrides_win_over_global_state(self):
+        snapshot = flags.evaluate(self.user)
+        self.assertEqual(snapshot.as_dict(), {'beta': True, 'search': True})
+        self.assertTrue(flags.is_enabled(self.user, 'beta'))
+        self.assertFalse(flags.is_enabled(self.other, 'beta'))
+        self.assertFalse(snapshot['unknown'])
+
+    def test_warm_snapshot_needs_no_queries(self):
+        flags.evaluate(self.user)
+        with self.assertNumQueries(0):
+            self.assertTrue(flags.evaluate(self.user).is_enabled('beta'))
+
+    def test_changes_invalidate_snapshots(self):
+        flags.evaluate(self.user)
+        flags.evaluate(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            override = UserFeatureOverride.objects.get(user=self.user)
+            override.is_enabled = False
+            override.save()
+        self.assertFalse(flags.is_enabled(self.user, 'beta'))
+        with self.assertNumQueries(0):
+            flags.evaluate(self.other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beta.enabled_globally = True
+            self.beta.save()
+        self.assertTrue(flags.is_enabled(self.other, 'beta'))
+
+    @override_settings(FEATURE_FLAG_USER_CACHE_SIZE=1)
+    def test_user_snapshots_are_bounded(self):
+        flags.evaluate(self.user)
+        flags.evaluate(self.other)
+        self.assertEqual(list(flags._state.users), [self.other.pk])
+
+    def test_request_snapshot_is_shared_with_templates(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        template = engines['django'].from_string('{% if feature_flags.beta %}beta{% endif %}')
+        self.assertEqual(template.render(feature_flags(request)), 'beta')
+        with self.assertNumQueries(0):
+            self.assertIs(flags.request_flags(request), flags.request_flags(request))
+            self.assertTrue(flags.is_enabled(request, 'search'))
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+
+from access_control.models import DocumentAccess, UserDocumentAccess
+from accounts.models import User
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class UserDocumentAccessIndexTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.member = User.objects.create_user(email='member@example.com', password='x')
+        self.outsider = User.objects.create_user(email='outsider@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+            ProjectMembership.objects.create(
+                project_hub=self.hub,
+                user=self.member,
+                role=ProjectMembership.Role.VIEWER,
+            )
+            self.document = Document.objects.create(
+                owner=self.owner,
+                project_hub=self.hub,
+                title='Doc',
+                mime_type='text/plain',
+                size_bytes=3,
+                checksum_sha256='abc',
+            )
+
+    def visible_to(self, user):
+        return list(Document.objects.accessible_to(user, self.hub))
+
+    def test_owner_is_indexed_on_create(self):
+        self.assertEqual(self.visible_to(self.owner), [self.document])
+        self.assertEqual(self.visible_to(self.member), [])
+
+    def test_direct_rule_grants_and_revokes_access(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = DocumentAccess.objects.create(
+                document=self.document,
+                subject_user=self.member,
+                role=DocumentAccess.Role.EDITOR,
+            )
+        self.assertEqual(self.visible_to(self.member), [self.document])
+        self.assertEqual(
+            UserDocumentAccess.objects.get(user=self.member, document=self.document).role,
+            DocumentAccess.Role.EDITOR,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.delete()
+        self.assertEqual(self.visible_to(self.member), [])
+
+    def test_group_membership_changes_are_tracked(self):
+        group = Group.objects.create(name='Readers')
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentAccess.objects.create(
+                document=self.document,
+                subject_group=group,
+                role=DocumentAccess.Role.VIEWER,
+            )
+            self.member.groups.add(group)
+        self.assertEqual(self.visible_to(self.member), [self.document])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.user_set.clear()
+        self.assertEqual(self.visible_to(self.member), [])
+
+    def test_rules_for_non_members_are_not_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentAccess.objects.create(
+                document=self.document,
+                subject_user=self.outsider,
+                role=DocumentAccess.Role.VIEWER,
+            )
+        self.assertEqual(self.visible_to(self.outsider), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership = ProjectMembership.objects.create(
+                project_hub=self.hub,
+                user=self.outsider,
+                role=ProjectMembership.Role.VIEWER,
+            )
+        self.assertEqual(self.visible_to(self.outsider), [self.document])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            membership.delete()
+        self.assertEqual(self.visible_to(self.outsider), [])
+
+    def test_rebuild_command_repairs_drift(self):
+        DocumentAccess.objects.bulk_create(
+            [DocumentAccess(document=self.document, subject_user=self.member, role=DocumentAccess.Role.VIEWER)]
+        )
+        UserDocumentAccess.objects.all().delete()
+
+        call_command('rebuild_access_index', stdout=StringIO())
+
+        self.assertEqual(self.visible_to(self.owner), [self.document])
+        self.assertEqual(self.visible_to(self.member), [self.document])
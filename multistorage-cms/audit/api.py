@@ -0,0 +1,95 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from documents.pagination import InvalidCursor, clamp_page_size
+from documents.renderers import FastJSONRenderer
+from project_hubs.authz import get_hub_authorization
+
+from .queries import EXPORT_COLUMNS, InvalidAuditFilter, audit_paginator, event_rows, filter_events, present
+
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson'}
+
+
+class _Echo:
+    """File-like object for `csv.writer` that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+class AuditAPIMixin:
+    authentication_classes = [SessionAuthentication, TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_events(self, request, slug):
+        """Return the filtered queryset, or an error `Response`. Auditing is for hub owners and admins."""
+        authorization = get_hub_authorization(request, slug)
+        if not authorization.can_delete:
+            return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            return filter_events(authorization.hub, request.query_params)
+        except InvalidAuditFilter as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AuditEventListAPI(AuditAPIMixin, APIView):
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request, slug):
+        events = self.get_events(request, slug)
+        if isinstance(events, Response):
+            return events
+        try:
+            page = audit_paginator.paginate(
+                event_rows(events),
+                cursor=request.query_params.get('cursor') or None,
+                page_size=clamp_page_size(request.query_params.get('page_size')),
+            )
+        except InvalidCursor as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = Response([present(row) for row in page.items])
+        if page.next_cursor:
+            params = request.query_params.copy()
+            params['cursor'] = page.next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+            response['Link'] = f'<{next_url}>; rel="next"'
+            response['X-Next-Cursor'] = page.next_cursor
+        return response
+
+
+class AuditEventExportAPI(AuditAPIMixin, APIView):
+    def get(self, request, slug, export_format):
+        events = self.get_events(request, slug)
+        if isinstance(events, Response):
+            return events
+        # iterator() streams through a server-side cursor on PostgreSQL, so memory stays flat.
+        rows = (present(row) for row in audit_paginator.order(event_rows(events)).iterator(
+            chunk_size=settings.AUDIT_EXPORT_CHUNK_SIZE
+        ))
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            lines = (writer.writerow(row) for row in self._csv_rows(rows))
+        else:
+            lines = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+        response = StreamingHttpResponse(lines, content_type=EXPORT_CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="audit-{slug}.{export_format}"'
+        return response
+
+    @staticmethod
+    def _csv_rows(rows):
+        yield EXPORT_COLUMNS
+        for row in rows:
+            row['created_at'] = row['created_at'].isoformat()
+            row['payload'] = json.dumps(row['payload'], cls=DjangoJSONEncoder)
+            yield [row[column] for column in EXPORT_COLUMNS]
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from .api import AuditEventExportAPI, AuditEventListAPI
+
+app_name = 'audit_api'
+
+urlpatterns = [
+    path('hubs/<slug:slug>/audit/events/', AuditEventListAPI.as_view(), name='events'),
+    path('hubs/<slug:slug>/audit/events.csv', AuditEventExportAPI.as_view(), {'export_format': 'csv'}, name='export_csv'),
+    path(
+        'hubs/<slug:slug>/audit/events.jsonl',
+        AuditEventExportAPI.as_view(),
+        {'export_format': 'jsonl'},
+        name='export_jsonl',
+    ),
+]
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AuditConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'audit'
+
+    def ready(self):
+        from django.core.signals import request_finished
+
+        from .writer import flush_if_due
+
+        # Runs once the response has been handed to the client.
+        request_finished.connect(flush_if_due, dispatch_uid='audit_flush_after_request')
+        try:
+            from celery.signals import task_postrun
+        except Exception:  # pragma: no cover
+            return
+        task_postrun.connect(flush_if_due, dispatch_uid='audit_flush_after_task', weak=False)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from audit.partitions import run_audit_retention
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming audit partitions and archive audit months past AUDIT_RETENTION_MONTHS.'
+
+    def handle(self, *args, **options):
+        months = run_audit_retention()
+        for month in months:
+            self.stdout.write(f'Removed {month:%Y-%m}')
+        self.stdout.write(self.style.SUCCESS(f'Archived or dropped {len(months)} audit months.'))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.models import AuditArchive
+from audit.partitions import restore_month
+
+
+class Command(BaseCommand):
+    help = 'Reload an archived audit month (YYYY-MM) from its storage backend.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='Month to restore, e.g. 2025-03.')
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['month'].split('-'))
+            month = date(year, month, 1)
+        except ValueError as exc:
+            raise CommandError('Expected the month as YYYY-MM.') from exc
+        try:
+            restored = restore_month(month)
+        except AuditArchive.DoesNotExist as exc:
+            raise CommandError(f'No audit archive for {month:%Y-%m}.') from exc
+        self.stdout.write(self.style.SUCCESS(f'Restored {restored} audit events for {month:%Y-%m}.'))
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_auditevent_project_hub'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditevent',
+            name='dedup_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='auditevent',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
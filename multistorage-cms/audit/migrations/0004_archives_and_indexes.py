@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_event_buffering'),
+        ('documents', '0008_upload_rollups'),
+        ('project_hubs', '0001_initial'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('storage_key', models.CharField(max_length=1024)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('checksum_sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('restored_until', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['project_hub', '-created_at'], name='audit_hub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['document', '-created_at'], name='audit_document_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['actor', '-created_at'], name='audit_actor_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='auditarchive',
+            name='storage_backend',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='audit_archives', to='storage_backends.storagebackend'),
+        ),
+    ]
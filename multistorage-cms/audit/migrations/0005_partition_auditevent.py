@@ -0,0 +1,90 @@
+# Converts audit_auditevent into a table range-partitioned by month on PostgreSQL.
+# Other databases keep the plain table; `audit.partitions` falls back to range deletes there.
+
+import re
+from datetime import date
+
+from django.db import migrations
+
+PARTITION_AHEAD_MONTHS = 2
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_auditevent(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    AuditEvent = apps.get_model('audit', 'AuditEvent')
+    table = AuditEvent._meta.db_table
+    legacy = f'{table}_unpartitioned'
+    qn = schema_editor.quote_name
+    columns = ', '.join(qn(field.column) for field in AuditEvent._meta.concrete_fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s', [table])
+        indexes = cursor.fetchall()
+        cursor.execute(
+            'SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass',
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date FROM {qn(table)}"
+        )
+        months = {row[0] for row in cursor.fetchall()}
+
+    today = date.today().replace(day=1)
+    months.add(today)
+    for _ in range(PARTITION_AHEAD_MONTHS):
+        today = _next_month(today)
+        months.add(today)
+
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+    execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    execute(f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT')
+    execute(f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+    for month in sorted(months):
+        execute(
+            f'CREATE TABLE {qn(f"{table}_y{month:%Y}m{month:%m}")} PARTITION OF {qn(table)} '
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+        )
+    execute(f'INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(legacy)}')
+    execute(f'DROP TABLE {qn(legacy)}')
+    # Identity columns are not supported on partitioned tables before PostgreSQL 17.
+    execute(f'CREATE SEQUENCE {qn(table + "_id_seq")} OWNED BY {qn(table)}.id')
+    execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+    execute(f"SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM {qn(table)}), 0) + 1, false)")
+
+    # Recreate the old constraints and indexes under their Django names. Unique constraints
+    # on a partitioned table must include the partition key.
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} PRIMARY KEY (id, created_at)')
+        elif kind == 'u':
+            column = re.search(r'UNIQUE \((.+)\)', definition).group(1)
+            execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} UNIQUE ({column}, created_at)')
+        elif kind == 'f':
+            execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}')
+    constraint_names = {name for name, _kind, _definition in constraints}
+    for name, definition in indexes:
+        if name in constraint_names or definition.startswith('CREATE UNIQUE'):
+            continue
+        execute(re.sub(r' ON (ONLY )?\S+ ', f' ON {qn(table)} ', definition, count=1))
+
+
+class Migration(migrations.Migration):
+
+    atomic = True
+
+    dependencies = [
+        ('audit', '0004_archives_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_auditevent, migrations.RunPython.noop),
+    ]
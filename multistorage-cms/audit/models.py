@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class AuditEvent(models.Model):
@@ -26,10 +27,42 @@ class AuditEvent(models.Model):
         related_name='audit_events',
     )
     payload_json = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when the buffered batch is written.
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Delivery is at least once; replays of the same event are skipped on insert.
+    dedup_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project_hub', '-created_at'], name='audit_hub_created_idx'),
+            models.Index(fields=['document', '-created_at'], name='audit_document_created_idx'),
+            models.Index(fields=['actor', '-created_at'], name='audit_actor_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.event_type} @ {self.created_at.isoformat()}'
+
+
+class AuditArchive(models.Model):
+    """One month of audit events exported to a storage backend by the retention job."""
+
+    month = models.DateField(unique=True)
+    storage_backend = models.ForeignKey(
+        'storage_backends.StorageBackend',
+        on_delete=models.PROTECT,
+        related_name='audit_archives',
+    )
+    storage_key = models.CharField(max_length=1024)
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.BigIntegerField(default=0)
+    checksum_sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    # A restored month is kept until then and dropped again (without re-export) afterwards.
+    restored_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-month']
+
+    def __str__(self) -> str:
+        return f'Audit archive {self.month:%Y-%m}'
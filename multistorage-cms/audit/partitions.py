@@ -0,0 +1,241 @@
+"""Monthly audit partitions, archival of expired months and restore.
+
+On PostgreSQL `AuditEvent` is range-partitioned by month (migration 0005).
+`ensure_partitions` creates the coming months ahead of time. Expired months are exported
+as gzipped JSONL to ``AUDIT_ARCHIVE_STORAGE_BACKEND`` through the storage provider layer,
+and only then detached and dropped. Other databases keep one plain table; there the same
+functions export and delete the month's rows instead.
+
+`restore_month` reloads an archived month. The month is kept for
+``AUDIT_RESTORE_HOLD_DAYS``, and the retention job drops it again afterwards without
+exporting it a second time.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from storage_backends.models import StorageBackend
+from storage_backends.providers import get_provider
+
+from .models import AuditArchive, AuditEvent
+from .writer import write_events
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ('id', 'dedup_key', 'event_type', 'actor_id', 'document_id', 'project_hub_id', 'payload_json', 'created_at')
+PARTITION_PATTERN = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def month_start(moment: datetime | date) -> date:
+    if isinstance(moment, datetime):
+        moment = moment.astimezone(dt_timezone.utc)
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def partition_name(month: date) -> str:
+    return f'{AuditEvent._meta.db_table}_y{month:%Y}m{month:%m}'
+
+
+def partition_months() -> list[date]:
+    """Months that currently have their own partition (PostgreSQL only)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s',
+            [AuditEvent._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_PATTERN.search(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def ensure_partition(month: date) -> bool:
+    """Create the partition for ``month`` if missing. Returns True when it was created."""
+    if not is_partitioned() or month in partition_months():
+        return False
+    table = connection.ops.quote_name(AuditEvent._meta.db_table)
+    default = connection.ops.quote_name(f'{AuditEvent._meta.db_table}_default')
+    name = connection.ops.quote_name(partition_name(month))
+    start, end = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Rows that landed in the default partition for this month move into the new one;
+        # ATTACH would fail while the default partition still holds them.
+        cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            [start, end],
+        )
+        cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', [start, end])
+    return True
+
+
+def ensure_partitions(now: datetime | None = None) -> list[date]:
+    current = month_start(now or timezone.now())
+    months = [add_months(current, offset) for offset in range(settings.AUDIT_PARTITION_MONTHS_AHEAD + 1)]
+    return [month for month in months if ensure_partition(month)]
+
+
+def drop_month(month: date) -> None:
+    if is_partitioned() and month in partition_months():
+        table = connection.ops.quote_name(AuditEvent._meta.db_table)
+        name = connection.ops.quote_name(partition_name(month))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+        return
+    start, end = month_bounds(month)
+    AuditEvent.objects.filter(created_at__gte=start, created_at__lt=end).delete()
+
+
+def export_month(month: date, target: Path) -> tuple[int, str]:
+    """Write the month's events to ``target`` as gzipped JSONL. Returns ``(rows, sha256)``."""
+    start, end = month_bounds(month)
+    rows = (
+        AuditEvent.objects.filter(created_at__gte=start, created_at__lt=end)
+        .order_by('created_at', 'id')
+        .values(*EXPORT_FIELDS)
+    )
+    count = 0
+    with gzip.open(target, 'wt', encoding='utf-8') as out:
+        for row in rows.iterator(chunk_size=settings.AUDIT_BATCH_SIZE):
+            out.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+            count += 1
+    sha256 = hashlib.sha256()
+    with target.open('rb') as archived:
+        while chunk := archived.read(1024 * 1024):
+            sha256.update(chunk)
+    return count, sha256.hexdigest()
+
+
+def archive_backend() -> StorageBackend | None:
+    name = settings.AUDIT_ARCHIVE_STORAGE_BACKEND
+    if not name:
+        return None
+    return StorageBackend.objects.filter(name=name, status=StorageBackend.Status.ACTIVE).first()
+
+
+def archive_month(month: date, backend: StorageBackend) -> AuditArchive:
+    """Export ``month`` to ``backend``, record the archive, then drop the month."""
+    with tempfile.TemporaryDirectory() as workdir:
+        target = Path(workdir) / f'audit-{month:%Y-%m}.jsonl.gz'
+        row_count, checksum = export_month(month, target)
+        storage_key = get_provider(backend).upload(target, f'audit/{month:%Y}/audit-{month:%Y-%m}.jsonl.gz')
+        archive, _created = AuditArchive.objects.update_or_create(
+            month=month,
+            defaults={
+                'storage_backend': backend,
+                'storage_key': storage_key,
+                'row_count': row_count,
+                'size_bytes': target.stat().st_size,
+                'checksum_sha256': checksum,
+                'restored_until': None,
+            },
+        )
+    drop_month(month)
+    return archive
+
+
+def expired_months(now: datetime | None = None) -> list[date]:
+    cutoff = add_months(month_start(now or timezone.now()), -settings.AUDIT_RETENTION_MONTHS)
+    if is_partitioned():
+        months = partition_months()
+    else:
+        months = [month_start(day) for day in AuditEvent.objects.datetimes('created_at', 'month', tzinfo=dt_timezone.utc)]
+    return [month for month in months if month < cutoff]
+
+
+def run_audit_retention(now: datetime | None = None) -> list[date]:
+    """Create upcoming partitions and archive expired months. Returns the months removed."""
+    now = now or timezone.now()
+    ensure_partitions(now)
+    months = expired_months(now)
+    if not months:
+        return []
+    archives = {archive.month: archive for archive in AuditArchive.objects.filter(month__in=months)}
+    backend = None
+    removed = []
+    for month in months:
+        archive = archives.get(month)
+        if archive and archive.restored_until:
+            if archive.restored_until > now:
+                continue
+            # Restored from an archive that is still in place; no second export.
+            drop_month(month)
+            archive.restored_until = None
+            archive.save(update_fields=['restored_until'])
+            removed.append(month)
+            continue
+        backend = backend or archive_backend()
+        if backend is None:
+            logger.warning('No active AUDIT_ARCHIVE_STORAGE_BACKEND; keeping expired audit month %s.', month)
+            continue
+        archive_month(month, backend)
+        removed.append(month)
+    return removed
+
+
+def restore_month(month: date, now: datetime | None = None) -> int:
+    """Reload an archived month. Returns the number of events read from the archive."""
+    archive = AuditArchive.objects.select_related('storage_backend').get(month=month)
+    ensure_partition(month)
+    restored = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        source = Path(workdir) / 'archive.jsonl.gz'
+        get_provider(archive.storage_backend).download(archive.storage_key, source)
+        with gzip.open(source, 'rt', encoding='utf-8') as lines:
+            batch = []
+            for line in lines:
+                row = json.loads(line)
+                batch.append({
+                    'dedup_key': row['dedup_key'] or f'archived:{row["id"]}',
+                    'event_type': row['event_type'],
+                    'actor_id': row['actor_id'],
+                    'document_id': row['document_id'],
+                    'project_hub_id': row['project_hub_id'],
+                    'payload': row['payload_json'],
+                    'created_at': parse_datetime(row['created_at']),
+                })
+                if len(batch) >= settings.AUDIT_BATCH_SIZE:
+                    restored += write_events(batch)
+                    batch = []
+            restored += write_events(batch)
+    archive.restored_until = (now or timezone.now()) + timedelta(days=settings.AUDIT_RESTORE_HOLD_DAYS)
+    archive.save(update_fields=['restored_until'])
+    return restored
@@ -0,0 +1,76 @@
+"""Hub-scoped audit event queries shared by the audit API list and export endpoints.
+
+Every query is bounded by ``project_hub`` and ordered by ``(created_at, id)`` newest first,
+so it is served by the ``(project_hub, created_at)`` index, or the ``(document, created_at)``
+index when filtered by document.
+"""
+
+from __future__ import annotations
+
+import uuid
+
+from django.utils.dateparse import parse_datetime
+
+from documents.pagination import KeysetPaginator
+
+from .models import AuditEvent
+
+EVENT_FIELDS = ('id', 'event_type', 'actor_id', 'actor__email', 'document_id', 'payload_json', 'created_at')
+EXPORT_COLUMNS = ('id', 'created_at', 'event_type', 'actor_id', 'actor_email', 'document_id', 'payload')
+
+audit_paginator = KeysetPaginator((('created_at', True), ('id', True)))
+
+
+class InvalidAuditFilter(ValueError):
+    pass
+
+
+def _datetime(params, name):
+    raw = params.get(name, '').strip()
+    if not raw:
+        return None
+    value = parse_datetime(raw)
+    if value is None or value.tzinfo is None:
+        raise InvalidAuditFilter(f'"{name}" must be an ISO 8601 datetime with a timezone.')
+    return value
+
+
+def filter_events(hub, params):
+    """Apply ``document``, ``actor``, ``event_type`` (comma separated), ``since`` and ``until``."""
+    queryset = AuditEvent.objects.filter(project_hub=hub)
+    document = params.get('document', '').strip()
+    if document:
+        try:
+            queryset = queryset.filter(document_id=uuid.UUID(document))
+        except ValueError as exc:
+            raise InvalidAuditFilter('"document" must be a document id.') from exc
+    actor = params.get('actor', '').strip()
+    if actor:
+        if not actor.isdigit():
+            raise InvalidAuditFilter('"actor" must be a user id.')
+        queryset = queryset.filter(actor_id=int(actor))
+    event_types = [value.strip() for value in params.get('event_type', '').split(',') if value.strip()]
+    if event_types:
+        queryset = queryset.filter(event_type__in=event_types)
+    since, until = _datetime(params, 'since'), _datetime(params, 'until')
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset
+
+
+def event_rows(queryset):
+    return queryset.values(*EVENT_FIELDS)
+
+
+def present(row: dict) -> dict:
+    return {
+        'id': row['id'],
+        'created_at': row['created_at'],
+        'event_type': row['event_type'],
+        'actor_id': row['actor_id'],
+        'actor_email': row['actor__email'],
+        'document_id': row['document_id'],
+        'payload': row['payload_json'],
+    }
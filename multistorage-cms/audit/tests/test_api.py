@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from audit.models import AuditEvent
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+BASE = datetime(2026, 9, 1, tzinfo=dt_timezone.utc)
+
+
+class AuditAPITests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.editor = User.objects.create_user(email='editor@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+        other_hub = ProjectHub.objects.create(name='Other', slug='other', owner=self.owner)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.editor, role=ProjectMembership.Role.EDITOR)
+        self.document = Document.objects.create(
+            owner=self.owner,
+            project_hub=self.hub,
+            title='Report',
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+        for minute in range(5):
+            AuditEvent.objects.create(
+                event_type='document.opened',
+                actor=self.owner if minute % 2 else self.editor,
+                document=self.document if minute < 3 else None,
+                project_hub=self.hub,
+                payload_json={'minute': minute},
+                created_at=BASE + timedelta(minutes=minute),
+            )
+        AuditEvent.objects.create(event_type='document.deleted', actor=self.owner, project_hub=self.hub, created_at=BASE)
+        AuditEvent.objects.create(event_type='document.opened', project_hub=other_hub, created_at=BASE)
+        self.url = reverse('audit_api:events', kwargs={'slug': self.hub.slug})
+        self.client.force_login(self.owner)
+
+    def minutes(self, response):
+        return [row['payload'].get('minute') for row in response.json()]
+
+    def test_filters_and_hub_scope(self):
+        response = self.client.get(self.url, {'event_type': 'document.opened'})
+        self.assertEqual(self.minutes(response), [4, 3, 2, 1, 0])
+        self.assertEqual(response.json()[0]['actor_email'], 'editor@example.com')
+
+        self.assertEqual(self.minutes(self.client.get(self.url, {'document': str(self.document.pk)})), [2, 1, 0])
+        self.assertEqual(self.minutes(self.client.get(self.url, {'actor': self.owner.pk, 'event_type': 'document.opened'})), [3, 1])
+        window = {'since': (BASE + timedelta(minutes=1)).isoformat(), 'until': (BASE + timedelta(minutes=3)).isoformat()}
+        self.assertEqual(self.minutes(self.client.get(self.url, window)), [2, 1])
+
+    def test_keyset_pages_without_counting(self):
+        self.client.get(self.url)  # warm the hub authorization cache
+        with self.assertNumQueries(3):
+            # session, user, one page of events (no COUNT, no OFFSET)
+            first = self.client.get(self.url, {'event_type': 'document.opened', 'page_size': 2})
+        self.assertEqual(self.minutes(first), [4, 3])
+        second = self.client.get(self.url, {'event_type': 'document.opened', 'page_size': 2, 'cursor': first['X-Next-Cursor']})
+        self.assertEqual(self.minutes(second), [2, 1])
+
+    def test_invalid_input_and_permissions(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'document': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'garbage'}).status_code, 400)
+        self.client.force_login(self.editor)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_streaming_exports(self):
+        response = self.client.get(reverse('audit_api:export_csv', kwargs={'slug': self.hub.slug}), {'event_type': 'document.opened'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="audit-hub.csv"')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([json.loads(row['payload'])['minute'] for row in rows], [4, 3, 2, 1, 0])
+        self.assertEqual(rows[0]['actor_email'], 'editor@example.com')
+
+        response = self.client.get(reverse('audit_api:export_jsonl', kwargs={'slug': self.hub.slug}))
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(lines), 6)
+        # Ties on created_at fall back to the id, newest first.
+        self.assertEqual([line['event_type'] for line in lines[-2:]], ['document.deleted', 'document.opened'])
@@ -0,0 +1,85 @@
+import gzip
+import json
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from audit.models import AuditArchive, AuditEvent
+from audit.partitions import add_months, expired_months, restore_month, run_audit_retention
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+NOW = datetime(2026, 10, 15, 12, 0, tzinfo=dt_timezone.utc)
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    AUDIT_RETENTION_MONTHS=3,
+    AUDIT_ARCHIVE_STORAGE_BACKEND='Audit archive',
+    AUDIT_RESTORE_HOLD_DAYS=7,
+)
+class AuditRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.backend = StorageBackend.objects.create(
+            name='Audit archive', kind=StorageBackend.Kind.LOCAL, created_by=self.user
+        )
+        for moment in (datetime(2026, 5, 3, tzinfo=dt_timezone.utc), datetime(2026, 5, 30, tzinfo=dt_timezone.utc)):
+            AuditEvent.objects.create(event_type='document.opened', actor=self.user, created_at=moment, dedup_key=moment.isoformat())
+        AuditEvent.objects.create(event_type='document.opened', created_at=datetime(2026, 7, 1, tzinfo=dt_timezone.utc))
+
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(expired_months(NOW), [date(2026, 5, 1)])
+
+    def test_expired_months_are_archived_then_dropped(self):
+        self.assertEqual(run_audit_retention(NOW), [date(2026, 5, 1)])
+        self.assertEqual(AuditEvent.objects.count(), 1)
+
+        archive = AuditArchive.objects.get(month=date(2026, 5, 1))
+        self.assertEqual((archive.storage_backend, archive.row_count), (self.backend, 2))
+        with gzip.open(MEDIA_ROOT / archive.storage_key, 'rt', encoding='utf-8') as lines:
+            rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['created_at'][:10] for row in rows], ['2026-05-03', '2026-05-30'])
+
+    def test_restore_reloads_and_retention_drops_again_after_the_hold(self):
+        run_audit_retention(NOW)
+        out = StringIO()
+        call_command('restore_audit_archive', '2026-05', stdout=out)
+        self.assertIn('Restored 2 audit events for 2026-05.', out.getvalue())
+        restored = AuditEvent.objects.filter(created_at__lt=datetime(2026, 6, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(restored.count(), 2)
+        self.assertEqual(restored.first().actor, self.user)
+
+        # Restoring twice does not duplicate events.
+        restore_month(date(2026, 5, 1))
+        self.assertEqual(restored.count(), 2)
+
+        self.assertEqual(run_audit_retention(NOW + timedelta(days=1)), [])
+        self.assertEqual(restored.count(), 2)
+        StorageBackend.objects.filter(pk=self.backend.pk).update(status=StorageBackend.Status.DISABLED)
+        # After the hold May is dropped without a new export; July now needs one and is kept.
+        with self.assertLogs('audit.partitions', 'WARNING'):
+            self.assertEqual(run_audit_retention(NOW + timedelta(days=31)), [date(2026, 5, 1)])
+        self.assertEqual(restored.count(), 0)
+        self.assertEqual(AuditEvent.objects.count(), 1)
+        self.assertIsNone(AuditArchive.objects.get(month=date(2026, 5, 1)).restored_until)
+
+    def test_without_backend_expired_months_are_kept(self):
+        with self.settings(AUDIT_ARCHIVE_STORAGE_BACKEND=''), self.assertLogs('audit.partitions', 'WARNING'):
+            self.assertEqual(run_audit_retention(NOW), [])
+        self.assertEqual(AuditEvent.objects.count(), 3)
+
+    def test_restore_command_rejects_unknown_months(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaises(CommandError):
+            call_command('restore_audit_archive', '2020-01')
+        with self.assertRaises(CommandError):
+            call_command('restore_audit_archive', 'May')
@@ -0,0 +1,137 @@
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from audit import writer
+from audit.models import AuditEvent
+from documents.models import Document, DocumentVersion
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+class AuditWriterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+        self.document = Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title='Report',
+            mime_type='text/plain',
+            size_bytes=5,
+            checksum_sha256='',
+        )
+        self.buffer = writer.MemoryBuffer()
+        patcher = mock.patch.object(writer, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_recording_is_free_and_flushing_is_batched(self):
+        with self.assertNumQueries(0):
+            for _ in range(20):
+                writer.record_event('document.opened', actor=self.user, document=self.document, project_hub=self.hub)
+        self.assertEqual(len(self.buffer), 20)
+
+        # actor, document and hub existence checks, then one INSERT
+        with self.assertNumQueries(4):
+            self.assertEqual(writer.flush_events(), 20)
+        event = AuditEvent.objects.filter(event_type='document.opened').first()
+        self.assertEqual((event.actor, event.document, event.project_hub), (self.user, self.document, self.hub))
+        self.assertEqual(event.payload_json['document_id'], str(self.document.pk))
+
+    def test_duplicates_are_skipped(self):
+        for _ in range(2):
+            writer.record_event('document.upload_ready', document=self.document, dedup_key='upload:1:ready')
+        writer.flush_events()
+        self.assertEqual(AuditEvent.objects.filter(dedup_key='upload:1:ready').count(), 1)
+
+    def test_references_deleted_while_buffered_are_cleared(self):
+        writer.record_event('document.deleted', actor=self.user, document=self.document)
+        document_id = str(self.document.pk)
+        self.document.delete()
+        writer.flush_events()
+        event = AuditEvent.objects.get(event_type='document.deleted')
+        self.assertIsNone(event.document_id)
+        self.assertEqual(event.payload_json['document_id'], document_id)
+
+    def test_failed_batches_stay_buffered(self):
+        writer.record_event('document.opened', document=self.document)
+        with mock.patch.object(writer, 'write_events', side_effect=DatabaseError('down')):
+            with self.assertLogs('audit.writer', 'ERROR'):
+                self.assertEqual(writer.flush_events(), 0)
+        self.assertEqual(len(self.buffer), 1)
+        self.assertEqual(writer.flush_events(), 1)
+
+    @override_settings(AUDIT_BATCH_SIZE=3, AUDIT_FLUSH_INTERVAL_SECONDS=3600)
+    def test_flushes_by_size(self):
+        writer.record_event('document.opened', document=self.document)
+        writer.flush_if_due()
+        self.assertEqual(AuditEvent.objects.count(), 0)
+        writer.record_event('document.opened', document=self.document)
+        writer.record_event('document.opened', document=self.document)
+        writer.flush_if_due()
+        self.assertEqual(AuditEvent.objects.count(), 3)
+
+    @override_settings(AUDIT_FLUSH_THREAD=True, AUDIT_FLUSH_INTERVAL_SECONDS=1)
+    def test_idle_process_is_flushed_by_a_background_thread(self):
+        flushed = threading.Event()
+        with mock.patch.object(self.buffer, 'flush', side_effect=flushed.set):
+            # No later request arrives; the thread still writes the event.
+            writer.record_event('document.opened', document=self.document)
+            self.assertTrue(self.buffer._flusher.daemon)
+            self.assertTrue(flushed.wait(5))
+            self.buffer.stop()
+            self.buffer._flusher.join(5)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, AUDIT_FLUSH_INTERVAL_SECONDS=0)
+class AuditedViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+        backend = StorageBackend.objects.create(name='Local', kind=StorageBackend.Kind.LOCAL, created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document = Document.objects.create(
+                owner=self.user,
+                project_hub=self.hub,
+                title='Report',
+                mime_type='text/plain',
+                size_bytes=5,
+                checksum_sha256='',
+            )
+        MEDIA_ROOT.mkdir(parents=True, exist_ok=True)
+        (MEDIA_ROOT / 'report.txt').write_bytes(b'hello')
+        version = DocumentVersion.objects.create(
+            document=self.document,
+            version_number=1,
+            storage_backend=backend,
+            storage_key='report.txt',
+            size_bytes=5,
+            upload_state=DocumentVersion.UploadState.READY,
+            uploaded_by=self.user,
+        )
+        self.document.current_version = version
+        self.document.save(update_fields=['current_version', 'updated_at'])
+        patcher = mock.patch.object(writer, '_buffer', writer.MemoryBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def test_open_and_delete_are_audited_after_the_response(self):
+        url = reverse('documents:open', kwargs={'slug': self.hub.slug, 'pk': self.document.pk})
+        response = self.client.get(url)
+        b''.join(response.streaming_content)
+        response.close()
+        self.assertEqual(AuditEvent.objects.get(event_type='document.opened').document, self.document)
+
+        self.client.post(reverse('documents:delete', kwargs={'slug': self.hub.slug, 'pk': self.document.pk}))
+        event = AuditEvent.objects.get(event_type='document.deleted')
+        self.assertEqual((event.actor, event.project_hub), (self.user, self.hub))
+        self.assertEqual(event.payload_json['title'], 'Report')
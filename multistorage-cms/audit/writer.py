@@ -0,0 +1,291 @@
+"""Buffered audit event writer.
+
+`record_event` only appends to a buffer, so request handlers never wait on an INSERT.
+Buffered events are written with one ``bulk_create`` per batch:
+
+- ``memory`` (default): a per-process buffer, flushed when it reaches
+  ``AUDIT_BATCH_SIZE`` events or its oldest event is ``AUDIT_FLUSH_INTERVAL_SECONDS``
+  old. Flushes run after the response has been sent (``request_finished``), after
+  Celery tasks and at interpreter exit, and a daemon thread started with the first event
+  of each process flushes every ``AUDIT_FLUSH_INTERVAL_SECONDS`` so an idle process does
+  not hold events. A failed batch goes back to the front of the buffer, so nothing is
+  dropped unless the buffer exceeds ``AUDIT_BUFFER_MAX_EVENTS``. Events from the last
+  interval are lost if the process crashes.
+- ``redis``: events are appended to a Redis stream and the beat task drains it through a
+  consumer group. Entries are acknowledged only after their batch is written, and entries
+  left pending by a crashed consumer are claimed again.
+
+Delivery is at least once. Every event carries a unique ``dedup_key``, and duplicates
+are skipped on insert.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from .models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_GROUP = 'audit-writer'
+
+
+def _model_id(value):
+    return getattr(value, 'pk', value)
+
+
+def build_event(
+    event_type: str,
+    *,
+    actor=None,
+    document=None,
+    project_hub=None,
+    payload: dict | None = None,
+    dedup_key: str | None = None,
+) -> dict[str, Any]:
+    document_id = _model_id(document)
+    payload = dict(payload or {})
+    if document_id is not None:
+        # Kept in the payload as well: the foreign key is cleared when the document is gone.
+        payload.setdefault('document_id', str(document_id))
+    actor_id = _model_id(actor)
+    if actor is not None and not getattr(actor, 'is_authenticated', True):
+        actor_id = None
+    return {
+        'dedup_key': dedup_key or uuid.uuid4().hex,
+        'event_type': event_type,
+        'actor_id': actor_id,
+        'document_id': document_id,
+        'project_hub_id': _model_id(project_hub),
+        'payload': payload,
+        'created_at': timezone.now(),
+    }
+
+
+def _existing(model, ids: set) -> set[str]:
+    # Compared as strings: ids read back from Redis or an archive are no longer UUIDs.
+    ids.discard(None)
+    if not ids:
+        return set()
+    return {str(pk) for pk in model.objects.filter(pk__in=ids).values_list('pk', flat=True)}
+
+
+def _kept(value, existing: set[str]):
+    return value if value is not None and str(value) in existing else None
+
+
+def write_events(events: list[dict[str, Any]]) -> int:
+    """Insert a batch of events, skipping dedup keys that were already written."""
+    if not events:
+        return 0
+    from documents.models import Document
+    from project_hubs.models import ProjectHub
+
+    # References may have been deleted while the event sat in the buffer.
+    actors = _existing(get_user_model(), {event['actor_id'] for event in events})
+    documents = _existing(Document, {event['document_id'] for event in events})
+    hubs = _existing(ProjectHub, {event['project_hub_id'] for event in events})
+    rows = [
+        AuditEvent(
+            dedup_key=event['dedup_key'],
+            event_type=event['event_type'],
+            actor_id=_kept(event['actor_id'], actors),
+            document_id=_kept(event['document_id'], documents),
+            project_hub_id=_kept(event['project_hub_id'], hubs),
+            payload_json=event['payload'],
+            created_at=event['created_at'],
+        )
+        for event in events
+    ]
+    AuditEvent.objects.bulk_create(rows, batch_size=settings.AUDIT_BATCH_SIZE, ignore_conflicts=True)
+    return len(rows)
+
+
+class MemoryBuffer:
+    def __init__(self):
+        self._events: deque[dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._oldest: float | None = None
+        self._flusher: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def append(self, event: dict[str, Any]) -> None:
+        with self._lock:
+            if not self._events:
+                self._oldest = time.monotonic()
+            self._events.append(event)
+            overflow = len(self._events) - settings.AUDIT_BUFFER_MAX_EVENTS
+            for _ in range(max(overflow, 0)):
+                self._events.popleft()
+        if overflow > 0:
+            logger.error('Audit buffer full; dropped %s oldest events.', overflow)
+        self._ensure_flusher()
+
+    def _ensure_flusher(self) -> None:
+        # Threads do not survive a fork, so each worker process starts its own.
+        if not settings.AUDIT_FLUSH_THREAD or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_periodically, name='audit-flusher', daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(max(settings.AUDIT_FLUSH_INTERVAL_SECONDS, 1)):
+            if not self._events:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Background flush of audit events failed.')
+            finally:
+                # Only this thread's connections; request threads keep theirs.
+                connections.close_all()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def due(self) -> bool:
+        if not self._events:
+            return False
+        if len(self._events) >= settings.AUDIT_BATCH_SIZE:
+            return True
+        return time.monotonic() - (self._oldest or 0) >= settings.AUDIT_FLUSH_INTERVAL_SECONDS
+
+    def _take(self) -> list[dict[str, Any]]:
+        with self._lock:
+            batch = [self._events.popleft() for _ in range(min(len(self._events), settings.AUDIT_BATCH_SIZE))]
+            self._oldest = time.monotonic() if self._events else None
+            return batch
+
+    def _restore(self, batch: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._events.extendleft(reversed(batch))
+            self._oldest = time.monotonic()
+
+    def flush(self) -> int:
+        if not self._flush_lock.acquire(blocking=False):
+            return 0  # another thread is already flushing
+        written = 0
+        try:
+            while self._events:
+                batch = self._take()
+                try:
+                    written += write_events(batch)
+                except DatabaseError:
+                    self._restore(batch)
+                    logger.exception('Writing %s audit events failed; they stay buffered.', len(batch))
+                    break
+        finally:
+            self._flush_lock.release()
+        return written
+
+
+class RedisStreamBuffer:
+    def __init__(self, url: str, stream: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.stream = stream
+        self.consumer = f'{CONSUMER_GROUP}-{uuid.uuid4().hex[:8]}'
+        self._group_ready = False
+
+    def append(self, event: dict[str, Any]) -> None:
+        data = dict(event, created_at=event['created_at'].isoformat())
+        self.client.xadd(self.stream, {'event': json.dumps(data, default=str)})
+
+    def due(self) -> bool:
+        return False  # drained by the beat task only
+
+    def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.stream, CONSUMER_GROUP, id='0', mkstream=True)
+        except Exception as exc:  # redis.ResponseError
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self._group_ready = True
+
+    def _read(self) -> list[tuple[bytes, dict]]:
+        batch = settings.AUDIT_BATCH_SIZE
+        idle_ms = settings.AUDIT_FLUSH_INTERVAL_SECONDS * 10 * 1000
+        # Entries a crashed consumer read but never acknowledged come first.
+        _next, entries, *_ = self.client.xautoclaim(
+            self.stream, CONSUMER_GROUP, self.consumer, min_idle_time=idle_ms, start_id='0-0', count=batch
+        )
+        if entries:
+            return entries
+        response = self.client.xreadgroup(CONSUMER_GROUP, self.consumer, {self.stream: '>'}, count=batch)
+        return response[0][1] if response else []
+
+    def flush(self) -> int:
+        self._ensure_group()
+        written = 0
+        while entries := self._read():
+            events = []
+            for _entry_id, fields in entries:
+                event = json.loads(fields[b'event'])
+                event['created_at'] = datetime.fromisoformat(event['created_at'])
+                events.append(event)
+            written += write_events(events)
+            ids = [entry_id for entry_id, _fields in entries]
+            self.client.xack(self.stream, CONSUMER_GROUP, *ids)
+            self.client.xdel(self.stream, *ids)
+        return written
+
+
+_buffer: MemoryBuffer | RedisStreamBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> MemoryBuffer | RedisStreamBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                if settings.AUDIT_BUFFER_BACKEND == 'redis' and settings.REDIS_CACHE_AVAILABLE:
+                    _buffer = RedisStreamBuffer(settings.REDIS_URL, settings.AUDIT_REDIS_STREAM)
+                else:
+                    _buffer = MemoryBuffer()
+                    atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record_event(event_type: str, **kwargs) -> None:
+    """Queue an audit event. Accepts the keyword arguments of `build_event`.
+
+    Never raises: auditing must not break the action being audited.
+    """
+    try:
+        get_buffer().append(build_event(event_type, **kwargs))
+    except Exception:
+        logger.exception('Could not queue audit event %s.', event_type)
+
+
+def flush_events() -> int:
+    """Write everything buffered (or drain the stream). Returns the number of events written."""
+    return get_buffer().flush()
+
+
+def flush_if_due(**_kwargs) -> None:
+    buffer = get_buffer()
+    if buffer.due():
+        buffer.flush()
@@ -69,6 +69,7 @@ if ENABLE_ALLAUTH:
     MIDDLEWARE.append('allauth.account.middleware.AccountMiddleware')
 
 ROOT_URLCONF = 'core.urls'
+TEST_RUNNER = 'core.test_runner.TestRunner'
 
 TEMPLATES = [
     {
@@ -82,6 +83,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'project_hubs.context_processors.user_hubs',
                 'core.context_processors.ops_links',
+                'access_control.context_processors.feature_flags',
             ],
         },
     },
@@ -187,8 +189,115 @@ CELERY_TASK_SOFT_TIME_LIMIT = int(os.getenv('CELERY_TASK_SOFT_TIME_LIMIT', '240'
 CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', '0') == '1'
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Upload rollups behind the hub dashboards; run `celery -A core beat` next to the worker.
+UPLOAD_ROLLUP_INTERVAL_SECONDS = int(os.getenv('UPLOAD_ROLLUP_INTERVAL_SECONDS', '300'))
+# Re-read versions finished this long before the watermark to catch late commits.
+UPLOAD_ROLLUP_SETTLE_SECONDS = int(os.getenv('UPLOAD_ROLLUP_SETTLE_SECONDS', '300'))
+# Audit events are buffered and written in batches: 'memory' keeps a per-process buffer,
+# 'redis' appends to a Redis stream that the beat task drains (survives process crashes).
+AUDIT_BUFFER_BACKEND = os.getenv('AUDIT_BUFFER_BACKEND', 'memory')
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL_SECONDS = int(os.getenv('AUDIT_FLUSH_INTERVAL_SECONDS', '5'))
+# With the memory buffer, a background thread per process flushes every interval.
+AUDIT_FLUSH_THREAD = os.getenv('AUDIT_FLUSH_THREAD', '1') == '1'
+AUDIT_BUFFER_MAX_EVENTS = int(os.getenv('AUDIT_BUFFER_MAX_EVENTS', '50000'))
+AUDIT_REDIS_STREAM = os.getenv('AUDIT_REDIS_STREAM', 'audit-events')
+AUDIT_EXPORT_CHUNK_SIZE = int(os.getenv('AUDIT_EXPORT_CHUNK_SIZE', '2000'))
+# Monthly audit partitions (PostgreSQL); older months are archived as gzipped JSONL to the
+# StorageBackend named here and dropped. Without a backend, expired months are kept.
+AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '12'))
+AUDIT_ARCHIVE_STORAGE_BACKEND = os.getenv('AUDIT_ARCHIVE_STORAGE_BACKEND', '')
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv('AUDIT_PARTITION_MONTHS_AHEAD', '2'))
+AUDIT_RESTORE_HOLD_DAYS = int(os.getenv('AUDIT_RESTORE_HOLD_DAYS', '7'))
+AUDIT_RETENTION_INTERVAL_SECONDS = int(os.getenv('AUDIT_RETENTION_INTERVAL_SECONDS', '86400'))
+# Versions outside their hub's retention rules are deleted in batches of this size.
+VERSION_PRUNE_BATCH_SIZE = int(os.getenv('VERSION_PRUNE_BATCH_SIZE', '1000'))
+VERSION_PRUNE_INTERVAL_SECONDS = int(os.getenv('VERSION_PRUNE_INTERVAL_SECONDS', '3600'))
+# Objects of deleted versions are removed by the storage GC: one provider call per batch,
+# at most STORAGE_GC_BATCHES_PER_SECOND calls and STORAGE_GC_MAX_BATCHES batches per run.
+STORAGE_GC_BATCH_SIZE = int(os.getenv('STORAGE_GC_BATCH_SIZE', '1000'))
+STORAGE_GC_BATCHES_PER_SECOND = float(os.getenv('STORAGE_GC_BATCHES_PER_SECOND', '2'))
+STORAGE_GC_MAX_BATCHES = int(os.getenv('STORAGE_GC_MAX_BATCHES', '100'))
+STORAGE_GC_RETRY_SECONDS = int(os.getenv('STORAGE_GC_RETRY_SECONDS', '60'))
+STORAGE_GC_INTERVAL_SECONDS = int(os.getenv('STORAGE_GC_INTERVAL_SECONDS', '300'))
+# New dedup chunks are not collected before this, so uploads in progress can save their manifest.
+STORAGE_GC_CHUNK_GRACE_SECONDS = int(os.getenv('STORAGE_GC_CHUNK_GRACE_SECONDS', '86400'))
+# `import_documents` creates rows and queues uploads this many files at a time.
+DOCUMENT_IMPORT_BATCH_SIZE = int(os.getenv('DOCUMENT_IMPORT_BATCH_SIZE', '500'))
+# Previews: thumbnail bounding box in pixels, the largest image/PDF that is rendered and
+# how much of a text file the snippet is taken from. Renditions are cached for a year.
+PREVIEW_THUMBNAIL_SIZE = int(os.getenv('PREVIEW_THUMBNAIL_SIZE', '320'))
+PREVIEW_MAX_SOURCE_BYTES = int(os.getenv('PREVIEW_MAX_SOURCE_BYTES', str(50 * 1024 * 1024)))
+PREVIEW_TEXT_BYTES = int(os.getenv('PREVIEW_TEXT_BYTES', '4096'))
+PREVIEW_CACHE_SECONDS = int(os.getenv('PREVIEW_CACHE_SECONDS', str(365 * 24 * 3600)))
+CELERY_BEAT_SCHEDULE = {
+    'upload-rollups': {
+        'task': 'documents.tasks.rollup_uploads_task',
+        'schedule': UPLOAD_ROLLUP_INTERVAL_SECONDS,
+    },
+    'flush-audit-events': {
+        'task': 'audit.tasks.flush_audit_events_task',
+        'schedule': AUDIT_FLUSH_INTERVAL_SECONDS,
+    },
+    'audit-retention': {
+        'task': 'audit.tasks.audit_retention_task',
+        'schedule': AUDIT_RETENTION_INTERVAL_SECONDS,
+    },
+    'prune-versions': {
+        'task': 'documents.tasks.prune_versions_task',
+        'schedule': VERSION_PRUNE_INTERVAL_SECONDS,
+    },
+    'storage-gc': {
+        'task': 'documents.tasks.collect_storage_garbage_task',
+        'schedule': STORAGE_GC_INTERVAL_SECONDS,
+    },
+}
+
 FLOWER_URL = os.getenv('FLOWER_URL', 'http://127.0.0.1:5555')
 
+REDIS_CACHE_AVAILABLE = importlib.util.find_spec('redis') is not None
+ENABLE_REDIS_CACHE = os.getenv('ENABLE_REDIS_CACHE', '0') == '1' and REDIS_CACHE_AVAILABLE
+if ENABLE_REDIS_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_CACHE_URL', REDIS_URL),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 'index' reads document access from the materialized UserDocumentAccess table,
+# 'rules' evaluates DocumentAccess rules directly (e.g. while the index is rebuilt).
+DOCUMENT_ACL_SOURCE = os.getenv('DOCUMENT_ACL_SOURCE', 'index')
+
+DOCUMENT_PAGE_SIZE = int(os.getenv('DOCUMENT_PAGE_SIZE', '50'))
+DOCUMENT_MAX_PAGE_SIZE = int(os.getenv('DOCUMENT_MAX_PAGE_SIZE', '200'))
+DOCUMENT_BULK_MAX_OPERATIONS = int(os.getenv('DOCUMENT_BULK_MAX_OPERATIONS', '1000'))
+
+HUB_AUTHZ_CACHE_TIMEOUT = int(os.getenv('HUB_AUTHZ_CACHE_TIMEOUT', '3600'))
+# Rendered hub fragments are keyed by generation; the timeout only bounds stale owner emails etc.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '300'))
+# Users whose merged feature flags each process keeps in memory.
+FEATURE_FLAG_USER_CACHE_SIZE = int(os.getenv('FEATURE_FLAG_USER_CACHE_SIZE', '10000'))
+
+# Upload progress is written to the cache by the worker, never to the database.
+UPLOAD_PROGRESS_MIN_INTERVAL = float(os.getenv('UPLOAD_PROGRESS_MIN_INTERVAL', '1.0'))
+UPLOAD_PROGRESS_STALL_SECONDS = int(os.getenv('UPLOAD_PROGRESS_STALL_SECONDS', '60'))
+UPLOAD_PROGRESS_TTL = int(os.getenv('UPLOAD_PROGRESS_TTL', '86400'))
+
+# Content-defined chunk sizes for backends with `"chunked": true` in their config.
+DOCUMENT_CHUNK_MIN_SIZE = int(os.getenv('DOCUMENT_CHUNK_MIN_SIZE', str(256 * 1024)))
+DOCUMENT_CHUNK_AVG_SIZE = int(os.getenv('DOCUMENT_CHUNK_AVG_SIZE', str(1024 * 1024)))
+DOCUMENT_CHUNK_MAX_SIZE = int(os.getenv('DOCUMENT_CHUNK_MAX_SIZE', str(4 * 1024 * 1024)))
+
+# Document list payloads are rendered with orjson when it is installed.
+ORJSON_AVAILABLE = importlib.util.find_spec('orjson') is not None
+
 if ENABLE_API:
     REST_FRAMEWORK = {
         'DEFAULT_AUTHENTICATION_CLASSES': [
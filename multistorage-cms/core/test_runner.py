@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Tests flush explicitly; a background flush would race their assertions.
+        settings.AUDIT_FLUSH_THREAD = False
+
+    def teardown_databases(self, old_config, **kwargs):
+        # Events buffered by tests would otherwise be flushed at exit, after the test
+        # databases are gone.
+        from audit.writer import flush_events
+
+        flush_events()
+        super().teardown_databases(old_config, **kwargs)
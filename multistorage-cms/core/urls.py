@@ -17,5 +17,6 @@ if settings.ENABLE_API:
 
     urlpatterns += [
         path('api/v1/', include('documents.api_urls')),
+        path('api/v1/', include('audit.api_urls')),
         path('api/v1/auth/token/', obtain_auth_token),
     ]
@@ -0,0 +1,80 @@
+from django.contrib import admin
+from django.core.exceptions import ObjectDoesNotExist
+from django.template.defaultfilters import filesizeformat
+
+from .models import BackendStorageCounter, DocumentPreview, HubStorageCounter, StorageTombstone
+
+
+def _storage_counter(obj):
+    try:
+        return obj.storage_counter
+    except ObjectDoesNotExist:
+        return None
+
+
+@admin.display(description='Documents')
+def counter_documents(obj):
+    counter = _storage_counter(obj)
+    return counter.document_count if counter else 0
+
+
+@admin.display(description='Versions')
+def counter_versions(obj):
+    counter = _storage_counter(obj)
+    return counter.version_count if counter else 0
+
+
+@admin.display(description='Stored')
+def counter_stored(obj):
+    counter = _storage_counter(obj)
+    return filesizeformat(counter.ready_bytes if counter else 0)
+
+
+@admin.register(HubStorageCounter)
+class HubStorageCounterAdmin(admin.ModelAdmin):
+    list_display = (
+        'project_hub',
+        'document_count',
+        'version_count',
+        'ready_bytes',
+        'pending_bytes',
+        'failed_bytes',
+        'updated_at',
+    )
+    list_select_related = ('project_hub',)
+    search_fields = ('project_hub__name', 'project_hub__slug')
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(BackendStorageCounter)
+class BackendStorageCounterAdmin(admin.ModelAdmin):
+    list_display = (
+        'storage_backend',
+        'document_count',
+        'version_count',
+        'ready_bytes',
+        'pending_bytes',
+        'failed_bytes',
+        'updated_at',
+    )
+    list_select_related = ('storage_backend',)
+    search_fields = ('storage_backend__name',)
+    readonly_fields = ('updated_at',)
+
+
+@admin.register(StorageTombstone)
+class StorageTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('storage_backend', 'storage_key', 'attempts', 'next_attempt_at', 'created_at')
+    list_select_related = ('storage_backend',)
+    list_filter = ('storage_backend',)
+    search_fields = ('storage_key', 'last_error')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(DocumentPreview)
+class DocumentPreviewAdmin(admin.ModelAdmin):
+    list_display = ('checksum_sha256', 'storage_backend', 'state', 'updated_at')
+    list_select_related = ('storage_backend',)
+    list_filter = ('state', 'storage_backend')
+    search_fields = ('checksum_sha256', 'error_message')
+    readonly_fields = ('created_at', 'updated_at')
@@ -3,20 +3,30 @@ from pathlib import Path
 from urllib.parse import urlparse
 
 from django.conf import settings
-from django.db.models import Q
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 
 from rest_framework import serializers, status
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from project_hubs.models import ProjectHub, ProjectMembership
+from audit.writer import record_event
+from project_hubs.authz import get_hub_authorization
 from storage_backends.models import StorageBackend
 
+from .bulk import apply_operations
+from .chunking import stream_version
+from .conditional import collection_state, not_modified, set_validators, weak_etag
+from .listing import InvalidFields, finalize_rows, list_values, parse_fields
 from .models import Document, DocumentVersion
+from .pagination import InvalidCursor, clamp_page_size, document_paginator
+from .progress import get_upload_progress
+from .renderers import FastJSONRenderer
+from .search import search_documents, search_paginator
+from .tags import filter_by_tags, parse_tags, tag_facets
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -39,6 +49,12 @@ class DocumentSerializer(serializers.ModelSerializer):
             'current_storage_key',
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
 
 class DocumentWriteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -46,38 +62,36 @@ class DocumentWriteSerializer(serializers.ModelSerializer):
         fields = ['title', 'description', 'visibility']
 
 
+class DocumentBulkCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Document
+        fields = ['title', 'description', 'visibility', 'mime_type', 'size_bytes', 'checksum_sha256']
+        # Same defaults as the single-document POST.
+        extra_kwargs = {
+            'mime_type': {'default': 'application/octet-stream'},
+            'size_bytes': {'default': 0},
+            'checksum_sha256': {'default': ''},
+        }
+
+
 class HubAPIMixin:
     authentication_classes = [SessionAuthentication, TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_hub(self, slug):
-        return get_object_or_404(
-            ProjectHub.objects.filter(Q(owner=self.request.user) | Q(memberships__user=self.request.user)).distinct(),
-            slug=slug,
-        )
+        return get_hub_authorization(self.request, slug).hub
 
     def get_roles(self, hub):
-        if hub.owner_id == self.request.user.id:
-            return {ProjectMembership.Role.OWNER}
-        return set(ProjectMembership.objects.filter(project_hub=hub, user=self.request.user).values_list('role', flat=True))
+        return set(get_hub_authorization(self.request, hub.slug).roles)
 
     def can_manage(self, hub):
-        return bool(self.get_roles(hub) & {ProjectMembership.Role.OWNER, ProjectMembership.Role.ADMIN, ProjectMembership.Role.EDITOR})
+        return get_hub_authorization(self.request, hub.slug).can_manage
 
     def can_delete(self, hub):
-        return bool(self.get_roles(hub) & {ProjectMembership.Role.OWNER, ProjectMembership.Role.ADMIN})
+        return get_hub_authorization(self.request, hub.slug).can_delete
 
     def accessible_documents(self, hub):
-        return (
-            Document.objects.filter(project_hub=hub)
-            .filter(
-                Q(owner=self.request.user)
-                | Q(access_rules__subject_user=self.request.user)
-                | Q(access_rules__subject_group__in=self.request.user.groups.all())
-            )
-            .select_related('current_version', 'owner')
-            .distinct()
-        )
+        return Document.objects.accessible_to(self.request.user, hub).select_related('current_version', 'owner')
 
     def build_file_info(self, document):
         version = document.current_version
@@ -96,7 +110,9 @@ class HubAPIMixin:
             'document_id': str(document.pk),
             'version_id': version.id,
         }
-        if backend.kind == StorageBackend.Kind.S3:
+        if version.is_chunked:
+            info['location_type'] = 'chunk_manifest'
+        elif backend.kind == StorageBackend.Kind.S3:
             info['location_type'] = 's3_uri'
         elif backend.kind == StorageBackend.Kind.GDRIVE:
             info['location_type'] = 'google_drive_file'
@@ -106,16 +122,52 @@ class HubAPIMixin:
 
 
 class DocumentListCreateAPI(HubAPIMixin, APIView):
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
     def get(self, request, slug):
         hub = self.get_hub(slug)
-        qs = self.accessible_documents(hub).order_by('-created_at')
+        qs = self.accessible_documents(hub)
         query = request.query_params.get('q', '').strip()
         visibility = request.query_params.get('visibility', '').strip()
-        if query:
-            qs = qs.filter(Q(title__icontains=query) | Q(description__icontains=query))
         if visibility:
             qs = qs.filter(visibility=visibility)
-        return Response(DocumentSerializer(qs, many=True).data)
+        qs = filter_by_tags(
+            qs,
+            parse_tags(request.query_params.get('tags', '')),
+            request.query_params.get('tag_mode', 'all'),
+        )
+        paginator = document_paginator
+        if query:
+            qs = search_documents(qs, query)
+            paginator = search_paginator
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except InvalidFields as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        last_modified, total = collection_state(qs)
+        etag = weak_etag(request, request.user.pk, last_modified, total)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return cached
+
+        keys = [name for name, _descending in paginator.keys]
+        try:
+            page = paginator.paginate(
+                list_values(qs, keys, fields),
+                cursor=request.query_params.get('cursor') or None,
+                page_size=clamp_page_size(request.query_params.get('page_size')),
+            )
+        except InvalidCursor as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = set_validators(Response(finalize_rows(page.items, keys, fields)), etag, last_modified)
+        if page.next_cursor:
+            params = request.query_params.copy()
+            params['cursor'] = page.next_cursor
+            next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+            response['Link'] = f'<{next_url}>; rel="next"'
+            response['X-Next-Cursor'] = page.next_cursor
+        return response
 
     def post(self, request, slug):
         hub = self.get_hub(slug)
@@ -135,17 +187,48 @@ class DocumentListCreateAPI(HubAPIMixin, APIView):
             size_bytes=int(request.data.get('size_bytes', 0)),
             checksum_sha256=request.data.get('checksum_sha256', ''),
         )
+        record_event('document.created', actor=request.user, document=document, project_hub=hub)
         return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
 
 
+class DocumentBulkAPI(HubAPIMixin, APIView):
+    def post(self, request, slug):
+        authorization = get_hub_authorization(request, slug)
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return Response({'detail': 'Expected a non-empty "operations" list.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > settings.DOCUMENT_BULK_MAX_OPERATIONS:
+            return Response(
+                {'detail': f'At most {settings.DOCUMENT_BULK_MAX_OPERATIONS} operations per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = apply_operations(operations, authorization, DocumentBulkCreateSerializer, DocumentWriteSerializer)
+        return Response({'results': results})
+
+
+class TagFacetsAPI(HubAPIMixin, APIView):
+    def get(self, request, slug):
+        hub = self.get_hub(slug)
+        limit = clamp_page_size(request.query_params.get('limit'))
+        return Response(tag_facets(request.user, hub, limit=limit))
+
+
 class DocumentDetailAPI(HubAPIMixin, APIView):
     def get_object(self, slug, pk):
         hub = self.get_hub(slug)
         return get_object_or_404(self.accessible_documents(hub), pk=pk), hub
 
     def get(self, request, slug, pk):
+        try:
+            fields = parse_fields(request.query_params.get('fields'))
+        except InvalidFields as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         document, _hub = self.get_object(slug, pk)
-        return Response(DocumentSerializer(document).data)
+        etag = weak_etag(request, request.user.pk, document.updated_at)
+        cached = not_modified(request, etag, document.updated_at)
+        if cached is not None:
+            return cached
+        return set_validators(Response(DocumentSerializer(document, fields=fields).data), etag, document.updated_at)
 
     def patch(self, request, slug, pk):
         document, hub = self.get_object(slug, pk)
@@ -154,13 +237,24 @@ class DocumentDetailAPI(HubAPIMixin, APIView):
         serializer = DocumentWriteSerializer(document, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        record_event(
+            'document.updated',
+            actor=request.user,
+            document=document,
+            project_hub=hub,
+            payload={'fields': sorted(serializer.validated_data)},
+        )
         return Response(DocumentSerializer(document).data)
 
     def delete(self, request, slug, pk):
         document, hub = self.get_object(slug, pk)
         if not (document.owner_id == request.user.id or self.can_delete(hub)):
             return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+        document_id, title = document.pk, document.title
         document.delete()
+        record_event(
+            'document.deleted', actor=request.user, document=document_id, project_hub=hub, payload={'title': title}
+        )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -171,6 +265,19 @@ class DocumentFileInfoAPI(HubAPIMixin, APIView):
         return Response(self.build_file_info(document))
 
 
+class DocumentUploadProgressAPI(HubAPIMixin, APIView):
+    def get(self, request, slug, pk):
+        hub = self.get_hub(slug)
+        document = get_object_or_404(self.accessible_documents(hub), pk=pk)
+        version = document.current_version
+        if not version:
+            return Response({'state': None, 'progress': None})
+        progress = None
+        if version.upload_state == DocumentVersion.UploadState.UPLOADING:
+            progress = get_upload_progress(version.id)
+        return Response({'version_id': version.id, 'state': version.upload_state, 'progress': progress})
+
+
 class DocumentOpenAPI(HubAPIMixin, APIView):
     def get(self, request, slug, pk):
         hub = self.get_hub(slug)
@@ -182,6 +289,16 @@ class DocumentOpenAPI(HubAPIMixin, APIView):
         version = document.current_version
         backend = version.storage_backend
         storage_key = version.storage_key
+        record_event(
+            'document.opened',
+            actor=request.user,
+            document=document,
+            project_hub=hub,
+            payload={'version_id': version.id, 'backend_kind': backend.kind},
+        )
+
+        if version.is_chunked:
+            return stream_version(version, document.mime_type)
 
         if backend.kind == backend.Kind.LOCAL:
             path = Path(storage_key)
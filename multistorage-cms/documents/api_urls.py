@@ -1,12 +1,27 @@
 from django.urls import path
 
-from .api import DocumentDetailAPI, DocumentFileInfoAPI, DocumentListCreateAPI, DocumentOpenAPI
+from .api import (
+    DocumentBulkAPI,
+    DocumentDetailAPI,
+    DocumentFileInfoAPI,
+    DocumentListCreateAPI,
+    DocumentOpenAPI,
+    DocumentUploadProgressAPI,
+    TagFacetsAPI,
+)
 
 app_name = 'documents_api'
 
 urlpatterns = [
     path('hubs/<slug:slug>/documents/', DocumentListCreateAPI.as_view(), name='documents'),
+    path('hubs/<slug:slug>/documents/bulk/', DocumentBulkAPI.as_view(), name='documents_bulk'),
+    path('hubs/<slug:slug>/tags/', TagFacetsAPI.as_view(), name='tag_facets'),
     path('hubs/<slug:slug>/documents/<uuid:pk>/', DocumentDetailAPI.as_view(), name='document_detail'),
     path('hubs/<slug:slug>/documents/<uuid:pk>/file-info/', DocumentFileInfoAPI.as_view(), name='document_file_info'),
     path('hubs/<slug:slug>/documents/<uuid:pk>/open/', DocumentOpenAPI.as_view(), name='document_open'),
+    path(
+        'hubs/<slug:slug>/documents/<uuid:pk>/upload-progress/',
+        DocumentUploadProgressAPI.as_view(),
+        name='document_upload_progress',
+    ),
 ]
@@ -0,0 +1,156 @@
+"""Bulk create/update/delete of document metadata.
+
+Operations are validated and authorized against one hub authorization and one document
+lookup, then applied with ``bulk_create``/``bulk_update``/a single delete inside one
+transaction. ``bulk_*`` bypass model signals, so the storage counters are updated in the
+transaction, the hub's cached fragments are invalidated, and the derived access index and
+search entries are refreshed explicitly after commit. Each applied operation is audited.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from access_control import indexing
+from audit.writer import record_event
+
+from . import counters
+from .fragments import invalidate_hubs
+from .models import Document
+from .search import refresh_search_entries
+
+BATCH_SIZE = 500
+SEARCH_FIELDS = {'title', 'description'}
+
+
+class BulkResult:
+    def __init__(self, size: int):
+        self.items: list[dict | None] = [None] * size
+
+    def ok(self, index: int, op: str, status: int, document_id) -> None:
+        self.items[index] = {'index': index, 'op': op, 'status': status, 'id': str(document_id)}
+
+    def error(self, index: int, op: str, status: int, errors) -> None:
+        self.items[index] = {'index': index, 'op': op, 'status': status, 'errors': errors}
+
+    def failed(self, index: int) -> bool:
+        return self.items[index] is not None
+
+
+def apply_operations(operations: list[dict], authorization, create_serializer, update_serializer) -> list[dict]:
+    """Apply ``operations`` in ``authorization.hub`` and return one result per operation.
+
+    Each operation is ``{"op": "create", "data": {...}}``, ``{"op": "update", "id": ...,
+    "data": {...}}`` or ``{"op": "delete", "id": ...}``. Invalid or forbidden operations
+    are reported and skipped; the valid ones are committed together.
+    """
+    user, hub = authorization.user, authorization.hub
+    result = BulkResult(len(operations))
+
+    ids = set()
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in {'create', 'update', 'delete'}:
+            result.error(index, op, 400, {'op': ['Expected "create", "update" or "delete".']})
+        elif op != 'create':
+            document_id = _document_id(operation)
+            if document_id is None:
+                result.error(index, op, 400, {'id': ['A valid document id is required.']})
+            elif document_id in ids:
+                result.error(index, op, 400, {'id': ['Each document may appear in one operation only.']})
+            else:
+                ids.add(document_id)
+
+    documents = {}
+    if ids:
+        queryset = Document.objects.accessible_to(user, hub).filter(pk__in=ids)
+        documents = {str(document.pk): document for document in queryset}
+
+    now = timezone.now()
+    to_create: list[tuple[int, Document]] = []
+    to_update: list[tuple[int, Document]] = []
+    to_delete: list[tuple[int, Document]] = []
+    update_fields: set[str] = set()
+    for index, operation in enumerate(operations):
+        if result.failed(index):
+            continue
+        op = operation['op']
+        if op == 'create':
+            if not authorization.can_manage:
+                result.error(index, op, 403, {'detail': 'Permission denied.'})
+                continue
+            serializer = create_serializer(data=operation.get('data') or {})
+            if not serializer.is_valid():
+                result.error(index, op, 400, serializer.errors)
+                continue
+            to_create.append((index, Document(owner=user, project_hub=hub, **serializer.validated_data)))
+            continue
+
+        document = documents.get(_document_id(operation))
+        if document is None:
+            result.error(index, op, 404, {'detail': 'Not found.'})
+            continue
+        allowed = authorization.can_manage if op == 'update' else authorization.can_delete
+        if not (document.owner_id == user.id or allowed):
+            result.error(index, op, 403, {'detail': 'Permission denied.'})
+            continue
+        if op == 'delete':
+            to_delete.append((index, document))
+            continue
+        serializer = update_serializer(document, data=operation.get('data') or {}, partial=True)
+        if not serializer.is_valid():
+            result.error(index, op, 400, serializer.errors)
+            continue
+        for name, value in serializer.validated_data.items():
+            setattr(document, name, value)
+        document.updated_at = now
+        update_fields.update(serializer.validated_data)
+        to_update.append((index, document))
+
+    with transaction.atomic():
+        Document.objects.bulk_create([document for _index, document in to_create], batch_size=BATCH_SIZE)
+        # New documents have no versions yet, so only the hub's document count moves.
+        counters.apply_hub(hub.pk, {'document_count': len(to_create)})
+        if to_update:
+            Document.objects.bulk_update(
+                [document for _index, document in to_update],
+                sorted(update_fields | {'updated_at'}),
+                batch_size=BATCH_SIZE,
+            )
+        if to_delete:
+            Document.objects.filter(pk__in=[document.pk for _index, document in to_delete]).delete()
+
+        if to_create or to_update or to_delete:
+            # Deletes invalidate through post_delete; bulk_create/bulk_update send no signal.
+            invalidate_hubs([hub.pk])
+
+        created_ids = [document.pk for _index, document in to_create]
+        if created_ids:
+            transaction.on_commit(partial(indexing.sync_documents, created_ids))
+        searchable = list(created_ids)
+        if update_fields & SEARCH_FIELDS:
+            searchable += [document.pk for _index, document in to_update]
+        if searchable:
+            transaction.on_commit(partial(refresh_search_entries, searchable))
+
+    for event_type, op, status, applied in (
+        ('document.created', 'create', 201, to_create),
+        ('document.updated', 'update', 200, to_update),
+        ('document.deleted', 'delete', 204, to_delete),
+    ):
+        for index, document in applied:
+            result.ok(index, op, status, document.pk)
+            record_event(event_type, actor=user, document=document.pk, project_hub=hub, payload={'bulk': True})
+    return result.items
+
+
+def _document_id(operation: dict) -> str | None:
+    try:
+        value = Document._meta.pk.to_python(operation.get('id'))
+    except ValidationError:
+        return None
+    return str(value) if value is not None else None
@@ -0,0 +1,246 @@
+"""Content-defined chunking and deduplicated chunk storage.
+
+Backends with ``"chunked": true`` in their config store versions as a manifest of
+`VersionChunk` rows that point at content-addressed `StorageChunk` objects. Each chunk is
+uploaded once per backend, so re-uploading a large file with a small edit only sends the
+chunks around the edit.
+
+Boundaries are found with C-speed bulk operations rather than a per-byte loop. A block of
+the input is read as one little-endian integer and multiplied by a fixed odd ``WINDOW``-byte
+constant, so every byte of the product mixes the ``WINDOW`` input bytes up to it (carries
+from further back fade by a factor of 256 per byte). ``bytes.translate`` keeps the top bit
+of each product byte and ``bytes.find`` looks for a fixed bit pattern; a chunk ends after the
+first match, and a pattern of ``n`` bits matches once every ``2 ** n`` bytes. Chunks are kept
+between ``DOCUMENT_CHUNK_MIN_SIZE`` and ``DOCUMENT_CHUNK_MAX_SIZE``. Before the average size
+the pattern is two bits longer, and after it two shorter, which narrows the spread of chunk
+sizes (normalized chunking, as in FastCDC). The pattern mixes both bit values, so runs of
+identical bytes end at the maximum size instead of at every position.
+
+Chunk rows are content-addressed, but every upload writes its object under a fresh key.
+`documents.gc` can then delete the object of a retired chunk while the same content is
+uploaded again. New chunks carry ``orphan_check_at`` so that chunks of an upload that never
+saved its manifest are collected as well, and reusing a chunk that is waiting for its orphan
+check pushes the check back by the same grace period.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import tempfile
+import uuid
+from datetime import timedelta
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from storage_backends.models import StorageBackend
+from storage_backends.providers import StorageProvider, get_provider
+
+from .gc import bury
+from .models import DocumentVersion, StorageChunk, VersionChunk
+
+# Changing the mixer or the pattern moves every boundary and defeats deduplication.
+WINDOW = 32
+MIXER = int.from_bytes(hashlib.sha256(b'multistorage-cdc-mixer').digest()[:WINDOW], 'little') | 1
+PATTERN = bytes((byte >> shift) & 1 for byte in hashlib.sha256(b'multistorage-cdc-pattern').digest() for shift in range(8))
+TOP_BIT = bytes(value >> 7 for value in range(256))
+# Bytes read before a block so that carries into its first byte have faded out.
+CARRY_BYTES = 8
+LOOKUP_BATCH = 32
+
+
+def is_chunked_backend(backend: StorageBackend) -> bool:
+    return bool((backend.config_encrypted or {}).get('chunked'))
+
+
+def chunk_key(digest: str) -> str:
+    return f'chunks/{digest[:2]}/{digest}.{uuid.uuid4().hex[:12]}'
+
+
+def _pattern(bits: int) -> bytes:
+    """The first ``bits`` bits of `PATTERN` that hold as many ones as zeros (give or take one)."""
+    bits = max(bits, 2)
+    ones = [index for index, bit in enumerate(PATTERN) if bit][: bits // 2]
+    zeros = [index for index, bit in enumerate(PATTERN) if not bit][: bits - bits // 2]
+    return bytes(PATTERN[index] for index in sorted(ones + zeros))
+
+
+def _bits(buffer, start: int, stop: int) -> bytes:
+    """One mixed bit per position of ``buffer[start:stop]``, as 0/1 bytes."""
+    lead = min(start, WINDOW + CARRY_BYTES)
+    product = int.from_bytes(buffer[start - lead:stop], 'little') * MIXER
+    return product.to_bytes(stop - start + lead + WINDOW, 'little')[lead:lead + stop - start].translate(TOP_BIT)
+
+
+def _find_cut(buffer, start: int, stop: int, pattern: bytes, block: int) -> int:
+    """The first cut in ``(start, stop]`` that ends a match of ``pattern``, or -1."""
+    low = max(start + 1 - len(pattern), 0)
+    while low + len(pattern) <= stop:
+        high = min(low + block, stop)
+        found = _bits(buffer, low, high).find(pattern)
+        if found != -1:
+            return low + found + len(pattern)
+        # Consecutive blocks overlap so that matches spanning both are found.
+        low = high + 1 - len(pattern) if high < stop else stop
+    return -1
+
+
+def cut_point(buffer: bytes | bytearray, min_size: int, avg_size: int, max_size: int) -> int:
+    """Length of the chunk at the start of ``buffer`` (all of it if it holds the final chunk)."""
+    end = min(len(buffer), max_size)
+    if end <= min_size:
+        return end
+    bits = avg_size.bit_length() - 1
+    barrier = max(min(avg_size, end), min_size)
+    # Most cuts fall shortly after the barrier, so the input is mixed a quarter average at a time.
+    block = max(avg_size // 4, 64)
+    for start, stop, pattern in ((min_size, barrier, _pattern(bits + 2)), (barrier, end, _pattern(bits - 2))):
+        found = _find_cut(buffer, start, stop, pattern, block)
+        if found != -1:
+            return found
+    return end
+
+
+def iter_chunks(
+    stream: BinaryIO,
+    min_size: int | None = None,
+    avg_size: int | None = None,
+    max_size: int | None = None,
+) -> Iterator[bytes]:
+    min_size = min_size or settings.DOCUMENT_CHUNK_MIN_SIZE
+    avg_size = avg_size or settings.DOCUMENT_CHUNK_AVG_SIZE
+    max_size = max_size or settings.DOCUMENT_CHUNK_MAX_SIZE
+    buffer = bytearray()
+    eof = False
+    while True:
+        while not eof and len(buffer) < max_size:
+            data = stream.read(max_size)
+            eof = not data
+            buffer += data
+        if not buffer:
+            return
+        size = cut_point(buffer, min_size, avg_size, max_size)
+        yield bytes(buffer[:size])
+        del buffer[:size]
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _chunk_ids(backend: StorageBackend, digests: Iterable[str]) -> dict[str, int]:
+    return dict(StorageChunk.objects.filter(storage_backend=backend, sha256__in=list(digests)).values_list('sha256', 'id'))
+
+
+def _claim_chunks(backend: StorageBackend, digests: Iterable[str], check_at) -> dict[str, int]:
+    """Resolve stored chunks for reuse, pushing back the orphan check of released ones.
+
+    The check moves before the lookup: a chunk the collector retires first is simply not
+    found, and one found afterwards cannot be retired before this upload saves its manifest.
+    """
+    digests = list(digests)
+    StorageChunk.objects.filter(storage_backend=backend, sha256__in=digests, orphan_check_at__isnull=False).update(
+        orphan_check_at=check_at
+    )
+    return _chunk_ids(backend, digests)
+
+
+def store_chunked(
+    version: DocumentVersion,
+    source: Path,
+    provider: StorageProvider,
+    progress: Callable[[int], None] | None = None,
+) -> tuple[list[tuple[int, int]], int]:
+    """Upload the chunks of ``source`` that the version's backend does not hold yet.
+
+    Returns the manifest as ``(offset, chunk id)`` pairs and the number of bytes uploaded.
+    """
+    backend = version.storage_backend
+    known: dict[str, int] = {}
+    manifest: list[tuple[int, int]] = []
+    offset = uploaded = 0
+    with source.open('rb') as stream, tempfile.TemporaryDirectory() as workdir:
+        for batch in _batched(iter_chunks(stream), LOOKUP_BATCH):
+            hashed = [(hashlib.sha256(data).hexdigest(), data) for data in batch]
+            check_at = timezone.now() + timedelta(seconds=settings.STORAGE_GC_CHUNK_GRACE_SECONDS)
+            known.update(_claim_chunks(backend, {digest for digest, _data in hashed} - known.keys(), check_at))
+            new: dict[str, StorageChunk] = {}
+            for digest, data in hashed:
+                if digest in known or digest in new:
+                    continue
+                path = Path(workdir) / digest
+                path.write_bytes(data)
+                storage_key = provider.upload(path, chunk_key(digest))
+                path.unlink()
+                new[digest] = StorageChunk(
+                    storage_backend=backend,
+                    sha256=digest,
+                    size_bytes=len(data),
+                    storage_key=storage_key,
+                    orphan_check_at=check_at,
+                )
+                uploaded += len(data)
+            if new:
+                # A concurrent upload may have stored the same chunk; its row wins and our
+                # copy goes to garbage collection.
+                StorageChunk.objects.bulk_create(new.values(), ignore_conflicts=True)
+                stored = dict(
+                    StorageChunk.objects.filter(storage_backend=backend, sha256__in=list(new)).values_list(
+                        'sha256', 'storage_key'
+                    )
+                )
+                bury(backend.pk, [chunk.storage_key for digest, chunk in new.items() if stored.get(digest) != chunk.storage_key])
+                known.update(_chunk_ids(backend, new))
+            for digest, data in hashed:
+                manifest.append((offset, known[digest]))
+                offset += len(data)
+                if progress:
+                    progress(len(data))
+    return manifest, uploaded
+
+
+def save_manifest(version_id: int, manifest: list[tuple[int, int]]) -> None:
+    VersionChunk.objects.filter(version_id=version_id).delete()
+    VersionChunk.objects.bulk_create(
+        [
+            VersionChunk(version_id=version_id, position=position, offset=offset, chunk_id=chunk_id)
+            for position, (offset, chunk_id) in enumerate(manifest)
+        ],
+        batch_size=1000,
+    )
+
+
+def _manifest_chunks(version: DocumentVersion) -> list[tuple[str, str, int]]:
+    return list(
+        version.chunk_refs.order_by('position').values_list('chunk__storage_key', 'chunk__sha256', 'chunk__size_bytes')
+    )
+
+
+def iter_version_bytes(
+    version: DocumentVersion,
+    chunks: list[tuple[str, str, int]] | None = None,
+    provider: StorageProvider | None = None,
+) -> Iterator[bytes]:
+    """Reassemble a chunked version, one verified chunk at a time."""
+    chunks = _manifest_chunks(version) if chunks is None else chunks
+    provider = provider or get_provider(version.storage_backend)
+    for storage_key, digest, _size in chunks:
+        data = provider.read(storage_key)
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise OSError(f'Chunk {digest} of version {version.pk} is corrupt.')
+        yield data
+
+
+def stream_version(version: DocumentVersion, content_type: str) -> StreamingHttpResponse:
+    chunks = _manifest_chunks(version)
+    response = StreamingHttpResponse(
+        iter_version_bytes(version, chunks), content_type=content_type or 'application/octet-stream'
+    )
+    response['Content-Length'] = str(sum(size for _key, _digest, size in chunks))
+    return response
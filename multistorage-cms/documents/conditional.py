@@ -0,0 +1,43 @@
+"""Weak validators (ETag / Last-Modified) for document API responses.
+
+A collection is fingerprinted by ``max(updated_at)`` and ``count()`` over the user's
+filtered queryset, read in one aggregate query; a single document by its ``updated_at``.
+The request path and query string are part of the tag because they select the page and
+fields of the representation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def collection_state(queryset) -> tuple:
+    state = queryset.order_by().aggregate(last_modified=Max('updated_at'), total=Count('id'))
+    return state['last_modified'], state['total']
+
+
+def weak_etag(request, *parts) -> str:
+    digest = hashlib.sha1(request.get_full_path().encode())
+    for part in parts:
+        digest.update(b'\0' + str(part).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def not_modified(request, etag: str, last_modified=None):
+    """Return a 304 response when the request's validators still match, else ``None``."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag: str, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,116 @@
+"""Per-hub and per-backend storage totals backed by `HubStorageCounter` and `BackendStorageCounter`.
+
+`documents.signals` applies deltas with ``F()`` increments as documents and versions change;
+`reconcile_storage_counters` recomputes everything from the source tables.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import BackendStorageCounter, Document, DocumentVersion, HubStorageCounter
+
+COUNTER_FIELDS = ('document_count', 'version_count', 'ready_bytes', 'pending_bytes', 'failed_bytes')
+STATE_BUCKETS = {
+    DocumentVersion.UploadState.PENDING: 'pending_bytes',
+    DocumentVersion.UploadState.UPLOADING: 'pending_bytes',
+    DocumentVersion.UploadState.READY: 'ready_bytes',
+    DocumentVersion.UploadState.FAILED: 'failed_bytes',
+}
+
+
+def version_deltas(upload_state: str, size_bytes: int, sign: int = 1) -> dict[str, int]:
+    return {'version_count': sign, STATE_BUCKETS[upload_state]: sign * (size_bytes or 0)}
+
+
+def combine(*deltas: dict[str, int]) -> dict[str, int]:
+    total: dict[str, int] = defaultdict(int)
+    for delta in deltas:
+        for name, value in delta.items():
+            total[name] += value
+    return {name: value for name, value in total.items() if value}
+
+
+def negate(deltas: dict[str, int]) -> dict[str, int]:
+    return {name: -value for name, value in deltas.items()}
+
+
+def _apply(model, lookup: dict, deltas: dict[str, int]) -> None:
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas or None in lookup.values():
+        return
+    with transaction.atomic():
+        # Only increments create the row: decrements also run inside cascading deletes,
+        # where a new row would point at a hub that is about to disappear.
+        if any(value > 0 for value in deltas.values()):
+            model.objects.get_or_create(**lookup)
+        model.objects.filter(**lookup).update(**{name: F(name) + value for name, value in deltas.items()})
+
+
+def apply_hub(hub_id: int | None, deltas: dict[str, int]) -> None:
+    _apply(HubStorageCounter, {'project_hub_id': hub_id}, deltas)
+
+
+def apply_backend(backend_id: int | None, deltas: dict[str, int]) -> None:
+    _apply(BackendStorageCounter, {'storage_backend_id': backend_id}, deltas)
+
+
+def document_version_deltas(document_id) -> dict[str, int]:
+    """Summed contribution of every version of one document (used when it changes hub)."""
+    rows = DocumentVersion.objects.filter(document_id=document_id).values_list('upload_state', 'size_bytes')
+    return combine(*(version_deltas(state, size) for state, size in rows))
+
+
+def _zero() -> dict[str, int]:
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def expected_totals() -> tuple[dict, dict]:
+    """Return ``(per_hub, per_backend)`` totals computed from the source tables."""
+    per_hub: dict[int, dict[str, int]] = defaultdict(_zero)
+    per_backend: dict[int, dict[str, int]] = defaultdict(_zero)
+
+    documents = Document.objects.order_by()
+    for row in documents.filter(project_hub__isnull=False).values('project_hub_id').annotate(total=Count('id')):
+        per_hub[row['project_hub_id']]['document_count'] += row['total']
+    current = documents.filter(current_version__isnull=False).values('current_version__storage_backend_id')
+    for row in current.annotate(total=Count('id')):
+        per_backend[row['current_version__storage_backend_id']]['document_count'] += row['total']
+
+    versions = (
+        DocumentVersion.objects.order_by()
+        .values('document__project_hub_id', 'storage_backend_id', 'upload_state')
+        .annotate(total=Count('id'), size=Sum('size_bytes'))
+    )
+    for row in versions:
+        for totals, owner_id in ((per_hub, row['document__project_hub_id']), (per_backend, row['storage_backend_id'])):
+            if owner_id is None:
+                continue
+            totals[owner_id]['version_count'] += row['total']
+            totals[owner_id][STATE_BUCKETS[row['upload_state']]] += row['size'] or 0
+    return per_hub, per_backend
+
+
+def _reconcile(model, key: str, expected: dict[int, dict[str, int]]) -> int:
+    fixed = 0
+    for counter in model.objects.select_for_update():
+        values = expected.pop(getattr(counter, key), _zero())
+        if any(getattr(counter, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(counter, name, value)
+            counter.save()
+            fixed += 1
+    model.objects.bulk_create([model(**{key: owner_id}, **values) for owner_id, values in expected.items()])
+    return fixed + len(expected)
+
+
+def reconcile_storage_counters() -> int:
+    """Recompute every counter row. Returns the number of corrected or created rows."""
+    per_hub, per_backend = expected_totals()
+    with transaction.atomic():
+        return _reconcile(HubStorageCounter, 'project_hub_id', per_hub) + _reconcile(
+            BackendStorageCounter, 'storage_backend_id', per_backend
+        )
@@ -0,0 +1,203 @@
+"""Streaming ZIP export of documents.
+
+The archive is produced while it is sent: every entry is read through its storage
+provider (or reassembled from its chunks) a piece at a time and written as a stored
+(uncompressed) ZIP64 entry with a trailing data descriptor, so nothing is buffered or
+staged on disk. Every header has a fixed size, which makes the archive length a function
+of the names and ``size_bytes`` alone: `plan_export` computes it from one values-only
+scan, and the documents are then read again with ``.iterator()`` while the archive is
+written, so memory does not grow with the number of documents (beyond the set of entry
+names). Documents created after the plan are left out; if anything else changed in
+between, the stream is aborted rather than sent with a wrong ``Content-Length``.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Callable, Iterable, Iterator
+
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from storage_backends.providers import StorageProvider, get_provider
+
+from .chunking import iter_version_bytes
+from .models import Document, DocumentVersion
+
+ZIP64_VERSION = 45
+# Sizes are given by the data descriptor; names are UTF-8.
+FLAGS = 0x08 | 0x800
+UNKNOWN32 = 0xFFFFFFFF
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+DATA_DESCRIPTOR = struct.Struct('<IIQQ')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+ZIP64_LOCAL_EXTRA = struct.Struct('<HHQQ')
+ZIP64_CENTRAL_EXTRA = struct.Struct('<HHQQQ')
+ZIP64_END = struct.Struct('<IQHHIIQQQQ')
+ZIP64_LOCATOR = struct.Struct('<IIQI')
+END = struct.Struct('<IHHHHIIH')
+END_SIZE = ZIP64_END.size + ZIP64_LOCATOR.size + END.size
+ITERATOR_CHUNK_SIZE = 2000
+
+
+@dataclass
+class ExportEntry:
+    name: str
+    size: int
+    modified: datetime
+    read: Callable[[], Iterable[bytes]]
+
+
+def entry_overhead(name: str) -> int:
+    encoded = len(name.encode('utf-8'))
+    return (
+        LOCAL_HEADER.size + ZIP64_LOCAL_EXTRA.size + DATA_DESCRIPTOR.size
+        + CENTRAL_HEADER.size + ZIP64_CENTRAL_EXTRA.size + 2 * encoded
+    )
+
+
+def archive_size(entries: list[ExportEntry]) -> int:
+    return sum(entry.size + entry_overhead(entry.name) for entry in entries) + END_SIZE
+
+
+def _dos_datetime(value: datetime) -> tuple[int, int]:
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    if value.year < 1980:
+        return 0, (1 << 5) | 1
+    time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return time, date
+
+
+def iter_zip(entries: Iterable[ExportEntry]) -> Iterator[bytes]:
+    """Yield a ZIP64 archive of ``entries``. Raises if an entry's data does not match its ``size``."""
+    central = []
+    offset = 0
+    for entry in entries:
+        name = entry.name.encode('utf-8')
+        dos_time, dos_date = _dos_datetime(entry.modified)
+        header = LOCAL_HEADER.pack(
+            0x04034B50, ZIP64_VERSION, FLAGS, 0, dos_time, dos_date, 0, UNKNOWN32, UNKNOWN32,
+            len(name), ZIP64_LOCAL_EXTRA.size,
+        ) + name + ZIP64_LOCAL_EXTRA.pack(0x0001, 16, 0, 0)
+        yield header
+        crc = 0
+        written = 0
+        for data in entry.read():
+            crc = zlib.crc32(data, crc)
+            written += len(data)
+            yield data
+        if written != entry.size:
+            # The Content-Length promised to the client is wrong now; abort the stream.
+            raise OSError(f'{entry.name}: expected {entry.size} bytes, read {written}.')
+        yield DATA_DESCRIPTOR.pack(0x08074B50, crc, written, written)
+        central.append(
+            CENTRAL_HEADER.pack(
+                0x02014B50, ZIP64_VERSION, ZIP64_VERSION, FLAGS, 0, dos_time, dos_date, crc,
+                UNKNOWN32, UNKNOWN32, len(name), ZIP64_CENTRAL_EXTRA.size, 0, 0, 0, 0, UNKNOWN32,
+            )
+            + name
+            + ZIP64_CENTRAL_EXTRA.pack(0x0001, 24, written, written, offset)
+        )
+        offset += len(header) + written + DATA_DESCRIPTOR.size
+
+    directory_size = sum(len(record) for record in central)
+    yield b''.join(central)
+    count = len(central)
+    zip64_end_offset = offset + directory_size
+    yield ZIP64_END.pack(
+        0x06064B50, ZIP64_END.size - 12, ZIP64_VERSION, ZIP64_VERSION, 0, 0, count, count, directory_size, offset
+    )
+    yield ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+    yield END.pack(0x06054B50, 0xFFFF, 0xFFFF, 0xFFFF, 0xFFFF, UNKNOWN32, UNKNOWN32, 0)
+
+
+def _entry_name(pk, title: str, mime_type: str) -> str:
+    parts = [part for part in PurePosixPath(title.replace('\\', '/')).parts if part not in ('/', '.', '..')]
+    name = '/'.join(parts) or str(pk)
+    if not PurePosixPath(name).suffix:
+        name += mimetypes.guess_extension(mime_type or '') or ''
+    return name
+
+
+def _unique(name: str, taken: set[str]) -> str:
+    candidate, number = name, 1
+    while candidate in taken:
+        number += 1
+        path = PurePosixPath(name)
+        candidate = str(path.with_name(f'{path.stem} ({number}){path.suffix}'))
+    taken.add(candidate)
+    return candidate
+
+
+@dataclass
+class ExportPlan:
+    documents: QuerySet  # the ordered rows both scans read
+    count: int
+    size: int  # file bytes
+    length: int  # archive bytes
+
+
+def plan_export(documents, now: datetime | None = None) -> ExportPlan:
+    """Count, file size and archive length of the documents of ``documents`` whose current version is stored."""
+    rows = documents.filter(
+        current_version__upload_state=DocumentVersion.UploadState.READY, created_at__lte=now or timezone.now()
+    ).order_by('title', 'created_at', 'pk')
+    taken: set[str] = set()
+    count = size = 0
+    length = END_SIZE
+    for pk, title, mime_type, size_bytes in rows.values_list(
+        'pk', 'title', 'mime_type', 'current_version__size_bytes'
+    ).iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        count += 1
+        size += size_bytes
+        length += size_bytes + entry_overhead(_unique(_entry_name(pk, title, mime_type), taken))
+    return ExportPlan(documents=rows, count=count, size=size, length=length)
+
+
+def _reader(version: DocumentVersion, provider: StorageProvider) -> Callable[[], Iterable[bytes]]:
+    if version.is_chunked:
+        return lambda: iter_version_bytes(version, provider=provider)
+    return lambda: provider.stream(version.storage_key)
+
+
+def export_entries(plan: ExportPlan) -> Iterator[ExportEntry]:
+    """The planned entries, read lazily with one provider per backend."""
+    providers: dict[int, StorageProvider] = {}
+    taken: set[str] = set()
+    rows = plan.documents.select_related('current_version__storage_backend')
+    for document in rows.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        version = document.current_version
+        if version.storage_backend_id not in providers:
+            providers[version.storage_backend_id] = get_provider(version.storage_backend)
+        yield ExportEntry(
+            name=_unique(_entry_name(document.pk, document.title, document.mime_type), taken),
+            size=version.size_bytes,
+            modified=version.uploaded_at or document.updated_at,
+            read=_reader(version, providers[version.storage_backend_id]),
+        )
+
+
+def iter_export(plan: ExportPlan) -> Iterator[bytes]:
+    """The archive of ``plan``. Raises if it does not come out at the planned length."""
+    written = 0
+    for data in iter_zip(export_entries(plan)):
+        written += len(data)
+        if written > plan.length:
+            break
+        yield data
+    if written != plan.length:
+        raise OSError(f'The documents changed during the export: expected {plan.length} bytes, wrote {written}.')
+
+
+def stream_export(plan: ExportPlan, filename: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(iter_export(plan), content_type='application/zip')
+    response['Content-Length'] = str(plan.length)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -6,16 +6,8 @@ from storage_backends.models import StorageBackend
 from .models import Document
 
 
-class DocumentUploadForm(forms.ModelForm):
-    file = forms.FileField()
-    storage_backend = forms.ModelChoiceField(queryset=StorageBackend.objects.none())
-
-    class Meta:
-        model = Document
-        fields = ['title', 'description', 'visibility', 'storage_backend', 'file']
-
-    def __init__(self, *args, project_hub=None, **kwargs):
-        super().__init__(*args, **kwargs)
+class StorageBackendChoiceMixin:
+    def limit_storage_backends(self, project_hub):
         queryset = StorageBackend.objects.filter(
             Q(project_hub=project_hub) | Q(project_hub__isnull=True),
             status=StorageBackend.Status.ACTIVE,
@@ -28,6 +20,28 @@ class DocumentUploadForm(forms.ModelForm):
             )
 
 
+class DocumentUploadForm(StorageBackendChoiceMixin, forms.ModelForm):
+    file = forms.FileField()
+    storage_backend = forms.ModelChoiceField(queryset=StorageBackend.objects.none())
+
+    class Meta:
+        model = Document
+        fields = ['title', 'description', 'visibility', 'storage_backend', 'file']
+
+    def __init__(self, *args, project_hub=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit_storage_backends(project_hub)
+
+
+class DocumentVersionUploadForm(StorageBackendChoiceMixin, forms.Form):
+    file = forms.FileField()
+    storage_backend = forms.ModelChoiceField(queryset=StorageBackend.objects.none())
+
+    def __init__(self, *args, project_hub=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit_storage_backends(project_hub)
+
+
 class DocumentEditForm(forms.ModelForm):
     class Meta:
         model = Document
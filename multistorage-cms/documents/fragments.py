@@ -0,0 +1,88 @@
+"""Cache rendered HTMX fragments of a hub until something they depend on changes.
+
+Every hub has a generation number in the cache. Document, version, tag and access-index
+changes bump it (`invalidate_hubs`), and the user's authorization version
+(`project_hubs.authz.user_version`) covers role and group changes. A fragment is cached
+under both generations plus its query string, so a cache hit skips the database and the
+template engine. Stale entries are never deleted; they stop being addressed and expire.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from functools import partial
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from project_hubs.authz import user_version
+
+
+def _generation_key(hub_id: int) -> str:
+    return f'fragments:hub:{hub_id}'
+
+
+def hub_generation(hub_id: int) -> int:
+    generation = cache.get(_generation_key(hub_id))
+    if generation is None:
+        cache.add(_generation_key(hub_id), time.time_ns(), None)
+        generation = cache.get(_generation_key(hub_id))
+    return generation
+
+
+def bump_hubs(hub_ids: Iterable[int | None]) -> None:
+    for hub_id in {hub_id for hub_id in hub_ids if hub_id}:
+        try:
+            cache.incr(_generation_key(hub_id))
+        except ValueError:
+            cache.set(_generation_key(hub_id), time.time_ns(), None)
+
+
+def invalidate_hubs(hub_ids: Iterable[int | None]) -> None:
+    # Same pattern as the authorization cache: bump now, and again after commit so a
+    # concurrent request cannot cache pre-commit rows under the new generation.
+    hub_ids = {hub_id for hub_id in hub_ids if hub_id}
+    bump_hubs(hub_ids)
+    transaction.on_commit(partial(bump_hubs, hub_ids))
+
+
+def scoped_key(name: str, hub_id: int, user_id: int, suffix: str) -> str:
+    """A cache key that changes with the hub's generation and the user's authorization version."""
+    return (
+        f'fragments:{name}:{hub_id}:{hub_generation(hub_id)}:'
+        f'{user_id}:{user_version(user_id)}:{suffix}'
+    )
+
+
+def fragment_key(request, name: str, hub_id: int) -> str:
+    query = hashlib.sha1(request.GET.urlencode().encode()).hexdigest()
+    return scoped_key(name, hub_id, request.user.pk, query)
+
+
+class CachedFragmentMixin:
+    """Serve a view's rendered template from the fragment cache when `fragment_cacheable()` allows.
+
+    Expects `get_hub()` (from the hub access mixins) and a `TemplateResponse` from `get()`.
+    """
+
+    fragment_name = ''
+
+    def fragment_cacheable(self) -> bool:
+        return True
+
+    def get(self, request, *args, **kwargs):
+        if not self.fragment_cacheable():
+            return super().get(request, *args, **kwargs)
+        key = fragment_key(request, self.fragment_name, self.get_hub().pk)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(key, response.content, settings.FRAGMENT_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,205 @@
+"""Garbage collection of stored objects whose rows are gone.
+
+Deleting a `DocumentVersion` writes a `StorageTombstone` for its object in the same
+transaction (see `documents.signals`), so deletes never wait on a provider and a rolled
+back delete leaves nothing behind. Once no version on a backend belongs to a document with
+a given checksum, `release_previews` tombstones that content's thumbnail and deletes its
+`DocumentPreview`. Chunks of chunked versions are marked for an orphan
+check after ``STORAGE_GC_CHUNK_GRACE_SECONDS`` instead, and `retire_orphan_chunks` turns
+those that nothing refers to into tombstones.
+
+`collect_garbage` claims due tombstones in batches of ``STORAGE_GC_BATCH_SIZE`` and hands
+each backend's keys to one provider ``delete`` call (S3 ``DeleteObjects``, Drive batch
+requests, local unlinks). The calls are spaced out to ``STORAGE_GC_BATCHES_PER_SECOND``.
+Failed batches are retried with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, ProtectedError, Q
+from django.utils import timezone
+
+from storage_backends.models import StorageBackend
+from storage_backends.providers import get_provider
+
+from .models import DocumentPreview, DocumentVersion, StorageChunk, StorageTombstone, VersionChunk
+
+logger = logging.getLogger(__name__)
+
+# Claimed tombstones are hidden from other collectors for this long.
+CLAIM_SECONDS = 15 * 60
+MAX_RETRY_SECONDS = 24 * 60 * 60
+
+
+def bury(backend_id: int, storage_keys: list[str], now: datetime | None = None) -> None:
+    now = now or timezone.now()
+    StorageTombstone.objects.bulk_create(
+        [
+            StorageTombstone(storage_backend_id=backend_id, storage_key=key, next_attempt_at=now)
+            for key in storage_keys
+            if key
+        ]
+    )
+
+
+def release_previews(contents) -> None:
+    """Drop the previews of ``(backend id, checksum)`` pairs that no remaining version has.
+
+    Call after the versions are deleted, in the same transaction.
+    """
+    contents = {(backend_id, checksum) for backend_id, checksum in contents if backend_id and checksum}
+    if not contents:
+        return
+    match = Q()
+    for backend_id, checksum in contents:
+        match |= Q(storage_backend_id=backend_id, checksum_sha256=checksum)
+    in_use = set(
+        DocumentVersion.objects.filter(
+            storage_backend_id__in={backend_id for backend_id, _checksum in contents},
+            checksum_sha256__in={checksum for _backend_id, checksum in contents},
+        )
+        .values_list('storage_backend_id', 'checksum_sha256')
+        .distinct()
+    )
+    released = [
+        row
+        for row in DocumentPreview.objects.filter(match).values_list(
+            'pk', 'storage_backend_id', 'checksum_sha256', 'thumbnail_key'
+        )
+        if (row[1], row[2]) not in in_use
+    ]
+    if not released:
+        return
+    DocumentPreview.objects.filter(pk__in=[row[0] for row in released]).delete()
+    # Thumbnail keys are derived from the PNG, so different contents can share one.
+    shared = set(
+        DocumentPreview.objects.filter(thumbnail_key__in=[row[3] for row in released if row[3]]).values_list(
+            'storage_backend_id', 'thumbnail_key'
+        )
+    )
+    keys_by_backend: dict[int, list[str]] = defaultdict(list)
+    for _pk, backend_id, _checksum, thumbnail_key in released:
+        if thumbnail_key and (backend_id, thumbnail_key) not in shared:
+            keys_by_backend[backend_id].append(thumbnail_key)
+    for backend_id, keys in keys_by_backend.items():
+        bury(backend_id, sorted(set(keys)))
+
+
+def release_chunks(version_ids: list) -> None:
+    """Mark the chunks of versions about to be deleted for an orphan check after the grace period.
+
+    Uploads that resolve one of these chunks push the check back again
+    (`documents.chunking.store_chunked`), so it waits for their manifests.
+    """
+    StorageChunk.objects.filter(version_refs__version_id__in=version_ids).update(
+        orphan_check_at=timezone.now() + timedelta(seconds=settings.STORAGE_GC_CHUNK_GRACE_SECONDS)
+    )
+
+
+def _delete_chunk(chunk_id: int) -> bool:
+    """Delete one chunk row; ``False`` if a manifest refers to it again."""
+    try:
+        with transaction.atomic():
+            # PROTECT on `VersionChunk.chunk` re-checks the references of this row alone.
+            StorageChunk.objects.filter(pk=chunk_id).delete()
+    except ProtectedError:
+        return False
+    return True
+
+
+def retire_orphan_chunks(now: datetime | None = None) -> int:
+    """Tombstone marked chunks that no version refers to. Returns the number retired."""
+    now = now or timezone.now()
+    batch_size = settings.STORAGE_GC_BATCH_SIZE
+    candidates = StorageChunk.objects.filter(orphan_check_at__lte=now).annotate(
+        in_use=Exists(VersionChunk.objects.filter(chunk=OuterRef('pk')))
+    )
+    retired = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.select_for_update(skip_locked=True, of=('self',))
+                .order_by('orphan_check_at')
+                .values_list('pk', 'storage_backend_id', 'storage_key', 'in_use')[:batch_size]
+            )
+            in_use = [pk for pk, _backend_id, _key, used in rows if used]
+            keys_by_backend: dict[int, list[str]] = defaultdict(list)
+            for pk, backend_id, storage_key, used in rows:
+                if used:
+                    continue
+                if _delete_chunk(pk):
+                    keys_by_backend[backend_id].append(storage_key)
+                    retired += 1
+                else:
+                    in_use.append(pk)
+            StorageChunk.objects.filter(pk__in=in_use).update(orphan_check_at=None)
+            for backend_id, keys in keys_by_backend.items():
+                bury(backend_id, keys, now)
+        if len(rows) < batch_size:
+            return retired
+
+
+def _claim(now: datetime) -> list[StorageTombstone]:
+    with transaction.atomic():
+        batch = list(
+            StorageTombstone.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[: settings.STORAGE_GC_BATCH_SIZE]
+        )
+        StorageTombstone.objects.filter(pk__in=[tombstone.pk for tombstone in batch]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+        )
+    return batch
+
+
+def _reschedule(tombstones: list[StorageTombstone], now: datetime, error: Exception) -> None:
+    for tombstone in tombstones:
+        tombstone.attempts += 1
+        delay = min(settings.STORAGE_GC_RETRY_SECONDS * 2 ** (tombstone.attempts - 1), MAX_RETRY_SECONDS)
+        tombstone.next_attempt_at = now + timedelta(seconds=delay)
+        tombstone.last_error = str(error)[:1000]
+    StorageTombstone.objects.bulk_update(tombstones, ['attempts', 'next_attempt_at', 'last_error'])
+
+
+def _remove(batch: list[StorageTombstone], now: datetime) -> int:
+    by_backend: dict[int, list[StorageTombstone]] = defaultdict(list)
+    for tombstone in batch:
+        by_backend[tombstone.storage_backend_id].append(tombstone)
+    backends = StorageBackend.objects.in_bulk(list(by_backend))
+    removed = 0
+    for backend_id, tombstones in by_backend.items():
+        try:
+            get_provider(backends[backend_id]).delete([tombstone.storage_key for tombstone in tombstones])
+        except Exception as exc:
+            logger.warning('Deleting %s objects from backend %s failed: %s', len(tombstones), backend_id, exc)
+            _reschedule(tombstones, now, exc)
+            continue
+        StorageTombstone.objects.filter(pk__in=[tombstone.pk for tombstone in tombstones]).delete()
+        removed += len(tombstones)
+    return removed
+
+
+def collect_garbage(now: datetime | None = None) -> int:
+    """Retire orphaned chunks and delete due objects. Returns the number of deleted objects."""
+    now = now or timezone.now()
+    retire_orphan_chunks(now)
+    rate = settings.STORAGE_GC_BATCHES_PER_SECOND
+    interval = 1 / rate if rate > 0 else 0
+    removed = 0
+    last_batch = None
+    for _ in range(settings.STORAGE_GC_MAX_BATCHES):
+        if last_batch is not None and interval:
+            time.sleep(max(0.0, interval - (time.monotonic() - last_batch)))
+        last_batch = time.monotonic()
+        batch = _claim(now)
+        if not batch:
+            break
+        removed += _remove(batch, now)
+    return removed
@@ -0,0 +1,318 @@
+"""Bulk import of existing files into a hub (the `import_documents` command).
+
+Sources are a directory tree or a CSV/JSONL manifest with a ``path`` column and optional
+``title``, ``description`` and ``mime_type``. Files are hashed in a process pool while
+the previous batch is written, so hashing overlaps the database work. Each batch of
+``DOCUMENT_IMPORT_BATCH_SIZE`` files becomes one ``bulk_create`` of documents and one of
+versions; the bookkeeping that `documents.signals` does per row (counters, search rows,
+access index, fragment caches) is applied once per batch. Uploads read the original files
+in place.
+
+Every created document gets an `ImportedFile` row with its source path and checksum in
+the same transaction, and the row is marked queued once the upload task is handed to
+the broker. Running an import again therefore skips files already imported with the same
+content and first re-queues uploads a crashed run created but never queued. A checkpoint
+file additionally lets a resumed run skip hashing the files of committed batches.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import mimetypes
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from access_control import indexing
+from audit.writer import record_event
+
+from . import counters
+from .fragments import invalidate_hubs
+from .models import Document, DocumentVersion, ImportedFile
+from .search import refresh_search_entries
+from .uploads import dispatch_upload, fail_dispatch
+
+HASH_BLOCK_SIZE = 1024 * 1024
+MANIFEST_FIELDS = ('path', 'title', 'description', 'mime_type')
+
+
+class ManifestError(ValueError):
+    pass
+
+
+@dataclass
+class ImportItem:
+    path: Path
+    title: str
+    description: str = ''
+    mime_type: str = ''
+
+
+@dataclass
+class ImportStats:
+    files: int = 0
+    bytes: int = 0
+    skipped: int = 0
+    requeued: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1_000_000 / self.seconds if self.seconds else 0.0
+
+
+def iter_directory(root: Path) -> Iterator[ImportItem]:
+    """Every regular file under ``root`` in a stable order, titled by its relative path."""
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(directory) / name
+            if path.is_file():
+                yield ImportItem(path=path, title=path.relative_to(root).as_posix()[-255:])
+
+
+def _manifest_rows(manifest: Path) -> Iterator[dict]:
+    with manifest.open(newline='', encoding='utf-8') as handle:
+        if manifest.suffix.lower() == '.csv':
+            yield from csv.DictReader(handle)
+            return
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ManifestError(f'{manifest}:{number}: {exc}') from exc
+
+
+def iter_manifest(manifest: Path) -> Iterator[ImportItem]:
+    """Rows of a ``.csv`` or ``.jsonl`` manifest. Relative paths are resolved against its directory."""
+    for row in _manifest_rows(manifest):
+        if not row.get('path'):
+            raise ManifestError(f'{manifest}: every row needs a "path".')
+        path = manifest.parent / row['path']
+        values = {name: row.get(name) or '' for name in MANIFEST_FIELDS[1:]}
+        values['title'] = (values['title'] or path.name)[:255]
+        yield ImportItem(path=path, **values)
+
+
+def iter_source(source: Path) -> Iterator[ImportItem]:
+    if source.is_dir():
+        return iter_directory(source)
+    if source.suffix.lower() in ('.csv', '.jsonl'):
+        return iter_manifest(source)
+    raise ManifestError(f'{source} is neither a directory nor a .csv/.jsonl manifest.')
+
+
+def hash_file(path: Path) -> tuple[int, str]:
+    """``(size, sha256)`` of ``path``. Runs in the worker processes."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as handle:
+        while block := handle.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+            size += len(block)
+    return size, digest.hexdigest()
+
+
+class Checkpoint:
+    """Append-only list of source paths whose batch has committed."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            self.done = {line for line in path.read_text(encoding='utf-8').splitlines() if line}
+
+    def __contains__(self, item: ImportItem) -> bool:
+        return str(item.path) in self.done
+
+    def record(self, items: list[ImportItem]) -> None:
+        with self.path.open('a', encoding='utf-8') as handle:
+            handle.writelines(f'{item.path}\n' for item in items)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.done.update(str(item.path) for item in items)
+
+
+class _InlineExecutor(Executor):
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def _imported(hub, items) -> set[tuple[str, str]]:
+    paths = [str(item.path) for item in items]
+    return set(
+        ImportedFile.objects.filter(project_hub=hub, source_path__in=paths).values_list('source_path', 'checksum_sha256')
+    )
+
+
+def _create_batch(items, hashes, hub, owner, backend) -> list[tuple[DocumentVersion, Path]]:
+    """Create the documents of the items not imported before; returns their uploads."""
+    with transaction.atomic():
+        done = _imported(hub, items)
+        new = [
+            (item, size, checksum)
+            for item, (size, checksum) in zip(items, hashes)
+            if (str(item.path), checksum) not in done
+        ]
+        if not new:
+            return []
+        documents = Document.objects.bulk_create(
+            [
+                Document(
+                    owner=owner,
+                    project_hub=hub,
+                    title=item.title,
+                    description=item.description,
+                    mime_type=item.mime_type or mimetypes.guess_type(item.path.name)[0] or 'application/octet-stream',
+                    size_bytes=size,
+                    checksum_sha256=checksum,
+                )
+                for item, size, checksum in new
+            ]
+        )
+        versions = DocumentVersion.objects.bulk_create(
+            [
+                DocumentVersion(
+                    document=document,
+                    version_number=1,
+                    storage_backend=backend,
+                    storage_key=f'{hub.slug}/{document.pk}/{item.path.name}',
+                    size_bytes=document.size_bytes,
+                    checksum_sha256=checksum,
+                    upload_state=DocumentVersion.UploadState.PENDING,
+                    uploaded_by=owner,
+                )
+                for document, (item, _size, checksum) in zip(documents, new)
+            ]
+        )
+        for document, version in zip(documents, versions):
+            document.current_version = version
+        Document.objects.bulk_update(documents, ['current_version'])
+        ImportedFile.objects.bulk_create(
+            [
+                ImportedFile(project_hub=hub, document=document, source_path=str(item.path), checksum_sha256=checksum)
+                for document, (item, _size, checksum) in zip(documents, new)
+            ]
+        )
+
+        total = sum(document.size_bytes for document in documents)
+        added = {'document_count': len(documents), 'version_count': len(versions), 'pending_bytes': total}
+        counters.apply_hub(hub.pk, added)
+        counters.apply_backend(backend.pk, added)
+        refresh_search_entries([document.pk for document in documents])
+        for document, version in zip(documents, versions):
+            record_event(
+                'document.uploaded',
+                actor=owner,
+                document=document,
+                project_hub=hub,
+                payload={
+                    'version_id': version.id,
+                    'size_bytes': version.size_bytes,
+                    'storage_backend_id': backend.pk,
+                    'imported': True,
+                },
+            )
+    indexing.sync_documents([document.pk for document in documents])
+    invalidate_hubs([hub.pk])
+    return [(version, item.path) for version, (item, _size, _checksum) in zip(versions, new)]
+
+
+def _dispatch(uploads: list[tuple[DocumentVersion, Path]]) -> None:
+    queued = True
+    for version, path in uploads:
+        if queued:
+            # One unreachable broker fails the rest of the batch instead of timing out per file.
+            queued = dispatch_upload(version, path, keep_source=True)
+        else:
+            fail_dispatch(version)
+    # Failed versions are marked as well: they are not retried on resume.
+    ImportedFile.objects.filter(document_id__in=[version.document_id for version, _path in uploads]).update(
+        queued_at=timezone.now()
+    )
+
+
+def requeue_unqueued(hub) -> int:
+    """Queue uploads that an interrupted import created but never handed to the broker."""
+    rows = ImportedFile.objects.filter(
+        project_hub=hub,
+        queued_at__isnull=True,
+        document__current_version__upload_state=DocumentVersion.UploadState.PENDING,
+    ).select_related('document__current_version')
+    uploads = [(row.document.current_version, Path(row.source_path)) for row in rows]
+    if uploads:
+        _dispatch(uploads)
+    return len(uploads)
+
+
+def import_documents(
+    items: Iterable[ImportItem],
+    hub,
+    owner,
+    backend,
+    *,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    checkpoint: Checkpoint | None = None,
+    progress: Callable[[ImportStats], None] | None = None,
+) -> ImportStats:
+    """Create a document per item in ``hub`` and queue its upload to ``backend``."""
+    batch_size = batch_size or settings.DOCUMENT_IMPORT_BATCH_SIZE
+    workers = workers or os.cpu_count() or 1
+    stats = ImportStats()
+    started = time.monotonic()
+    stats.requeued = requeue_unqueued(hub)
+
+    def pending_items():
+        for item in items:
+            if checkpoint is not None and item in checkpoint:
+                stats.skipped += 1
+                continue
+            yield item
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InlineExecutor()
+    with executor:
+        remaining = pending_items()
+        # The next batch is hashed while the current one is written.
+        in_flight: deque = deque()
+        while True:
+            while len(in_flight) < 2 and (batch := list(islice(remaining, batch_size))):
+                in_flight.append((batch, [executor.submit(hash_file, item.path) for item in batch]))
+            if not in_flight:
+                break
+            batch, futures = in_flight.popleft()
+            hashes = [future.result() for future in futures]
+            uploads = _create_batch(batch, hashes, hub, owner, backend)
+            _dispatch(uploads)
+            if checkpoint is not None:
+                checkpoint.record(batch)
+            stats.files += len(uploads)
+            stats.skipped += len(batch) - len(uploads)
+            stats.bytes += sum(upload[0].size_bytes for upload in uploads)
+            stats.seconds = time.monotonic() - started
+            if progress is not None:
+                progress(stats)
+    stats.seconds = time.monotonic() - started
+    return stats
@@ -0,0 +1,70 @@
+"""Read path for document list payloads.
+
+List rows are fetched as ``values()`` dicts holding only the payload columns and rendered
+without serializer fields. The payload matches `DocumentSerializer` field for field.
+"""
+
+from __future__ import annotations
+
+from django.db.models import F
+
+LIST_FIELDS = (
+    'id',
+    'title',
+    'description',
+    'mime_type',
+    'size_bytes',
+    'checksum_sha256',
+    'visibility',
+    'created_at',
+    'updated_at',
+)
+LIST_ALIASES = {
+    'current_version_state': F('current_version__upload_state'),
+    'current_storage_key': F('current_version__storage_key'),
+}
+
+
+PAYLOAD_FIELDS = (*LIST_FIELDS, *LIST_ALIASES)
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(raw: str | None) -> tuple[str, ...] | None:
+    """Parse a ``fields=a,b`` sparse fieldset; ``None`` means every payload field."""
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = requested.difference(PAYLOAD_FIELDS)
+    if unknown:
+        raise InvalidFields(f'Unknown fields: {", ".join(sorted(unknown))}.')
+    return tuple(name for name in PAYLOAD_FIELDS if name in requested) or None
+
+
+def list_values(queryset, keys=(), fields=None):
+    """Return ``queryset`` as row dicts with the payload columns (or just ``fields``).
+
+    ``keys`` names extra columns or annotations keyset pagination needs (e.g.
+    ``search_rank``). Pass the page through `finalize_rows` afterwards.
+    """
+    fields = fields or PAYLOAD_FIELDS
+    columns = [name for name in LIST_FIELDS if name in fields]
+    columns += [key for key in keys if key not in columns]
+    aliases = {name: expression for name, expression in LIST_ALIASES.items() if name in fields}
+    return queryset.values(*columns, **aliases)
+
+
+def finalize_rows(rows: list[dict], keys=(), fields=None) -> list[dict]:
+    """Drop pagination-only keys and, like `DocumentSerializer`, the version keys of
+    documents without a current version. Rows are modified in place."""
+    fields = fields or PAYLOAD_FIELDS
+    extra = [key for key in keys if key not in fields]
+    for row in rows:
+        for key in extra:
+            del row[key]
+        for key in LIST_ALIASES:
+            if key in row and row[key] is None:
+                del row[key]
+    return rows
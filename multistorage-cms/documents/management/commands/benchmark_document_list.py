@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from documents.api import DocumentSerializer
+from documents.listing import finalize_rows, list_values
+from documents.models import Document
+from documents.renderers import FastJSONRenderer
+from project_hubs.models import ProjectHub
+
+
+class Command(BaseCommand):
+    help = 'Compare DocumentSerializer against the values()/orjson list path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only list documents of the hub with this slug.')
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        queryset = Document.objects.order_by('-created_at', '-id')
+        if options['hub']:
+            hub = ProjectHub.objects.filter(slug=options['hub']).first()
+            if hub is None:
+                raise CommandError(f'Unknown hub: {options["hub"]}')
+            queryset = queryset.filter(project_hub=hub)
+        rows = options['rows']
+
+        def serializer_path():
+            documents = list(queryset.select_related('current_version')[:rows])
+            return JSONRenderer().render(DocumentSerializer(documents, many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(finalize_rows(list(list_values(queryset)[:rows])))
+
+        serializer_seconds = self._best(serializer_path, options['repeat'])
+        fast_seconds = self._best(fast_path, options['repeat'])
+        self.stdout.write(f'rows: {queryset[:rows].count()}')
+        self.stdout.write(f'DocumentSerializer: {serializer_seconds * 1000:.1f} ms')
+        self.stdout.write(f'values() + FastJSONRenderer: {fast_seconds * 1000:.1f} ms')
+        if fast_seconds:
+            self.stdout.write(self.style.SUCCESS(f'Speedup: {serializer_seconds / fast_seconds:.1f}x'))
+
+    def _best(self, func, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
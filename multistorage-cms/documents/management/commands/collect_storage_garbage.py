@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from documents.gc import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored objects of deleted document versions and unreferenced chunks.'
+
+    def handle(self, *args, **options):
+        removed = collect_garbage()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {removed} stored objects.'))
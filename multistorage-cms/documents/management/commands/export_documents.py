@@ -0,0 +1,49 @@
+import sys
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.export import iter_export, plan_export
+from documents.models import Document
+from project_hubs.models import ProjectHub
+
+
+class Command(BaseCommand):
+    help = 'Write a ZIP of the documents of a hub, streamed from their storage backends.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write, or "-" for stdout.')
+        parser.add_argument('--hub', required=True, help='Slug of the hub to export.')
+        parser.add_argument('--user', help='Only export documents this user (email) can read.')
+        parser.add_argument('--id', action='append', dest='ids', help='Export only this document; repeatable.')
+
+    def handle(self, *args, **options):
+        hub = ProjectHub.objects.filter(slug=options['hub']).first()
+        if hub is None:
+            raise CommandError(f'Unknown hub: {options["hub"]}')
+        documents = Document.objects.filter(project_hub=hub)
+        if options['user']:
+            user = get_user_model().objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f'Unknown user: {options["user"]}')
+            documents = Document.objects.accessible_to(user, hub)
+        if options['ids']:
+            try:
+                documents = documents.filter(pk__in=[uuid.UUID(value) for value in options['ids']])
+            except ValueError as exc:
+                raise CommandError(f'Invalid document id: {exc}') from exc
+        plan = plan_export(documents)
+
+        to_stdout = options['output'] == '-'
+        out = sys.stdout.buffer if to_stdout else open(options['output'], 'wb')
+        try:
+            for data in iter_export(plan):
+                out.write(data)
+        finally:
+            if not to_stdout:
+                out.close()
+        if not to_stdout:
+            self.stdout.write(
+                self.style.SUCCESS(f'Exported {plan.count} documents ({plan.length} bytes).')
+            )
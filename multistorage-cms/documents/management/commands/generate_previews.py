@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+
+from documents.models import Document, DocumentPreview, DocumentVersion
+from documents.previews import schedule_preview
+from project_hubs.models import ProjectHub
+
+
+class Command(BaseCommand):
+    help = 'Queue previews for ready documents whose content has none yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only documents of the hub with this slug.')
+
+    def handle(self, *args, **options):
+        documents = Document.objects.filter(current_version__upload_state=DocumentVersion.UploadState.READY).exclude(
+            current_version__checksum_sha256=''
+        )
+        if options['hub']:
+            hub = ProjectHub.objects.filter(slug=options['hub']).first()
+            if hub is None:
+                raise CommandError(f'Unknown hub: {options["hub"]}')
+            documents = documents.filter(project_hub=hub)
+        missing = documents.exclude(
+            Exists(
+                DocumentPreview.objects.filter(
+                    storage_backend=OuterRef('current_version__storage_backend'),
+                    checksum_sha256=OuterRef('current_version__checksum_sha256'),
+                )
+            )
+        )
+        # One document per content is enough; the others share its preview.
+        queued = 0
+        seen = set()
+        for document_id, backend_id, checksum in missing.values_list(
+            'pk', 'current_version__storage_backend_id', 'current_version__checksum_sha256'
+        ).iterator(chunk_size=2000):
+            if (backend_id, checksum) not in seen:
+                seen.add((backend_id, checksum))
+                schedule_preview(document_id)
+                queued += 1
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} previews.'))
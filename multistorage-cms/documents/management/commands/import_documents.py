@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from documents.importer import Checkpoint, ManifestError, import_documents, iter_source
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+
+class Command(BaseCommand):
+    help = 'Import a directory tree or a CSV/JSONL manifest of files into a hub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Directory to walk, or a .csv/.jsonl manifest with a "path" column.')
+        parser.add_argument('--hub', required=True, help='Slug of the hub to import into.')
+        parser.add_argument('--owner', required=True, help='Email of the user that owns the imported documents.')
+        parser.add_argument('--backend', required=True, help='Name of the storage backend to upload to.')
+        parser.add_argument('--workers', type=int, help='Hashing processes (default: one per CPU).')
+        parser.add_argument('--batch-size', type=int, help='Files per database batch.')
+        parser.add_argument('--checkpoint', help='File recording imported paths; an interrupted import resumes from it.')
+
+    def handle(self, *args, **options):
+        source = Path(options['source'])
+        if not source.exists():
+            raise CommandError(f'No such file or directory: {source}')
+        hub = ProjectHub.objects.filter(slug=options['hub']).first()
+        if hub is None:
+            raise CommandError(f'Unknown hub: {options["hub"]}')
+        owner = get_user_model().objects.filter(email=options['owner']).first()
+        if owner is None:
+            raise CommandError(f'Unknown user: {options["owner"]}')
+        backend = StorageBackend.objects.filter(
+            Q(project_hub=hub) | Q(project_hub__isnull=True),
+            name=options['backend'],
+            status=StorageBackend.Status.ACTIVE,
+        ).first()
+        if backend is None:
+            raise CommandError(f'No active storage backend named {options["backend"]!r} for this hub.')
+        checkpoint = Checkpoint(Path(options['checkpoint'])) if options['checkpoint'] else None
+
+        try:
+            stats = import_documents(
+                iter_source(source),
+                hub,
+                owner,
+                backend,
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                checkpoint=checkpoint,
+                progress=self._report,
+            )
+        except (ManifestError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+        self._report(stats)
+        if stats.requeued:
+            self.stdout.write(f'Queued {stats.requeued} uploads left unqueued by an interrupted import.')
+        self.stdout.write(
+            self.style.SUCCESS(f'Imported {stats.files} files, skipped {stats.skipped} already imported.')
+        )
+
+    def _report(self, stats):
+        self.stdout.write(
+            f'{stats.files} files, {stats.bytes / 1_000_000:.1f} MB in {stats.seconds:.1f}s '
+            f'({stats.files_per_second:.1f} files/s, {stats.mb_per_second:.1f} MB/s)'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from documents.retention import prune_versions
+
+
+class Command(BaseCommand):
+    help = 'Delete document versions outside their hub retention rules, with their stored objects.'
+
+    def handle(self, *args, **options):
+        pruned = prune_versions()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} document versions.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from documents.search import refresh_search_entries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the document full-text search entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        batch = []
+        for document_id in Document.objects.values_list('id', flat=True).iterator(chunk_size=batch_size):
+            batch.append(document_id)
+            if len(batch) >= batch_size:
+                refresh_search_entries(batch)
+                total += len(batch)
+                batch = []
+        refresh_search_entries(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents.'))
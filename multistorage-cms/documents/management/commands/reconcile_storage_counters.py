@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from documents.counters import reconcile_storage_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-hub and per-backend storage counters from documents and versions.'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_storage_counters()
+        self.stdout.write(self.style.SUCCESS(f'Corrected {fixed} storage counters.'))
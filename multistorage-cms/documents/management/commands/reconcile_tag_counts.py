@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.tags import reconcile_tag_counts
+from project_hubs.models import ProjectHub
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-hub and per-user tag counters from DocumentTag and access rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub', help='Only reconcile the hub with this slug.')
+
+    def handle(self, *args, **options):
+        hub_id = None
+        if options['hub']:
+            hub_id = ProjectHub.objects.filter(slug=options['hub']).values_list('id', flat=True).first()
+            if hub_id is None:
+                raise CommandError(f'Unknown hub: {options["hub"]}')
+        fixed = reconcile_tag_counts(hub_id)
+        self.stdout.write(self.style.SUCCESS(f'Corrected {fixed} tag counters.'))
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_documentversion_error_message_and_more'),
+        ('project_hubs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['project_hub', 'created_at'], name='document_hub_created_idx'),
+        ),
+    ]
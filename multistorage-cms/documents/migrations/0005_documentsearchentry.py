@@ -0,0 +1,117 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    ALTER TABLE documents_documentsearchentry ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(tags, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX documents_search_vector_gin ON documents_documentsearchentry USING GIN (search_vector)',
+    'CREATE INDEX documents_search_title_trgm ON documents_documentsearchentry USING GIN (title gin_trgm_ops)',
+]
+POSTGRES_BACKWARD = [
+    'DROP INDEX IF EXISTS documents_search_title_trgm',
+    'DROP INDEX IF EXISTS documents_search_vector_gin',
+    'ALTER TABLE documents_documentsearchentry DROP COLUMN IF EXISTS search_vector',
+]
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE documents_search_fts USING fts5(
+        title, tags, description,
+        content='documents_documentsearchentry',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER documents_search_fts_ai AFTER INSERT ON documents_documentsearchentry BEGIN
+        INSERT INTO documents_search_fts(rowid, title, tags, description)
+        VALUES (new.id, new.title, new.tags, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_search_fts_ad AFTER DELETE ON documents_documentsearchentry BEGIN
+        INSERT INTO documents_search_fts(documents_search_fts, rowid, title, tags, description)
+        VALUES ('delete', old.id, old.title, old.tags, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER documents_search_fts_au AFTER UPDATE ON documents_documentsearchentry BEGIN
+        INSERT INTO documents_search_fts(documents_search_fts, rowid, title, tags, description)
+        VALUES ('delete', old.id, old.title, old.tags, old.description);
+        INSERT INTO documents_search_fts(rowid, title, tags, description)
+        VALUES (new.id, new.title, new.tags, new.description);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS documents_search_fts_au',
+    'DROP TRIGGER IF EXISTS documents_search_fts_ad',
+    'DROP TRIGGER IF EXISTS documents_search_fts_ai',
+    'DROP TABLE IF EXISTS documents_search_fts',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def populate(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    DocumentTag = apps.get_model('documents', 'DocumentTag')
+    DocumentSearchEntry = apps.get_model('documents', 'DocumentSearchEntry')
+
+    tags = {}
+    for document_id, tag in DocumentTag.objects.values_list('document_id', 'tag'):
+        tags.setdefault(document_id, []).append(tag)
+    batch = []
+    for document_id, title, description in Document.objects.values_list('id', 'title', 'description').iterator():
+        batch.append(
+            DocumentSearchEntry(
+                document_id=document_id,
+                title=title,
+                description=description,
+                tags=' '.join(sorted(tags.get(document_id, []))),
+            )
+        )
+        if len(batch) >= 1000:
+            DocumentSearchEntry.objects.bulk_create(batch)
+            batch = []
+    DocumentSearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_document_document_hub_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('tags', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='documents.document')),
+            ],
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
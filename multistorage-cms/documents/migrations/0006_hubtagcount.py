@@ -0,0 +1,58 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    DocumentTag = apps.get_model('documents', 'DocumentTag')
+    HubTagCount = apps.get_model('documents', 'HubTagCount')
+    counts = (
+        DocumentTag.objects.filter(document__project_hub__isnull=False)
+        .values('document__project_hub_id', 'tag')
+        .annotate(total=models.Count('id'))
+    )
+    HubTagCount.objects.bulk_create(
+        [
+            HubTagCount(project_hub_id=row['document__project_hub_id'], tag=row['tag'], document_count=row['total'])
+            for row in counts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_documentsearchentry'),
+        ('project_hubs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubTagCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='documenttag',
+            index=models.Index(fields=['tag', 'document'], name='document_tag_tag_doc_idx'),
+        ),
+        migrations.AddField(
+            model_name='hubtagcount',
+            name='project_hub',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_counts', to='project_hubs.projecthub'),
+        ),
+        migrations.AddIndex(
+            model_name='hubtagcount',
+            index=models.Index(fields=['project_hub', '-document_count'], name='hub_tag_count_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hubtagcount',
+            constraint=models.UniqueConstraint(fields=('project_hub', 'tag'), name='uniq_hub_tag_count'),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0.2 on 2026-10-19 13:10
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+STATE_BUCKETS = {
+    'PENDING': 'pending_bytes',
+    'UPLOADING': 'pending_bytes',
+    'READY': 'ready_bytes',
+    'FAILED': 'failed_bytes',
+}
+
+
+def populate(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    DocumentVersion = apps.get_model('documents', 'DocumentVersion')
+    HubStorageCounter = apps.get_model('documents', 'HubStorageCounter')
+    BackendStorageCounter = apps.get_model('documents', 'BackendStorageCounter')
+
+    # Versions did not record their size; the document's size is the best available value.
+    DocumentVersion.objects.update(
+        size_bytes=models.Subquery(Document.objects.filter(pk=models.OuterRef('document_id')).values('size_bytes')[:1])
+    )
+
+    per_hub = defaultdict(lambda: defaultdict(int))
+    per_backend = defaultdict(lambda: defaultdict(int))
+    documents = Document.objects.order_by()
+    for row in documents.filter(project_hub__isnull=False).values('project_hub_id').annotate(total=models.Count('id')):
+        per_hub[row['project_hub_id']]['document_count'] += row['total']
+    current = documents.filter(current_version__isnull=False).values('current_version__storage_backend_id')
+    for row in current.annotate(total=models.Count('id')):
+        per_backend[row['current_version__storage_backend_id']]['document_count'] += row['total']
+    versions = (
+        DocumentVersion.objects.order_by()
+        .values('document__project_hub_id', 'storage_backend_id', 'upload_state')
+        .annotate(total=models.Count('id'), size=models.Sum('size_bytes'))
+    )
+    for row in versions:
+        for totals, owner_id in ((per_hub, row['document__project_hub_id']), (per_backend, row['storage_backend_id'])):
+            if owner_id is not None:
+                totals[owner_id]['version_count'] += row['total']
+                totals[owner_id][STATE_BUCKETS[row['upload_state']]] += row['size'] or 0
+
+    HubStorageCounter.objects.bulk_create(
+        [HubStorageCounter(project_hub_id=hub_id, **values) for hub_id, values in per_hub.items()],
+        batch_size=1000,
+    )
+    BackendStorageCounter.objects.bulk_create(
+        [BackendStorageCounter(storage_backend_id=backend_id, **values) for backend_id, values in per_backend.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_hubtagcount'),
+        ('project_hubs', '0001_initial'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentversion',
+            name='size_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='BackendStorageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_count', models.IntegerField(default=0)),
+                ('version_count', models.IntegerField(default=0)),
+                ('ready_bytes', models.BigIntegerField(default=0)),
+                ('pending_bytes', models.BigIntegerField(default=0)),
+                ('failed_bytes', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('storage_backend', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='storage_counter', to='storage_backends.storagebackend')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HubStorageCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_count', models.IntegerField(default=0)),
+                ('version_count', models.IntegerField(default=0)),
+                ('ready_bytes', models.BigIntegerField(default=0)),
+                ('pending_bytes', models.BigIntegerField(default=0)),
+                ('failed_bytes', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project_hub', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='storage_counter', to='project_hubs.projecthub')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-19 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_finished_at(apps, schema_editor):
+    DocumentVersion = apps.get_model('documents', 'DocumentVersion')
+    DocumentVersion.objects.filter(upload_state='READY', uploaded_at__isnull=False).update(finished_at=models.F('uploaded_at'))
+    # Failures never recorded a time; creation time is the closest available.
+    DocumentVersion.objects.filter(upload_state='FAILED').update(finished_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_storage_counters'),
+        ('project_hubs', '0001_initial'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='documentversion',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='UploadRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('uploads', models.IntegerField(default=0)),
+                ('bytes_uploaded', models.BigIntegerField(default=0)),
+                ('failures', models.IntegerField(default=0)),
+                ('p50_duration_ms', models.IntegerField(blank=True, null=True)),
+                ('p95_duration_ms', models.IntegerField(blank=True, null=True)),
+                ('project_hub', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_rollups', to='project_hubs.projecthub')),
+                ('storage_backend', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload_rollups', to='storage_backends.storagebackend')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='upload_rollup_bucket_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('project_hub__isnull', False), ('storage_backend__isnull', True)), models.Q(('project_hub__isnull', True), ('storage_backend__isnull', False)), _connector='OR'), name='exactly_one_upload_rollup_scope'), models.UniqueConstraint(condition=models.Q(('project_hub__isnull', False)), fields=('project_hub', 'granularity', 'bucket_start'), name='uniq_upload_rollup_hub_bucket'), models.UniqueConstraint(condition=models.Q(('storage_backend__isnull', False)), fields=('storage_backend', 'granularity', 'bucket_start'), name='uniq_upload_rollup_backend_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_finished_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_upload_rollups'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentversion',
+            name='is_chunked',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='StorageChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('size_bytes', models.IntegerField()),
+                ('storage_key', models.CharField(max_length=512)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('storage_backend', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='chunks', to='storage_backends.storagebackend')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('offset', models.BigIntegerField()),
+                ('chunk', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='version_refs', to='documents.storagechunk')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunk_refs', to='documents.documentversion')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='storagechunk',
+            constraint=models.UniqueConstraint(fields=('storage_backend', 'sha256'), name='uniq_storage_chunk_digest'),
+        ),
+        migrations.AddConstraint(
+            model_name='versionchunk',
+            constraint=models.UniqueConstraint(fields=('version', 'position'), name='uniq_version_chunk_position'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_chunked_versions'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('storage_key', models.CharField(max_length=512)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='storagechunk',
+            name='orphan_check_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='storagechunk',
+            index=models.Index(condition=models.Q(('orphan_check_at__isnull', False)), fields=['orphan_check_at'], name='storage_chunk_orphan_idx'),
+        ),
+        migrations.AddField(
+            model_name='storagetombstone',
+            name='storage_backend',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='storage_backends.storagebackend'),
+        ),
+        migrations.AddIndex(
+            model_name='storagetombstone',
+            index=models.Index(fields=['next_attempt_at'], name='storage_tombstone_due_idx'),
+        ),
+    ]
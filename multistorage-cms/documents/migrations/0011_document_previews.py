@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0010_storage_tombstones'),
+        ('storage_backends', '0002_storagebackend_project_hub'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum_sha256', models.CharField(max_length=64)),
+                ('state', models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed'), ('UNSUPPORTED', 'Unsupported')], default='PENDING', max_length=20)),
+                ('thumbnail_key', models.CharField(blank=True, max_length=512)),
+                ('thumbnail_sha256', models.CharField(blank=True, max_length=64)),
+                ('text_snippet', models.TextField(blank=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('storage_backend', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='previews', to='storage_backends.storagebackend')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('storage_backend', 'checksum_sha256'), name='uniq_preview_backend_checksum')],
+            },
+        ),
+    ]
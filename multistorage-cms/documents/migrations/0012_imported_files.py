@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0011_document_previews'),
+        ('project_hubs', '0002_version_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_path', models.CharField(max_length=1024)),
+                ('checksum_sha256', models.CharField(max_length=64)),
+                ('queued_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='import_source', to='documents.document')),
+                ('project_hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imported_files', to='project_hubs.projecthub')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('queued_at__isnull', True)), fields=['project_hub'], name='imported_file_unqueued_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project_hub', 'source_path', 'checksum_sha256'), name='uniq_imported_file_source')],
+            },
+        ),
+    ]
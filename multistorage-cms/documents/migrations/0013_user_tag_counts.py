@@ -0,0 +1,55 @@
+# Generated by Django 6.0.2 on 2026-10-19 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    UserDocumentAccess = apps.get_model('access_control', 'UserDocumentAccess')
+    UserTagCount = apps.get_model('documents', 'UserTagCount')
+    counts = (
+        UserDocumentAccess.objects.filter(document__tags__isnull=False)
+        .values('user_id', 'project_hub_id', 'document__tags__tag')
+        .annotate(total=models.Count('id'))
+    )
+    UserTagCount.objects.bulk_create(
+        [
+            UserTagCount(
+                user_id=row['user_id'],
+                project_hub_id=row['project_hub_id'],
+                tag=row['document__tags__tag'],
+                document_count=row['total'],
+            )
+            for row in counts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access_control', '0006_documentaccess_doc_access_user_doc_idx_and_more'),
+        ('documents', '0012_imported_files'),
+        ('project_hubs', '0002_version_retention'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTagCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+                ('project_hub', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='project_hubs.projecthub')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'project_hub', '-document_count'], name='user_tag_count_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'project_hub', 'tag'), name='uniq_user_hub_tag_count')],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-19 23:40
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # Only the current version's content is known; older versions keep an empty checksum.
+    Document = apps.get_model('documents', 'Document')
+    DocumentVersion = apps.get_model('documents', 'DocumentVersion')
+    DocumentVersion.objects.filter(document__current_version=models.F('pk')).update(
+        checksum_sha256=models.Subquery(
+            Document.objects.filter(pk=models.OuterRef('document_id')).values('checksum_sha256')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0013_user_tag_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentversion',
+            name='checksum_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,36 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+
+class DocumentQuerySet(models.QuerySet):
+    def accessible_to(self, user, hub):
+        """Documents of ``hub`` readable by ``user``.
+
+        Access is expressed as an ``EXISTS`` semi-join, so rows are never multiplied and no
+        ``DISTINCT`` is needed. By default it probes the materialized `UserDocumentAccess`
+        table; with ``DOCUMENT_ACL_SOURCE='rules'`` it evaluates the ACL rules directly.
+        """
+        if settings.DOCUMENT_ACL_SOURCE == 'rules':
+            return self.acl_accessible_to(user, hub)
+        from access_control.models import UserDocumentAccess
+
+        return self.filter(project_hub=hub).filter(
+            Exists(UserDocumentAccess.objects.filter(user=user, document=OuterRef('pk')))
+        )
+
+    def acl_accessible_to(self, user, hub):
+        """Like `accessible_to`, but evaluated against ownership and `DocumentAccess` rules."""
+        from access_control.models import DocumentAccess
+
+        rules = DocumentAccess.objects.filter(document=OuterRef('pk'))
+        return self.filter(project_hub=hub).filter(
+            Q(owner=user)
+            | Exists(rules.filter(subject_user=user))
+            | Exists(rules.filter(subject_group__in=user.groups.values('pk')))
+        )
 
 
 class Document(models.Model):
@@ -39,8 +69,13 @@ class Document(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DocumentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['project_hub', 'created_at'], name='document_hub_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -61,9 +96,16 @@ class DocumentVersion(models.Model):
         related_name='document_versions',
     )
     storage_key = models.CharField(max_length=512)
+    size_bytes = models.BigIntegerField(default=0)
+    # SHA-256 of this version's content; previews are keyed on it (see `documents.previews`).
+    checksum_sha256 = models.CharField(max_length=64, blank=True)
     upload_state = models.CharField(max_length=20, choices=UploadState.choices, default=UploadState.PENDING)
     uploaded_at = models.DateTimeField(null=True, blank=True)
+    # When the upload reached READY or FAILED; drives the upload rollups.
+    finished_at = models.DateTimeField(null=True, blank=True, db_index=True)
     error_message = models.TextField(blank=True)
+    # Stored as content-defined chunks (see `documents.chunking`); ``storage_key`` is then only a name.
+    is_chunked = models.BooleanField(default=False)
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
@@ -81,6 +123,144 @@ class DocumentVersion(models.Model):
         return f'{self.document_id} v{self.version_number}'
 
 
+class StorageChunk(models.Model):
+    """A content-addressed piece of file data, stored once per backend and shared by versions."""
+
+    storage_backend = models.ForeignKey(
+        'storage_backends.StorageBackend',
+        on_delete=models.PROTECT,
+        related_name='chunks',
+    )
+    sha256 = models.CharField(max_length=64)
+    size_bytes = models.IntegerField()
+    storage_key = models.CharField(max_length=512)
+    # Set while the chunk may be unreferenced (new, or a version using it was deleted);
+    # `documents.gc` checks it from then on and retires it if nothing refers to it.
+    orphan_check_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['storage_backend', 'sha256'], name='uniq_storage_chunk_digest'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['orphan_check_at'],
+                condition=models.Q(orphan_check_at__isnull=False),
+                name='storage_chunk_orphan_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.storage_backend_id}:{self.sha256}'
+
+
+class VersionChunk(models.Model):
+    """One entry of a chunked version's manifest: the chunk stored at ``offset``."""
+
+    version = models.ForeignKey(DocumentVersion, on_delete=models.CASCADE, related_name='chunk_refs')
+    position = models.PositiveIntegerField()
+    offset = models.BigIntegerField()
+    chunk = models.ForeignKey(StorageChunk, on_delete=models.PROTECT, related_name='version_refs')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['version', 'position'], name='uniq_version_chunk_position'),
+        ]
+        ordering = ['position']
+
+    def __str__(self) -> str:
+        return f'{self.version_id}#{self.position}'
+
+
+class StorageTombstone(models.Model):
+    """A stored object whose rows were deleted, waiting for `documents.gc` to remove it."""
+
+    storage_backend = models.ForeignKey(
+        'storage_backends.StorageBackend',
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+    )
+    storage_key = models.CharField(max_length=512)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='storage_tombstone_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.storage_backend_id}:{self.storage_key}'
+
+
+class DocumentPreview(models.Model):
+    """Renditions of one file content on one backend, shared by every document with that checksum."""
+
+    class State(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        READY = 'READY', 'Ready'
+        FAILED = 'FAILED', 'Failed'
+        UNSUPPORTED = 'UNSUPPORTED', 'Unsupported'
+
+    storage_backend = models.ForeignKey(
+        'storage_backends.StorageBackend',
+        on_delete=models.PROTECT,
+        related_name='previews',
+    )
+    checksum_sha256 = models.CharField(max_length=64)
+    state = models.CharField(max_length=20, choices=State.choices, default=State.PENDING)
+    # PNG thumbnail stored under a key derived from its own sha256.
+    thumbnail_key = models.CharField(max_length=512, blank=True)
+    thumbnail_sha256 = models.CharField(max_length=64, blank=True)
+    text_snippet = models.TextField(blank=True)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['storage_backend', 'checksum_sha256'], name='uniq_preview_backend_checksum'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.storage_backend_id}:{self.checksum_sha256}'
+
+
+class ImportedFile(models.Model):
+    """Source file of a document created by `import_documents`.
+
+    Re-running an import skips files already imported with the same content, and
+    ``queued_at`` records whether the upload task was handed to the broker.
+    """
+
+    project_hub = models.ForeignKey('project_hubs.ProjectHub', on_delete=models.CASCADE, related_name='imported_files')
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='import_source')
+    source_path = models.CharField(max_length=1024)
+    checksum_sha256 = models.CharField(max_length=64)
+    queued_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project_hub', 'source_path', 'checksum_sha256'], name='uniq_imported_file_source'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['project_hub'], condition=models.Q(queued_at__isnull=True), name='imported_file_unqueued_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.source_path
+
+
 class DocumentTag(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='tags')
     tag = models.CharField(max_length=50)
@@ -89,6 +269,188 @@ class DocumentTag(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['document', 'tag'], name='uniq_document_tag'),
         ]
+        indexes = [
+            models.Index(fields=['tag', 'document'], name='document_tag_tag_doc_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.document_id}:{self.tag}'
+
+
+class HubTagCount(models.Model):
+    """Number of documents carrying ``tag`` in a hub, maintained incrementally by `documents.tags`."""
+
+    project_hub = models.ForeignKey('project_hubs.ProjectHub', on_delete=models.CASCADE, related_name='tag_counts')
+    tag = models.CharField(max_length=50)
+    document_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project_hub', 'tag'], name='uniq_hub_tag_count'),
+        ]
+        indexes = [
+            models.Index(fields=['project_hub', '-document_count'], name='hub_tag_count_rank_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.project_hub_id}:{self.tag}={self.document_count}'
+
+
+class UserTagCount(models.Model):
+    """Number of documents carrying ``tag`` in a hub that ``user`` can read.
+
+    Derived from `DocumentTag` and the `UserDocumentAccess` index and maintained
+    incrementally by `documents.tags` whenever either of them changes.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    project_hub = models.ForeignKey('project_hubs.ProjectHub', on_delete=models.CASCADE, related_name='+')
+    tag = models.CharField(max_length=50)
+    document_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'project_hub', 'tag'], name='uniq_user_hub_tag_count'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'project_hub', '-document_count'], name='user_tag_count_rank_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user_id}@{self.project_hub_id}:{self.tag}={self.document_count}'
+
+
+class StorageCounter(models.Model):
+    """Document, version and byte totals maintained incrementally by `documents.counters`.
+
+    Bytes are bucketed by upload state; ``UPLOADING`` versions count as pending.
+    """
+
+    document_count = models.IntegerField(default=0)
+    version_count = models.IntegerField(default=0)
+    ready_bytes = models.BigIntegerField(default=0)
+    pending_bytes = models.BigIntegerField(default=0)
+    failed_bytes = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total_bytes(self) -> int:
+        return self.ready_bytes + self.pending_bytes + self.failed_bytes
+
+
+class HubStorageCounter(StorageCounter):
+    project_hub = models.OneToOneField(
+        'project_hubs.ProjectHub',
+        on_delete=models.CASCADE,
+        related_name='storage_counter',
+    )
+
+    def __str__(self) -> str:
+        return f'hub:{self.project_hub_id}'
+
+
+class BackendStorageCounter(StorageCounter):
+    """Totals per backend; ``document_count`` counts documents whose current version is stored here."""
+
+    storage_backend = models.OneToOneField(
+        'storage_backends.StorageBackend',
+        on_delete=models.CASCADE,
+        related_name='storage_counter',
+    )
+
+    def __str__(self) -> str:
+        return f'backend:{self.storage_backend_id}'
+
+
+class DocumentSearchEntry(models.Model):
+    """Denormalized search text for one document (title, description and tags).
+
+    The row is indexed by backend-specific structures created in migrations: a weighted
+    ``tsvector`` with GIN and trigram indexes on Postgres, an FTS5 table on SQLite.
+    `documents.search` maintains it on save and queries it.
+    """
+
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, related_name='search_entry')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    tags = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'search:{self.document_id}'
+
+
+class UploadRollup(models.Model):
+    """Upload activity of one hub or one backend per hour or day, filled by `documents.rollups`."""
+
+    class Granularity(models.TextChoices):
+        HOUR = 'hour', 'Hour'
+        DAY = 'day', 'Day'
+
+    granularity = models.CharField(max_length=10, choices=Granularity.choices)
+    bucket_start = models.DateTimeField()
+    project_hub = models.ForeignKey(
+        'project_hubs.ProjectHub',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='upload_rollups',
+    )
+    storage_backend = models.ForeignKey(
+        'storage_backends.StorageBackend',
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='upload_rollups',
+    )
+    uploads = models.IntegerField(default=0)
+    bytes_uploaded = models.BigIntegerField(default=0)
+    failures = models.IntegerField(default=0)
+    p50_duration_ms = models.IntegerField(null=True, blank=True)
+    p95_duration_ms = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(project_hub__isnull=False, storage_backend__isnull=True)
+                    | models.Q(project_hub__isnull=True, storage_backend__isnull=False)
+                ),
+                name='exactly_one_upload_rollup_scope',
+            ),
+            models.UniqueConstraint(
+                fields=['project_hub', 'granularity', 'bucket_start'],
+                condition=models.Q(project_hub__isnull=False),
+                name='uniq_upload_rollup_hub_bucket',
+            ),
+            models.UniqueConstraint(
+                fields=['storage_backend', 'granularity', 'bucket_start'],
+                condition=models.Q(storage_backend__isnull=False),
+                name='uniq_upload_rollup_backend_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='upload_rollup_bucket_idx'),
+        ]
+
+    @property
+    def failure_rate(self) -> float:
+        total = self.uploads + self.failures
+        return self.failures / total if total else 0.0
+
+    def __str__(self) -> str:
+        scope = f'hub:{self.project_hub_id}' if self.project_hub_id else f'backend:{self.storage_backend_id}'
+        return f'{scope} {self.granularity} {self.bucket_start.isoformat()}'
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup job has processed its source rows."""
+
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f'{self.name}@{self.processed_until.isoformat()}'
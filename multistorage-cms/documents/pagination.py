@@ -0,0 +1,112 @@
+"""Keyset (cursor) pagination.
+
+Pages are selected with a ``WHERE (k1, k2, ...) < (v1, v2, ...)`` style predicate on the
+ordering keys instead of ``OFFSET``, so every page costs the same whatever its depth.
+Cursors are opaque, url-safe encodings of the last row's key values.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def clamp_page_size(raw: Any) -> int:
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        return settings.DOCUMENT_PAGE_SIZE
+    return max(1, min(size, settings.DOCUMENT_MAX_PAGE_SIZE))
+
+
+class KeysetPaginator:
+    """Paginate a queryset ordered by ``keys``.
+
+    ``keys`` is a sequence of ``(name, descending)`` pairs. The last key must be unique
+    (normally the primary key) so cursors are stable when earlier keys tie. Names may be
+    model fields or annotations present on the queryset. Items may be model instances or
+    ``values()`` dicts that include every key.
+    """
+
+    def __init__(self, keys=(('created_at', True), ('id', True))):
+        self.keys = tuple(keys)
+
+    def order(self, queryset):
+        return queryset.order_by(*[f'-{name}' if descending else name for name, descending in self.keys])
+
+    def paginate(self, queryset, cursor: str | None = None, page_size: int | None = None) -> KeysetPage:
+        page_size = page_size or settings.DOCUMENT_PAGE_SIZE
+        queryset = self.order(queryset)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(queryset.model, cursor)))
+        rows = list(queryset[:page_size + 1])
+        items = rows[:page_size]
+        next_cursor = self.encode(items[-1]) if len(rows) > page_size else None
+        return KeysetPage(items=items, next_cursor=next_cursor)
+
+    def _after(self, values: list) -> Q:
+        condition = Q()
+        for index, (name, descending) in enumerate(self.keys):
+            step = Q(**{f'{name}__{"lt" if descending else "gt"}': values[index]})
+            for prior_index in range(index):
+                step &= Q(**{self.keys[prior_index][0]: values[prior_index]})
+            condition |= step
+        return condition
+
+    def encode(self, item) -> str:
+        values = []
+        for name, _descending in self.keys:
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif not isinstance(value, (int, float)):
+                value = str(value)
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode(self, model, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (ValueError, TypeError) as exc:
+            raise InvalidCursor('Malformed cursor.') from exc
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise InvalidCursor('Malformed cursor.')
+
+        decoded = []
+        for (name, _descending), value in zip(self.keys, values):
+            try:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations (e.g. a search rank) are plain numbers.
+                decoded.append(value)
+                continue
+            try:
+                decoded.append(field.to_python(value))
+            except ValidationError as exc:
+                raise InvalidCursor('Malformed cursor.') from exc
+        return decoded
+
+
+# Newest first; the primary key breaks ties between documents created in the same instant.
+document_paginator = KeysetPaginator((('created_at', True), ('id', True)))
@@ -0,0 +1,224 @@
+"""Document previews: PNG thumbnails of images and of a PDF's first page, and text snippets.
+
+`generate_preview_task` runs after a version becomes READY (queued on commit by the
+upload task). Renditions belong to a `DocumentPreview` keyed by backend and content
+checksum, so identical files are rendered once and every document with that checksum
+shares the result. Thumbnails are stored on the version's own backend under
+``previews/<sha256 of the PNG>.png`` and served from a URL containing that hash, which
+lets browsers cache them for ``PREVIEW_CACHE_SECONDS`` without revalidating. When the
+last version with that content is deleted from the backend, `documents.gc.release_previews`
+deletes the row and tombstones the thumbnail.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import re
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from storage_backends.providers import COPY_CHUNK_SIZE, get_provider
+
+from .chunking import iter_version_bytes
+from .fragments import invalidate_hubs
+from .models import Document, DocumentPreview, DocumentVersion
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_CHARS = 500
+# A PENDING preview older than this belongs to a worker that died; it is generated again.
+CLAIM_SECONDS = 15 * 60
+TEXT_MIME_TYPES = {'application/json', 'application/xml', 'application/x-yaml', 'application/javascript'}
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def rendition_kind(mime_type: str) -> str | None:
+    mime_type = (mime_type or '').lower()
+    if mime_type.startswith('image/') and mime_type != 'image/svg+xml':
+        return 'image'
+    if mime_type == 'application/pdf':
+        return 'pdf'
+    if mime_type.startswith('text/') or mime_type in TEXT_MIME_TYPES:
+        return 'text'
+    return None
+
+
+def _version_bytes(version: DocumentVersion, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+    if version.is_chunked:
+        return iter_version_bytes(version)
+    return get_provider(version.storage_backend).stream(version.storage_key, chunk_size)
+
+
+def _head(chunks: Iterator[bytes], limit: int) -> bytes:
+    """The first ``limit`` bytes; the rest of the object is never fetched."""
+    data = b''
+    try:
+        for chunk in chunks:
+            data += chunk
+            if len(data) >= limit:
+                break
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+    return data[:limit]
+
+
+def text_snippet(data: bytes) -> str:
+    text = WHITESPACE_RE.sub(' ', data.decode('utf-8', errors='replace')).strip()
+    return text if len(text) <= SNIPPET_CHARS else text[:SNIPPET_CHARS].rstrip() + '…'
+
+
+def _png(image) -> bytes:
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    out = io.BytesIO()
+    image.save(out, 'PNG', optimize=True)
+    return out.getvalue()
+
+
+def render_image(data: bytes) -> bytes:
+    try:
+        from PIL import Image, ImageOps
+    except Exception as exc:
+        raise RuntimeError('Pillow is required for image previews.') from exc
+
+    size = settings.PREVIEW_THUMBNAIL_SIZE
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs are decoded at a reduced scale instead of at full resolution.
+        image.draft('RGB', (size, size))
+        thumbnail = ImageOps.exif_transpose(image)
+        thumbnail.thumbnail((size, size))
+        return _png(thumbnail)
+
+
+def render_pdf(data: bytes) -> bytes:
+    try:
+        import pypdfium2
+    except Exception as exc:
+        raise RuntimeError('pypdfium2 is required for PDF previews.') from exc
+
+    pdf = pypdfium2.PdfDocument(data)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        bitmap = page.render(scale=settings.PREVIEW_THUMBNAIL_SIZE / max(width, height, 1))
+        return _png(bitmap.to_pil())
+    finally:
+        pdf.close()
+
+
+def _store_thumbnail(version: DocumentVersion, png: bytes) -> tuple[str, str]:
+    digest = hashlib.sha256(png).hexdigest()
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'preview.png'
+        path.write_bytes(png)
+        stored_key = get_provider(version.storage_backend).upload(path, f'previews/{digest[:2]}/{digest}.png')
+    return stored_key, digest
+
+
+def _claim(version: DocumentVersion, kind: str | None, now: datetime) -> DocumentPreview | None:
+    """The preview row to fill, or ``None`` if another run already produced (or is producing) it."""
+    initial = DocumentPreview.State.PENDING if kind else DocumentPreview.State.UNSUPPORTED
+    preview, created = DocumentPreview.objects.get_or_create(
+        storage_backend=version.storage_backend,
+        checksum_sha256=version.checksum_sha256,
+        defaults={'state': initial},
+    )
+    if created:
+        return preview if kind else None
+    if preview.state != DocumentPreview.State.PENDING or preview.updated_at > now - timedelta(seconds=CLAIM_SECONDS):
+        return None
+    claimed = DocumentPreview.objects.filter(pk=preview.pk, updated_at=preview.updated_at).update(updated_at=now)
+    return preview if claimed else None
+
+
+def generate_preview(document_id, now: datetime | None = None) -> DocumentPreview | None:
+    """Render the previews of the document's current version unless its content already has them."""
+    now = now or timezone.now()
+    document = Document.objects.select_related('current_version__storage_backend').filter(pk=document_id).first()
+    version = document.current_version if document else None
+    if version is None or version.upload_state != DocumentVersion.UploadState.READY or not version.checksum_sha256:
+        return None
+    kind = rendition_kind(document.mime_type)
+    preview = _claim(version, kind, now)
+    if preview is None:
+        return None
+
+    update_fields = ['state', 'error_message', 'updated_at']
+    preview.error_message = ''
+    try:
+        if kind == 'text':
+            limit = settings.PREVIEW_TEXT_BYTES
+            preview.text_snippet = text_snippet(_head(_version_bytes(version, limit), limit))
+            update_fields.append('text_snippet')
+            preview.state = DocumentPreview.State.READY
+        elif version.size_bytes > settings.PREVIEW_MAX_SOURCE_BYTES:
+            preview.state = DocumentPreview.State.UNSUPPORTED
+            preview.error_message = f'Larger than PREVIEW_MAX_SOURCE_BYTES ({version.size_bytes} bytes).'
+        else:
+            data = b''.join(_version_bytes(version))
+            png = render_image(data) if kind == 'image' else render_pdf(data)
+            preview.thumbnail_key, preview.thumbnail_sha256 = _store_thumbnail(version, png)
+            update_fields += ['thumbnail_key', 'thumbnail_sha256']
+            preview.state = DocumentPreview.State.READY
+    except Exception as exc:
+        logger.warning('Preview of document %s failed: %s', document_id, exc)
+        preview.state = DocumentPreview.State.FAILED
+        preview.error_message = str(exc)[:1000]
+    preview.save(update_fields=update_fields)
+    if preview.state == DocumentPreview.State.READY:
+        # Cached list fragments of every hub holding this content now need the thumbnail.
+        invalidate_hubs(
+            Document.objects.filter(current_version__checksum_sha256=version.checksum_sha256)
+            .values_list('project_hub_id', flat=True)
+            .distinct()
+        )
+    return preview
+
+
+def schedule_preview(document_id) -> None:
+    try:
+        from .tasks import generate_preview_task
+
+        generate_preview_task.delay(str(document_id))
+    except Exception:
+        logger.warning('Could not queue the preview of document %s.', document_id, exc_info=True)
+
+
+def _ready_preview():
+    return DocumentPreview.objects.filter(
+        storage_backend=OuterRef('current_version__storage_backend'),
+        checksum_sha256=OuterRef('current_version__checksum_sha256'),
+        state=DocumentPreview.State.READY,
+    )
+
+
+def with_previews(queryset, snippet: bool = False):
+    """Annotate ``preview_thumbnail`` (the thumbnail's sha256) and optionally ``preview_snippet``.
+
+    Subqueries rather than a second query, so list and detail pages keep their query counts.
+    """
+    annotations = {'preview_thumbnail': Subquery(_ready_preview().values('thumbnail_sha256')[:1])}
+    if snippet:
+        annotations['preview_snippet'] = Subquery(_ready_preview().values('text_snippet')[:1])
+    return queryset.annotate(**annotations)
+
+
+def preview_for(document: Document) -> DocumentPreview | None:
+    version = document.current_version
+    if version is None:
+        return None
+    return DocumentPreview.objects.filter(
+        storage_backend_id=version.storage_backend_id,
+        checksum_sha256=version.checksum_sha256,
+        state=DocumentPreview.State.READY,
+    ).first()
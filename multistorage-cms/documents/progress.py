@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def progress_cache_key(version_id: int) -> str:
+    return f'upload-progress:{version_id}'
+
+
+class UploadProgressReporter:
+    """Collects provider progress callbacks and writes a throttled snapshot to the cache.
+
+    Providers call the reporter with the number of bytes sent since the previous call.
+    The snapshot is only persisted every ``UPLOAD_PROGRESS_MIN_INTERVAL`` seconds so a
+    multi-gigabyte upload does not turn into thousands of cache writes. boto3 calls it from
+    several transfer threads at once, so the counter and the throttle share a lock.
+    """
+
+    def __init__(self, version_id: int, total_bytes: int, min_interval: float | None = None):
+        self.version_id = version_id
+        self.total_bytes = max(int(total_bytes or 0), 0)
+        self.min_interval = settings.UPLOAD_PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.bytes_done = 0
+        self.started_at = time.time()
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_transferred: int) -> None:
+        with self._lock:
+            self.bytes_done += int(bytes_transferred)
+            now = time.time()
+            if now - self._last_write >= self.min_interval or self.bytes_done >= self.total_bytes:
+                self._write(now)
+
+    def start(self) -> None:
+        with self._lock:
+            self._write(time.time())
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write(time.time())
+
+    def clear(self) -> None:
+        cache.delete(progress_cache_key(self.version_id))
+
+    def _write(self, now: float) -> None:
+        self._last_write = now
+        cache.set(
+            progress_cache_key(self.version_id),
+            {
+                'bytes_done': self.bytes_done,
+                'total_bytes': self.total_bytes,
+                'started_at': self.started_at,
+                'updated_at': now,
+            },
+            settings.UPLOAD_PROGRESS_TTL,
+        )
+
+
+def summarize_progress(raw: dict[str, Any], now: float | None = None) -> dict[str, Any]:
+    now = time.time() if now is None else now
+    bytes_done = int(raw.get('bytes_done', 0))
+    total_bytes = int(raw.get('total_bytes', 0))
+    started_at = float(raw.get('started_at', now))
+    updated_at = float(raw.get('updated_at', started_at))
+
+    elapsed = max(updated_at - started_at, 0.0)
+    throughput = bytes_done / elapsed if elapsed > 0 else None
+    remaining = max(total_bytes - bytes_done, 0)
+    eta_seconds = remaining / throughput if throughput else None
+    return {
+        'bytes_done': bytes_done,
+        'total_bytes': total_bytes,
+        'percent': round(bytes_done * 100 / total_bytes, 1) if total_bytes else None,
+        'throughput_bps': round(throughput) if throughput is not None else None,
+        'eta_seconds': round(eta_seconds) if eta_seconds is not None else None,
+        'elapsed_seconds': round(elapsed),
+        'seconds_since_update': round(max(now - updated_at, 0.0)),
+        'stalled': now - updated_at > settings.UPLOAD_PROGRESS_STALL_SECONDS,
+    }
+
+
+def get_upload_progress(version_id: int) -> dict[str, Any] | None:
+    raw = cache.get(progress_cache_key(version_id))
+    if not raw:
+        return None
+    return summarize_progress(raw)
@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` backed by orjson when it is installed.
+
+    Output matches DRF's encoder: UUIDs as strings and UTC datetimes with a ``Z`` suffix.
+    Indented (browsable) output and installs without orjson use the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not settings.ORJSON_AVAILABLE or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        import orjson
+
+        return orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_UTC_Z)
@@ -0,0 +1,104 @@
+"""Per-hub version retention.
+
+`prune_versions` deletes versions that fall outside every retention rule of their hub
+(``ProjectHub.keep_last_versions`` and ``keep_versions_days``), ``VERSION_PRUNE_BATCH_SIZE``
+versions at a time. Current versions and unfinished uploads are never pruned. Their
+stored objects are removed afterwards by `documents.gc`. The storage counters, chunk
+releases, tombstones and preview releases that the delete signals would write per version
+are written once per batch instead.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from audit.writer import record_event
+from project_hubs.models import ProjectHub
+
+from . import counters, gc
+from .models import DocumentVersion
+from .signals import versions_released_in_bulk
+
+PRUNABLE_STATES = (DocumentVersion.UploadState.READY, DocumentVersion.UploadState.FAILED)
+
+
+def expired_versions(hub: ProjectHub, now: datetime | None = None):
+    """Versions of ``hub`` that no retention rule keeps (none if the hub has no rules)."""
+    versions = DocumentVersion.objects.filter(document__project_hub=hub)
+    if hub.keep_last_versions is None and hub.keep_versions_days is None:
+        return versions.none()
+    if hub.keep_last_versions is not None:
+        # Ranked over every version of the document, including unfinished ones.
+        ranked = versions.annotate(
+            rank=Window(RowNumber(), partition_by=[F('document_id')], order_by=F('version_number').desc())
+        ).filter(rank__gt=hub.keep_last_versions)
+        versions = versions.filter(pk__in=ranked.values('pk'))
+    if hub.keep_versions_days is not None:
+        versions = versions.filter(created_at__lt=(now or timezone.now()) - timedelta(days=hub.keep_versions_days))
+    return versions.filter(upload_state__in=PRUNABLE_STATES).exclude(document__current_version=F('pk'))
+
+
+def _release(hub: ProjectHub, rows: list[tuple]) -> None:
+    """Counter deltas, chunk marks and tombstones of a batch of versions about to be deleted."""
+    hub_deltas = []
+    backend_deltas: dict[int, list[dict]] = defaultdict(list)
+    keys_by_backend: dict[int, list[str]] = defaultdict(list)
+    chunked = []
+    for pk, _document_id, _number, backend_id, state, size, is_chunked, storage_key, _checksum in rows:
+        removed = counters.version_deltas(state, size, sign=-1)
+        hub_deltas.append(removed)
+        backend_deltas[backend_id].append(removed)
+        if is_chunked:
+            chunked.append(pk)
+        else:
+            keys_by_backend[backend_id].append(storage_key)
+    counters.apply_hub(hub.pk, counters.combine(*hub_deltas))
+    for backend_id, deltas in backend_deltas.items():
+        counters.apply_backend(backend_id, counters.combine(*deltas))
+    if chunked:
+        gc.release_chunks(chunked)
+    for backend_id, keys in keys_by_backend.items():
+        gc.bury(backend_id, keys)
+
+
+def prune_hub(hub: ProjectHub, now: datetime | None = None, batch_size: int | None = None) -> int:
+    batch_size = batch_size or settings.VERSION_PRUNE_BATCH_SIZE
+    expired = expired_versions(hub, now).order_by('pk')
+    columns = (
+        'pk', 'document_id', 'version_number', 'storage_backend_id', 'upload_state', 'size_bytes', 'is_chunked', 'storage_key',
+        'checksum_sha256',
+    )
+    pruned = 0
+    while rows := list(expired.values_list(*columns)[:batch_size]):
+        with transaction.atomic():
+            _release(hub, rows)
+            with versions_released_in_bulk():
+                DocumentVersion.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            gc.release_previews({(row[3], row[8]) for row in rows})
+        numbers_by_document: dict = defaultdict(list)
+        for _pk, document_id, number, *_rest in rows:
+            numbers_by_document[document_id].append(number)
+        for document_id, numbers in numbers_by_document.items():
+            record_event(
+                'document.versions_pruned',
+                document=document_id,
+                project_hub=hub,
+                payload={'version_numbers': sorted(numbers)},
+            )
+        pruned += len(rows)
+        if len(rows) < batch_size:
+            break
+    return pruned
+
+
+def prune_versions(now: datetime | None = None) -> int:
+    """Apply every hub's retention rules. Returns the number of deleted versions."""
+    hubs = ProjectHub.objects.filter(Q(keep_last_versions__isnull=False) | Q(keep_versions_days__isnull=False))
+    return sum(prune_hub(hub, now) for hub in hubs.order_by('pk'))
@@ -0,0 +1,118 @@
+"""Full-text search over `DocumentSearchEntry`.
+
+Postgres matches a weighted ``tsvector`` (prefix terms, GIN index) and falls back to
+trigram similarity on the title for partial words; SQLite uses the FTS5 table created
+by migration ``0005``. Other backends degrade to ``icontains``.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Document, DocumentSearchEntry
+from .pagination import KeysetPaginator
+
+MAX_TERMS = 8
+BATCH_SIZE = 500
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query: str) -> list[str]:
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def refresh_search_entries(document_ids) -> None:
+    """Upsert the search rows of the given documents (skipping ones that no longer exist)."""
+    documents = list(Document.objects.filter(id__in=list(document_ids)).prefetch_related('tags'))
+    existing = {entry.document_id: entry for entry in DocumentSearchEntry.objects.filter(document__in=documents)}
+    now = timezone.now()
+    created, changed = [], []
+    for document in documents:
+        values = {
+            'title': document.title,
+            'description': document.description,
+            'tags': ' '.join(sorted(tag.tag for tag in document.tags.all())),
+        }
+        entry = existing.get(document.pk)
+        if entry is None:
+            created.append(DocumentSearchEntry(document=document, updated_at=now, **values))
+        elif any(getattr(entry, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(entry, name, value)
+            entry.updated_at = now
+            changed.append(entry)
+    DocumentSearchEntry.objects.bulk_create(created, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    DocumentSearchEntry.objects.bulk_update(
+        changed, ['title', 'description', 'tags', 'updated_at'], batch_size=BATCH_SIZE
+    )
+
+
+def _postgres_match(terms: list[str], raw_query: str):
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    matches = RawSQL(
+        "(search_vector @@ to_tsquery('simple', %s) OR title %% %s)",
+        (tsquery, raw_query),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        "ts_rank(search_vector, to_tsquery('simple', %s)) + similarity(title, %s)",
+        (tsquery, raw_query),
+        output_field=FloatField(),
+    )
+    return matches, rank
+
+
+def _sqlite_match(terms: list[str]):
+    fts_query = ' '.join(f'"{term}"*' for term in terms)
+    matches = RawSQL(
+        'id IN (SELECT rowid FROM documents_search_fts WHERE documents_search_fts MATCH %s)',
+        (fts_query,),
+        output_field=BooleanField(),
+    )
+    # bm25() is lower-is-better; negate it so every backend ranks descending. Column
+    # weights follow the Postgres setup: title > tags > description.
+    rank = RawSQL(
+        '(SELECT -bm25(documents_search_fts, 10.0, 5.0, 1.0) FROM documents_search_fts '
+        'WHERE documents_search_fts MATCH %s AND documents_search_fts.rowid = id)',
+        (fts_query,),
+        output_field=FloatField(),
+    )
+    return matches, rank
+
+
+def search_documents(queryset, query: str):
+    """Filter ``queryset`` to documents matching ``query`` and annotate ``search_rank``.
+
+    Paginate the result with `search_paginator` to get ranked order.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        matches, rank = _postgres_match(terms, query.strip())
+    elif connection.vendor == 'sqlite':
+        matches, rank = _sqlite_match(terms)
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(description__icontains=term) | Q(tags__tag__iexact=term)
+        return queryset.filter(pk__in=Document.objects.filter(condition).values('pk')).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    matching = DocumentSearchEntry.objects.filter(matches).values('document_id')
+    entry_rank = DocumentSearchEntry.objects.filter(document=OuterRef('pk')).annotate(rank=rank).values('rank')[:1]
+    return queryset.filter(pk__in=matching).annotate(
+        search_rank=Coalesce(Subquery(entry_rank, output_field=FloatField()), Value(0.0))
+    )
+
+
+# Best match first, newest first among equal ranks.
+search_paginator = KeysetPaginator((('search_rank', True), ('created_at', True), ('id', True)))
@@ -0,0 +1,200 @@
+"""Incremental maintenance of `DocumentSearchEntry`, the tag counters, the storage counters,
+`Document.updated_at`, the hub fragment-cache generations and storage tombstones."""
+
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, gc, tags
+from .fragments import invalidate_hubs
+from .models import Document, DocumentTag, DocumentVersion
+from .search import refresh_search_entries
+
+SEARCH_FIELDS = {'title', 'description'}
+VERSION_PAYLOAD_FIELDS = {'upload_state', 'storage_key'}
+_bulk_release = threading.local()
+
+
+def _document_hub_id(document_id):
+    return Document.objects.filter(pk=document_id).values_list('project_hub_id', flat=True).first()
+
+
+def _version_backend_id(version_id):
+    if version_id is None:
+        return None
+    return DocumentVersion.objects.filter(pk=version_id).values_list('storage_backend_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Document, dispatch_uid='document_previous_hub')
+def remember_previous_hub(sender, instance, **kwargs):
+    instance._previous_hub_id = instance._previous_version_id = None
+    if not instance._state.adding:
+        previous = Document.objects.filter(pk=instance.pk).values_list('project_hub_id', 'current_version_id').first()
+        if previous:
+            instance._previous_hub_id, instance._previous_version_id = previous
+
+
+@receiver(post_save, sender=Document, dispatch_uid='search_document_saved')
+def document_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created and instance._previous_hub_id != instance.project_hub_id:
+        tags.move_document_tags(instance.pk, instance._previous_hub_id, instance.project_hub_id)
+    if update_fields is not None and not (set(update_fields) & SEARCH_FIELDS):
+        return
+    refresh_search_entries([instance.pk])
+
+
+@receiver(post_save, sender=Document, dispatch_uid='counter_document_saved')
+def document_counters_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.apply_hub(instance.project_hub_id, {'document_count': 1})
+    elif instance._previous_hub_id != instance.project_hub_id:
+        moved = counters.combine({'document_count': 1}, counters.document_version_deltas(instance.pk))
+        counters.apply_hub(instance._previous_hub_id, counters.negate(moved))
+        counters.apply_hub(instance.project_hub_id, moved)
+    if instance._previous_version_id != instance.current_version_id:
+        counters.apply_backend(_version_backend_id(instance._previous_version_id), {'document_count': -1})
+        counters.apply_backend(_version_backend_id(instance.current_version_id), {'document_count': 1})
+
+
+@receiver(pre_delete, sender=Document, dispatch_uid='counter_document_deleting')
+def document_counters_deleting(sender, instance, **kwargs):
+    # The current version is deleted before the document, so resolve its backend now.
+    instance._current_backend_id = _version_backend_id(instance.current_version_id)
+
+
+@receiver(pre_delete, sender=Document, dispatch_uid='tag_document_deleting')
+def document_tags_deleting(sender, instance, **kwargs):
+    tags.release_document_access(instance.pk)
+
+
+@receiver(post_delete, sender=Document, dispatch_uid='counter_document_deleted')
+def document_counters_deleted(sender, instance, **kwargs):
+    counters.apply_hub(instance.project_hub_id, {'document_count': -1})
+    counters.apply_backend(getattr(instance, '_current_backend_id', None), {'document_count': -1})
+
+
+@receiver(post_save, sender=Document, dispatch_uid='fragments_document_saved')
+@receiver(post_delete, sender=Document, dispatch_uid='fragments_document_deleted')
+def document_fragments_changed(sender, instance, **kwargs):
+    invalidate_hubs([instance.project_hub_id, getattr(instance, '_previous_hub_id', None)])
+
+
+@receiver(pre_save, sender=DocumentTag, dispatch_uid='tag_previous_value')
+def remember_previous_tag(sender, instance, **kwargs):
+    instance._previous_tag = None
+    if not instance._state.adding:
+        instance._previous_tag = (
+            DocumentTag.objects.filter(pk=instance.pk).values_list('document__project_hub_id', 'tag').first()
+        )
+
+
+@receiver(post_save, sender=DocumentTag, dispatch_uid='tag_count_saved')
+def document_tag_saved(sender, instance, created, **kwargs):
+    current = (_document_hub_id(instance.document_id), instance.tag)
+    previous = None if created else instance._previous_tag
+    if previous != current:
+        if previous:
+            tags.adjust_tag_count(*previous, -1)
+            tags.adjust_user_tag_counts(instance.document_id, previous[1], -1)
+        tags.adjust_tag_count(*current, 1)
+        tags.adjust_user_tag_counts(instance.document_id, instance.tag, 1)
+
+
+@receiver(post_delete, sender=DocumentTag, dispatch_uid='tag_count_deleted')
+def document_tag_deleted(sender, instance, **kwargs):
+    tags.adjust_tag_count(_document_hub_id(instance.document_id), instance.tag, -1)
+    tags.adjust_user_tag_counts(instance.document_id, instance.tag, -1)
+
+
+@receiver(post_save, sender=DocumentTag, dispatch_uid='search_tag_saved')
+@receiver(post_delete, sender=DocumentTag, dispatch_uid='search_tag_deleted')
+def document_tag_changed(sender, instance, **kwargs):
+    # After commit: a tag deleted by a cascading document delete must not re-create the entry.
+    transaction.on_commit(partial(refresh_search_entries, [instance.document_id]))
+    invalidate_hubs([_document_hub_id(instance.document_id)])
+
+
+@receiver(post_save, sender=DocumentVersion, dispatch_uid='document_version_touch')
+def document_version_saved(sender, instance, update_fields=None, **kwargs):
+    # API payloads include the current version's state, so its changes must move the
+    # document's `updated_at` (the API's Last-Modified/ETag source).
+    if update_fields is not None and not (set(update_fields) & VERSION_PAYLOAD_FIELDS):
+        return
+    Document.objects.filter(current_version=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=DocumentVersion, dispatch_uid='counter_version_previous')
+def remember_previous_version(sender, instance, **kwargs):
+    instance._previous_counted = None
+    if not instance._state.adding:
+        instance._previous_counted = (
+            DocumentVersion.objects.filter(pk=instance.pk)
+            .values_list('storage_backend_id', 'upload_state', 'size_bytes')
+            .first()
+        )
+
+
+@receiver(post_save, sender=DocumentVersion, dispatch_uid='counter_version_saved')
+def version_counters_saved(sender, instance, **kwargs):
+    current = (instance.storage_backend_id, instance.upload_state, instance.size_bytes)
+    previous = instance._previous_counted
+    if previous == current:
+        return
+    added = counters.version_deltas(instance.upload_state, instance.size_bytes)
+    removed = counters.version_deltas(previous[1], previous[2], sign=-1) if previous else {}
+    # Versions never change document, so the hub sees one combined delta.
+    counters.apply_hub(_document_hub_id(instance.document_id), counters.combine(added, removed))
+    if previous and previous[0] != instance.storage_backend_id:
+        counters.apply_backend(previous[0], removed)
+        counters.apply_backend(instance.storage_backend_id, added)
+    else:
+        counters.apply_backend(instance.storage_backend_id, counters.combine(added, removed))
+
+
+@contextmanager
+def versions_released_in_bulk():
+    """Skip the per-row counter and GC handlers of deleted versions.
+
+    For callers that delete many versions and apply the same bookkeeping once per batch
+    (`documents.retention.prune_hub`).
+    """
+    _bulk_release.active = True
+    try:
+        yield
+    finally:
+        _bulk_release.active = False
+
+
+def _released_in_bulk() -> bool:
+    return getattr(_bulk_release, 'active', False)
+
+
+@receiver(post_delete, sender=DocumentVersion, dispatch_uid='counter_version_deleted')
+def version_counters_deleted(sender, instance, **kwargs):
+    if _released_in_bulk():
+        return
+    # Inside a cascading document delete the document row is still present here.
+    removed = counters.version_deltas(instance.upload_state, instance.size_bytes, sign=-1)
+    counters.apply_hub(_document_hub_id(instance.document_id), removed)
+    counters.apply_backend(instance.storage_backend_id, removed)
+
+
+@receiver(pre_delete, sender=DocumentVersion, dispatch_uid='gc_version_deleting')
+def version_chunks_releasing(sender, instance, **kwargs):
+    # Still referenced here; `gc.retire_orphan_chunks` checks again once the manifest is gone.
+    if instance.is_chunked and not _released_in_bulk():
+        gc.release_chunks([instance.pk])
+
+
+@receiver(post_delete, sender=DocumentVersion, dispatch_uid='gc_version_deleted')
+def version_object_released(sender, instance, **kwargs):
+    if _released_in_bulk():
+        return
+    if not instance.is_chunked:
+        gc.bury(instance.storage_backend_id, [instance.storage_key])
+    gc.release_previews([(instance.storage_backend_id, instance.checksum_sha256)])
@@ -0,0 +1,185 @@
+"""Tag filtering and tag facets backed by `HubTagCount` and `UserTagCount`.
+
+`UserTagCount` holds each user's counts over the documents they can read, so facets are
+one indexed read for every user. It moves with `DocumentTag` changes (`adjust_user_tag_counts`)
+and with rewrites of the access index (`access_tag_totals` / `apply_user_tag_deltas`, called
+by `access_control.indexing`). Facets are also cached under the hub's fragment generation
+and the user's authorization version (`documents.fragments.scoped_key`).
+"""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.db.models.functions import Greatest
+
+from .fragments import invalidate_hubs, scoped_key
+from .models import DocumentTag, HubTagCount, UserTagCount
+
+MAX_FILTER_TAGS = 10
+DEFAULT_FACET_LIMIT = 50
+
+
+def parse_tags(raw: str) -> list[str]:
+    tags: list[str] = []
+    for tag in (raw or '').split(','):
+        tag = tag.strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags[:MAX_FILTER_TAGS]
+
+
+def filter_by_tags(queryset, tags: list[str], mode: str = 'all'):
+    """Keep documents carrying all (``mode='all'``) or any (``mode='any'``) of ``tags``."""
+    if not tags:
+        return queryset
+    document_tags = DocumentTag.objects.filter(document=OuterRef('pk'))
+    if mode == 'any':
+        return queryset.filter(Exists(document_tags.filter(tag__in=tags)))
+    for tag in tags:
+        queryset = queryset.filter(Exists(document_tags.filter(tag=tag)))
+    return queryset
+
+
+def adjust_tag_count(hub_id: int | None, tag: str, delta: int) -> None:
+    if not hub_id:
+        return
+    with transaction.atomic():
+        if delta > 0:
+            HubTagCount.objects.get_or_create(project_hub_id=hub_id, tag=tag)
+        # Clamped at zero: a drifted counter must not fail the write that decrements it.
+        HubTagCount.objects.filter(project_hub_id=hub_id, tag=tag).update(
+            document_count=Greatest(F('document_count') + delta, 0)
+        )
+
+
+def move_document_tags(document_id, from_hub_id: int | None, to_hub_id: int | None) -> None:
+    for tag in DocumentTag.objects.filter(document_id=document_id).values_list('tag', flat=True):
+        adjust_tag_count(from_hub_id, tag, -1)
+        adjust_tag_count(to_hub_id, tag, 1)
+
+
+def access_tag_totals(access) -> Counter:
+    """``{(user_id, hub_id, tag): documents}`` over a `UserDocumentAccess` queryset."""
+    rows = access.values('user_id', 'project_hub_id', 'document__tags__tag').annotate(total=Count('pk'))
+    return Counter(
+        {
+            (row['user_id'], row['project_hub_id'], row['document__tags__tag']): row['total']
+            for row in rows
+            if row['document__tags__tag'] is not None
+        }
+    )
+
+
+def apply_user_tag_deltas(before: Counter, after: Counter) -> int:
+    """Move `UserTagCount` from the ``before`` totals to the ``after`` totals.
+
+    Returns the number of counters changed. Updates are grouped by hub, tag and delta, so
+    granting a user access to many documents costs one query per tag, not per document.
+    """
+    deltas = {key: after[key] - before[key] for key in before.keys() | after.keys() if after[key] != before[key]}
+    if not deltas:
+        return 0
+    groups: dict[tuple[int, str, int], list[int]] = defaultdict(list)
+    for (user_id, hub_id, tag), delta in deltas.items():
+        groups[(hub_id, tag, delta)].append(user_id)
+    with transaction.atomic():
+        UserTagCount.objects.bulk_create(
+            [
+                UserTagCount(user_id=user_id, project_hub_id=hub_id, tag=tag)
+                for (user_id, hub_id, tag), delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        for (hub_id, tag, delta), user_ids in groups.items():
+            UserTagCount.objects.filter(user_id__in=user_ids, project_hub_id=hub_id, tag=tag).update(
+                document_count=Greatest(F('document_count') + delta, 0)
+            )
+    return len(deltas)
+
+
+def adjust_user_tag_counts(document_id, tag: str, delta: int) -> None:
+    """Apply a tag added to (``delta=1``) or removed from (``-1``) a document to its readers' counters."""
+    from access_control.models import UserDocumentAccess
+
+    readers = UserDocumentAccess.objects.filter(document_id=document_id).values_list('user_id', 'project_hub_id')
+    apply_user_tag_deltas(Counter(), Counter({(user_id, hub_id, tag): delta for user_id, hub_id in readers}))
+
+
+def release_document_access(document_id) -> None:
+    """Drop a document about to be deleted from its readers' counters, with its access rows.
+
+    Deleting the rows here, before the cascade, keeps the cascade's `DocumentTag` deletes
+    from decrementing the same counters again.
+    """
+    from access_control.models import UserDocumentAccess
+
+    access = UserDocumentAccess.objects.filter(document_id=document_id)
+    apply_user_tag_deltas(access_tag_totals(access), Counter())
+    access.delete()
+
+
+def tag_facets(user, hub, limit: int = DEFAULT_FACET_LIMIT) -> list[dict]:
+    """Per-tag document counts over the documents ``user`` can read in ``hub``.
+
+    Read from the user's precomputed `UserTagCount` rows and cached until the hub or
+    the user's access changes.
+    """
+    key = scoped_key('tag_facets', hub.pk, user.pk, str(limit))
+    facets = cache.get(key)
+    if facets is None:
+        rows = (
+            UserTagCount.objects.filter(user=user, project_hub=hub, document_count__gt=0)
+            .order_by('-document_count', 'tag')
+            .values_list('tag', 'document_count')[:limit]
+        )
+        facets = [{'tag': tag, 'count': count} for tag, count in rows]
+        cache.set(key, facets, settings.FRAGMENT_CACHE_TIMEOUT)
+    return facets
+
+
+def reconcile_tag_counts(hub_id: int | None = None) -> int:
+    """Recompute `HubTagCount` and `UserTagCount`. Returns the number of corrected rows."""
+    from access_control.models import UserDocumentAccess
+
+    tags = DocumentTag.objects.filter(document__project_hub__isnull=False)
+    counters = HubTagCount.objects.all()
+    if hub_id is not None:
+        tags = tags.filter(document__project_hub_id=hub_id)
+        counters = counters.filter(project_hub_id=hub_id)
+
+    actual = {
+        (row['document__project_hub_id'], row['tag']): row['total']
+        for row in tags.values('document__project_hub_id', 'tag').annotate(total=Count('id'))
+    }
+    fixed = 0
+    with transaction.atomic():
+        for counter in counters.select_for_update():
+            expected = actual.pop((counter.project_hub_id, counter.tag), 0)
+            if counter.document_count != expected:
+                counter.document_count = expected
+                counter.save(update_fields=['document_count'])
+                fixed += 1
+        HubTagCount.objects.bulk_create(
+            [HubTagCount(project_hub_id=hub, tag=tag, document_count=total) for (hub, tag), total in actual.items()]
+        )
+        access = UserDocumentAccess.objects.all()
+        user_counters = UserTagCount.objects.all()
+        if hub_id is not None:
+            access = access.filter(project_hub_id=hub_id)
+            user_counters = user_counters.filter(project_hub_id=hub_id)
+        recorded = Counter(
+            {
+                (user_id, hub, tag): count
+                for user_id, hub, tag, count in user_counters.values_list('user_id', 'project_hub_id', 'tag', 'document_count')
+            }
+        )
+        fixed += apply_user_tag_deltas(recorded, access_tag_totals(access))
+        if fixed or actual:
+            invalidate_hubs([hub_id] if hub_id is not None else counters.values_list('project_hub_id', flat=True))
+    return fixed + len(actual)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import partial
 from pathlib import Path
 
 try:
@@ -15,46 +16,126 @@ except Exception:  # pragma: no cover
 from django.db import transaction
 from django.utils import timezone
 
-from .models import DocumentVersion
+from audit.writer import record_event
+
+from .chunking import is_chunked_backend, save_manifest, store_chunked
+from .gc import bury, collect_garbage
+from .models import Document, DocumentVersion
+from .previews import generate_preview, schedule_preview
+from .progress import UploadProgressReporter
+from .retention import prune_versions
+from .rollups import run_upload_rollups
 from storage_backends.providers import get_provider
 
 
 @shared_task(bind=True, max_retries=3, autoretry_for=(Exception,), retry_backoff=True)
-def upload_document_version_task(self, version_id: int, source_path: str) -> None:
+def upload_document_version_task(self, version_id: int, source_path: str, keep_source: bool = False) -> None:
+    source = Path(source_path)
     with transaction.atomic():
         version = (
             DocumentVersion.objects.select_for_update()
             .select_related('storage_backend')
-            .get(id=version_id)
+            .filter(id=version_id)
+            .first()
         )
+        if version is None:
+            # Deleted before the upload started; nothing was stored.
+            if not keep_source:
+                source.unlink(missing_ok=True)
+            return
         version.upload_state = DocumentVersion.UploadState.UPLOADING
         version.error_message = ''
         version.save(update_fields=['upload_state', 'error_message'])
 
-    source = Path(source_path)
     if not source.exists():
         raise FileNotFoundError(f'Source upload file missing: {source_path}')
 
+    hub_id = Document.objects.filter(pk=version.document_id).values_list('project_hub_id', flat=True).first()
     upload_succeeded = False
+    reporter = UploadProgressReporter(version_id, source.stat().st_size)
+    reporter.start()
     try:
         provider = get_provider(version.storage_backend)
-        stored_key = provider.upload(source, version.storage_key)
+        payload = {'version_id': version_id}
+        chunked = is_chunked_backend(version.storage_backend)
+        if chunked:
+            # Only chunks the backend lacks are sent; ``storage_key`` stays a plain name.
+            manifest, payload['uploaded_bytes'] = store_chunked(version, source, provider, progress=reporter)
+            stored_key = version.storage_key
+        else:
+            stored_key = provider.upload(source, version.storage_key, progress=reporter)
 
         with transaction.atomic():
-            fresh = DocumentVersion.objects.select_for_update().get(id=version_id)
+            fresh = DocumentVersion.objects.select_for_update().filter(id=version_id).first()
+            if fresh is None:
+                # Deleted while uploading: its tombstone names the planned key, not the stored
+                # object. Unsaved chunks are left to the orphan check.
+                if not chunked:
+                    bury(version.storage_backend_id, [stored_key])
+                upload_succeeded = True
+                return
+            if chunked:
+                save_manifest(version_id, manifest)
             fresh.storage_key = stored_key
+            fresh.is_chunked = chunked
             fresh.upload_state = DocumentVersion.UploadState.READY
-            fresh.uploaded_at = timezone.now()
+            fresh.uploaded_at = fresh.finished_at = timezone.now()
             fresh.error_message = ''
-            fresh.save(update_fields=['storage_key', 'upload_state', 'uploaded_at', 'error_message'])
+            fresh.save(
+                update_fields=['storage_key', 'is_chunked', 'upload_state', 'uploaded_at', 'finished_at', 'error_message']
+            )
             upload_succeeded = True
+            transaction.on_commit(partial(schedule_preview, fresh.document_id))
+        record_event(
+            'document.upload_ready',
+            actor=fresh.uploaded_by_id,
+            document=fresh.document_id,
+            project_hub=hub_id,
+            payload={**payload, 'storage_key': stored_key},
+            dedup_key=f'upload:{version_id}:ready',
+        )
     except Exception as exc:
         with transaction.atomic():
-            failed = DocumentVersion.objects.select_for_update().get(id=version_id)
-            failed.upload_state = DocumentVersion.UploadState.FAILED
-            failed.error_message = str(exc)[:1000]
-            failed.save(update_fields=['upload_state', 'error_message'])
+            failed = DocumentVersion.objects.select_for_update().filter(id=version_id).first()
+            if failed is not None:
+                failed.upload_state = DocumentVersion.UploadState.FAILED
+                failed.error_message = str(exc)[:1000]
+                failed.finished_at = timezone.now()
+                failed.save(update_fields=['upload_state', 'error_message', 'finished_at'])
+        if failed is None:
+            # Deleted meanwhile: there is nothing left to mark failed or to retry.
+            return
+        record_event(
+            'document.upload_failed',
+            actor=failed.uploaded_by_id,
+            document=failed.document_id,
+            project_hub=hub_id,
+            payload={'version_id': version_id, 'error': failed.error_message},
+            dedup_key=f'upload:{version_id}:failed:{self.request.retries}',
+        )
         raise
     finally:
-        if upload_succeeded and source.exists():
+        reporter.clear()
+        # Bulk imports (``keep_source``) read the original files, which must stay in place.
+        if upload_succeeded and not keep_source and source.exists():
             source.unlink(missing_ok=True)
+
+
+@shared_task()
+def rollup_uploads_task() -> int:
+    return run_upload_rollups()
+
+
+@shared_task()
+def prune_versions_task() -> int:
+    return prune_versions()
+
+
+@shared_task()
+def collect_storage_garbage_task() -> int:
+    return collect_garbage()
+
+
+@shared_task()
+def generate_preview_task(document_id: str) -> None:
+    generate_preview(document_id)
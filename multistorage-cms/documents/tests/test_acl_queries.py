@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from django.contrib.auth.models import Group
+
+from access_control.models import DocumentAccess
+from accounts.models import User
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class AccessQueryPlanTests(TestCase):
+    """EXPLAIN-based guards: access stays a semi-join driven by the composite indexes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='u@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+
+    def plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def listing(self):
+        return Document.objects.accessible_to(self.user, self.hub).order_by('-created_at')
+
+    def test_index_listing_has_no_distinct_and_uses_indexes(self):
+        queryset = self.listing()
+        sql = str(queryset.query).upper()
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIn('EXISTS', sql)
+
+        plan = self.plan(queryset)
+        self.assertIn('document_hub_created_idx', plan)
+        # SQLite names the unique constraint's index itself.
+        self.assertRegex(plan, 'uniq_user_document_access|sqlite_autoindex_access_control_userdocumentaccess')
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('USE TEMP B-TREE FOR DISTINCT', plan)
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan)
+
+    @override_settings(DOCUMENT_ACL_SOURCE='rules')
+    def test_rule_listing_probes_acl_indexes(self):
+        queryset = self.listing()
+        self.assertNotIn('DISTINCT', str(queryset.query).upper())
+
+        plan = self.plan(queryset)
+        self.assertIn('document_hub_created_idx', plan)
+        self.assertIn('doc_access_user_doc_idx', plan)
+        self.assertIn('doc_access_group_doc_idx', plan)
+
+
+class AccessSourceParityTests(TestCase):
+    def test_index_and_rules_agree(self):
+        owner = User.objects.create_user(email='owner@example.com', password='x')
+        reader = User.objects.create_user(email='reader@example.com', password='x')
+        group = Group.objects.create(name='Readers')
+        with self.captureOnCommitCallbacks(execute=True):
+            hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=owner)
+            ProjectMembership.objects.create(project_hub=hub, user=reader, role=ProjectMembership.Role.VIEWER)
+            reader.groups.add(group)
+            documents = [
+                Document.objects.create(
+                    owner=owner,
+                    project_hub=hub,
+                    title=f'Doc {index}',
+                    mime_type='text/plain',
+                    size_bytes=1,
+                    checksum_sha256='',
+                )
+                for index in range(3)
+            ]
+            DocumentAccess.objects.create(document=documents[0], subject_user=reader, role=DocumentAccess.Role.VIEWER)
+            DocumentAccess.objects.create(document=documents[1], subject_group=group, role=DocumentAccess.Role.VIEWER)
+            DocumentAccess.objects.create(document=documents[1], subject_user=reader, role=DocumentAccess.Role.EDITOR)
+
+        for user in (owner, reader):
+            indexed = set(Document.objects.accessible_to(user, hub).values_list('pk', flat=True))
+            with override_settings(DOCUMENT_ACL_SOURCE='rules'):
+                evaluated = list(Document.objects.accessible_to(user, hub).values_list('pk', flat=True))
+            self.assertEqual(len(evaluated), len(set(evaluated)))
+            self.assertEqual(indexed, set(evaluated))
+        self.assertEqual(
+            set(Document.objects.accessible_to(reader, hub).values_list('pk', flat=True)),
+            {documents[0].pk, documents[1].pk},
+        )
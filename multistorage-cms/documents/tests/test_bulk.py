@@ -0,0 +1,106 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from access_control.models import UserDocumentAccess
+from accounts.models import User
+from documents.counters import expected_totals
+from documents.models import Document, DocumentSearchEntry, HubStorageCounter
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class DocumentBulkAPITests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.editor = User.objects.create_user(email='editor@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+            ProjectMembership.objects.create(project_hub=self.hub, user=self.editor, role=ProjectMembership.Role.EDITOR)
+            self.first = self._document('First', self.owner)
+            self.second = self._document('Second', self.owner)
+        self.url = reverse('documents_api:documents_bulk', kwargs={'slug': self.hub.slug})
+
+    def _document(self, title, owner):
+        return Document.objects.create(
+            owner=owner,
+            project_hub=self.hub,
+            title=title,
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+
+    def post(self, operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'operations': operations}, content_type='application/json')
+
+    def test_mixed_operations_report_per_item_results(self):
+        self.client.force_login(self.owner)
+        response = self.post([
+            {'op': 'create', 'data': {'title': 'Imported', 'size_bytes': 5}},
+            {'op': 'create', 'data': {'description': 'no title'}},
+            {'op': 'update', 'id': str(self.first.pk), 'data': {'title': 'Renamed'}},
+            {'op': 'delete', 'id': str(self.second.pk)},
+            {'op': 'delete', 'id': str(self.second.pk)},
+            {'op': 'delete', 'id': '00000000-0000-0000-0000-000000000000'},
+            {'op': 'move'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([item['status'] for item in results], [201, 400, 200, 204, 400, 404, 400])
+        self.assertIn('title', results[1]['errors'])
+
+        created = Document.objects.get(pk=results[0]['id'])
+        self.assertEqual((created.owner, created.size_bytes), (self.owner, 5))
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.title, 'Renamed')
+        self.assertFalse(Document.objects.filter(pk=self.second.pk).exists())
+
+        # Derived rows skipped by bulk_create/bulk_update are refreshed after commit.
+        self.assertTrue(UserDocumentAccess.objects.filter(user=self.owner, document=created).exists())
+        self.assertEqual(DocumentSearchEntry.objects.get(document=created).title, 'Imported')
+        self.assertEqual(DocumentSearchEntry.objects.get(document=self.first).title, 'Renamed')
+
+    def test_storage_counters_follow_bulk_creates_and_deletes(self):
+        self.client.force_login(self.owner)
+        self.post([
+            {'op': 'create', 'data': {'title': 'One'}},
+            {'op': 'create', 'data': {'title': 'Two'}},
+            {'op': 'delete', 'id': str(self.second.pk)},
+        ])
+        counter = HubStorageCounter.objects.get(project_hub=self.hub)
+        self.assertEqual(counter.document_count, Document.objects.filter(project_hub=self.hub).count())
+        self.assertEqual(counter.document_count, 3)
+        self.assertEqual(counter.document_count, expected_totals()[0][self.hub.pk]['document_count'])
+
+    def test_permissions_follow_single_document_endpoints(self):
+        self.client.force_login(self.editor)
+        with self.captureOnCommitCallbacks(execute=True):
+            own = self._document('Own', self.editor)
+        results = self.post([
+            {'op': 'update', 'id': str(self.first.pk), 'data': {'title': 'Edited'}},
+            {'op': 'delete', 'id': str(own.pk)},
+            {'op': 'delete', 'id': str(self.second.pk)},
+        ]).json()['results']
+        # Editors cannot see the owner's documents; their own they may delete.
+        self.assertEqual([item['status'] for item in results], [404, 204, 404])
+
+    def test_queries_do_not_grow_with_operation_count(self):
+        self.client.force_login(self.owner)
+        self.post([{'op': 'create', 'data': {'title': 'Warm'}}])
+
+        def count(size):
+            operations = [{'op': 'create', 'data': {'title': f'Doc {i}'}} for i in range(size)]
+            operations.append({'op': 'update', 'id': str(self.first.pk), 'data': {'visibility': 'TEAM'}})
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.url, {'operations': operations}, content_type='application/json')
+            return len(context.captured_queries)
+
+        self.assertEqual(count(2), count(50))
+
+    def test_rejects_empty_and_oversized_requests(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.post([]).status_code, 400)
+        with self.settings(DOCUMENT_BULK_MAX_OPERATIONS=2):
+            self.assertEqual(self.post([{'op': 'delete', 'id': str(self.first.pk)}] * 3).status_code, 400)
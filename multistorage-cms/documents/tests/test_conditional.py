@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from documents.models import Document, DocumentVersion
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+            self.document = self._document('First')
+        self.client.force_login(self.user)
+        self.list_url = reverse('documents_api:documents', kwargs={'slug': self.hub.slug})
+        self.detail_url = reverse(
+            'documents_api:document_detail', kwargs={'slug': self.hub.slug, 'pk': self.document.pk}
+        )
+
+    def _document(self, title):
+        return Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title=title,
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+
+    def test_list_not_modified_until_documents_change(self):
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+
+        # session, user, validators
+        with self.assertNumQueries(3):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._document('Second')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Document.objects.get(title='Second').delete()
+        self.assertEqual(self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get(self.list_url)['ETag']
+        response = self.client.get(self.list_url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_etag_follows_version_state(self):
+        backend = StorageBackend.objects.create(
+            name='Local', kind=StorageBackend.Kind.LOCAL, created_by=self.user, project_hub=self.hub
+        )
+        version = DocumentVersion.objects.create(
+            document=self.document,
+            version_number=1,
+            storage_backend=backend,
+            storage_key='hub/first.txt',
+            uploaded_by=self.user,
+        )
+        self.document.current_version = version
+        self.document.save(update_fields=['current_version', 'updated_at'])
+
+        etag = self.client.get(self.detail_url)['ETag']
+        self.assertEqual(self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        version.upload_state = DocumentVersion.UploadState.READY
+        version.save(update_fields=['upload_state'])
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['current_version_state'], 'READY')
+
+    def test_sparse_fieldsets(self):
+        rows = self.client.get(self.list_url, {'fields': 'title,id'}).json()
+        self.assertEqual(rows, [{'id': str(self.document.pk), 'title': 'First'}])
+
+        detail = self.client.get(self.detail_url, {'fields': 'title,current_version_state'}).json()
+        self.assertEqual(detail, {'title': 'First'})
+
+        response = self.client.get(self.list_url, {'fields': 'title,owner'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(self.detail_url, {'fields': 'secret'}).status_code, 400)
@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from documents.models import BackendStorageCounter, Document, DocumentVersion, HubStorageCounter
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+
+class StorageCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+        self.other_hub = ProjectHub.objects.create(name='Other', slug='other', owner=self.user)
+        self.backend = StorageBackend.objects.create(name='Local', kind=StorageBackend.Kind.LOCAL, created_by=self.user)
+        self.document = self._upload('Report', 100)
+
+    def _upload(self, title, size):
+        document = Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title=title,
+            mime_type='text/plain',
+            size_bytes=size,
+            checksum_sha256='',
+        )
+        version = DocumentVersion.objects.create(
+            document=document,
+            version_number=1,
+            storage_backend=self.backend,
+            storage_key=f'hub/{title}',
+            size_bytes=size,
+            uploaded_by=self.user,
+        )
+        document.current_version = version
+        document.save(update_fields=['current_version', 'updated_at'])
+        return document
+
+    def hub_counts(self, hub=None):
+        counter = HubStorageCounter.objects.get(project_hub=hub or self.hub)
+        return (counter.document_count, counter.version_count, counter.ready_bytes, counter.pending_bytes, counter.failed_bytes)
+
+    def backend_counts(self):
+        counter = BackendStorageCounter.objects.get(storage_backend=self.backend)
+        return (counter.document_count, counter.version_count, counter.ready_bytes, counter.pending_bytes, counter.failed_bytes)
+
+    def set_state(self, document, state):
+        version = document.current_version
+        version.upload_state = state
+        version.save(update_fields=['upload_state'])
+
+    def test_upload_state_changes_move_bytes(self):
+        self.assertEqual(self.hub_counts(), (1, 1, 0, 100, 0))
+        self.set_state(self.document, DocumentVersion.UploadState.UPLOADING)
+        self.assertEqual(self.hub_counts(), (1, 1, 0, 100, 0))
+        self.set_state(self.document, DocumentVersion.UploadState.READY)
+        self.assertEqual(self.hub_counts(), (1, 1, 100, 0, 0))
+        self.assertEqual(self.backend_counts(), (1, 1, 100, 0, 0))
+
+        failed = self._upload('Broken', 40)
+        self.set_state(failed, DocumentVersion.UploadState.FAILED)
+        self.assertEqual(self.hub_counts(), (2, 2, 100, 0, 40))
+        self.assertEqual(self.backend_counts(), (2, 2, 100, 0, 40))
+
+    def test_deletes_and_hub_moves(self):
+        self.set_state(self.document, DocumentVersion.UploadState.READY)
+        second = self._upload('Notes', 30)
+
+        second.project_hub = self.other_hub
+        second.save()
+        self.assertEqual(self.hub_counts(), (1, 1, 100, 0, 0))
+        self.assertEqual(self.hub_counts(self.other_hub), (1, 1, 0, 30, 0))
+
+        self.document.delete()
+        self.assertEqual(self.hub_counts(), (0, 0, 0, 0, 0))
+        self.assertEqual(self.backend_counts(), (1, 1, 0, 30, 0))
+
+        # Deleting a hub detaches its documents; their versions stay on the backend.
+        self.other_hub.delete()
+        self.assertFalse(HubStorageCounter.objects.filter(project_hub_id=self.other_hub.pk).exists())
+        self.assertEqual(self.backend_counts(), (1, 1, 0, 30, 0))
+
+    def test_reconcile_repairs_drift(self):
+        HubStorageCounter.objects.filter(project_hub=self.hub).update(document_count=7, pending_bytes=0)
+        BackendStorageCounter.objects.all().delete()
+        out = StringIO()
+        call_command('reconcile_storage_counters', stdout=out)
+        self.assertIn('Corrected 2 storage counters.', out.getvalue())
+        self.assertEqual(self.hub_counts(), (1, 1, 0, 100, 0))
+        self.assertEqual(self.backend_counts(), (1, 1, 0, 100, 0))
+
+    def test_hub_detail_shows_counters(self):
+        self.set_state(self.document, DocumentVersion.UploadState.READY)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('project_hubs:detail', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(response.context['storage_counter'].ready_bytes, 100)
+        self.assertContains(response, '100\xa0Bytes')
@@ -0,0 +1,155 @@
+import io
+import random
+import shutil
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from access_control.models import DocumentAccess
+from accounts.models import User
+from documents import export
+from documents.export import ExportEntry, archive_size, iter_export, iter_zip, plan_export
+from documents.models import Document, DocumentVersion
+from documents.tasks import upload_document_version_task
+from project_hubs.models import ProjectHub, ProjectMembership
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+class ZipStreamTests(TestCase):
+    def entry(self, name, data):
+        return ExportEntry(name=name, size=len(data), modified=datetime(2026, 10, 19, 12, 30), read=lambda: [data[:3], data[3:]])
+
+    def test_archive_matches_precomputed_size_and_reads_back(self):
+        entries = [self.entry('a.txt', b'alpha'), self.entry('dir/naïve.bin', random.Random(1).randbytes(70_000))]
+        archive = b''.join(iter_zip(entries))
+
+        self.assertEqual(len(archive), archive_size(entries))
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertEqual(zip_file.namelist(), ['a.txt', 'dir/naïve.bin'])
+            self.assertEqual(zip_file.read('a.txt'), b'alpha')
+            self.assertEqual(zip_file.getinfo('a.txt').date_time, (2026, 10, 19, 12, 30, 0))
+
+    def test_empty_archive_is_valid(self):
+        archive = b''.join(iter_zip([]))
+        self.assertEqual(len(archive), archive_size([]))
+        self.assertEqual(zipfile.ZipFile(io.BytesIO(archive)).namelist(), [])
+
+    def test_size_mismatch_aborts_stream(self):
+        entry = ExportEntry(name='short.txt', size=10, modified=datetime(2026, 1, 1), read=lambda: [b'abc'])
+        with self.assertRaisesMessage(OSError, 'expected 10 bytes, read 3'):
+            b''.join(iter_zip([entry]))
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    DOCUMENT_CHUNK_MIN_SIZE=1024,
+    DOCUMENT_CHUNK_AVG_SIZE=4096,
+    DOCUMENT_CHUNK_MAX_SIZE=16384,
+)
+class DocumentExportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.owner, role=ProjectMembership.Role.OWNER)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.viewer, role=ProjectMembership.Role.VIEWER)
+        self.root = MEDIA_ROOT / 'export-tests'
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = StorageBackend.objects.create(
+            name='Local', kind=StorageBackend.Kind.LOCAL, config_encrypted={'root_dir': str(self.root)}, created_by=self.owner
+        )
+        self.chunked_backend = StorageBackend.objects.create(
+            name='Chunked',
+            kind=StorageBackend.Kind.LOCAL,
+            config_encrypted={'root_dir': str(self.root / 'chunked'), 'chunked': True},
+            created_by=self.owner,
+        )
+        self.report = self.add_document('Report', b'plain text', 'text/plain')
+        self.data = random.Random(2).randbytes(50_000)
+        self.scan = self.add_document('scans/Scan', self.data, 'application/pdf', backend=self.chunked_backend)
+        self.pending = self.add_document('Pending', b'not yet', 'text/plain', upload=False)
+        self.duplicate = self.add_document('Report', b'second', 'text/plain')
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentAccess.objects.create(document=self.report, subject_user=self.viewer)
+        self.client.force_login(self.owner)
+
+    def add_document(self, title, data, mime_type, backend=None, upload=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(
+                owner=self.owner, project_hub=self.hub, title=title, mime_type=mime_type, size_bytes=len(data), checksum_sha256=''
+            )
+        version = DocumentVersion.objects.create(
+            document=document,
+            version_number=1,
+            storage_backend=backend or self.backend,
+            storage_key=f'hub/{document.pk}/file',
+            size_bytes=len(data),
+            uploaded_by=self.owner,
+        )
+        document.current_version = version
+        document.save(update_fields=['current_version', 'updated_at'])
+        if upload:
+            source = MEDIA_ROOT / f'export-source-{document.pk}'
+            source.parent.mkdir(parents=True, exist_ok=True)
+            source.write_bytes(data)
+            upload_document_version_task.run(version.id, str(source))
+        return document
+
+    def download(self, user=None, **params):
+        if user:
+            self.client.force_login(user)
+        response = self.client.get(reverse('documents:export', kwargs={'slug': 'hub'}), params)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(archive))
+        return zipfile.ZipFile(io.BytesIO(archive))
+
+    def test_exports_ready_documents_of_the_hub(self):
+        with self.download() as archive:
+            self.assertEqual(archive.namelist(), ['Report.txt', 'Report (2).txt', 'scans/Scan.pdf'])
+            self.assertEqual(archive.read('Report.txt'), b'plain text')
+            self.assertEqual(archive.read('Report (2).txt'), b'second')
+            self.assertEqual(archive.read('scans/Scan.pdf'), self.data)
+
+    def test_export_is_limited_to_accessible_and_selected_documents(self):
+        with self.download(user=self.viewer) as archive:
+            self.assertEqual(archive.namelist(), ['Report.txt'])
+        with self.download(user=self.owner, id=[str(self.scan.pk), str(self.pending.pk)]) as archive:
+            self.assertEqual(archive.namelist(), ['scans/Scan.pdf'])
+        response = self.client.get(reverse('documents:export', kwargs={'slug': 'hub'}), {'id': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_archive(self):
+        target = self.root / 'hub.zip'
+        out = io.StringIO()
+        call_command('export_documents', str(target), hub='hub', user='viewer@example.com', stdout=out)
+        self.assertIn('Exported 1 documents', out.getvalue())
+        with zipfile.ZipFile(target) as archive:
+            self.assertEqual(archive.read('Report.txt'), b'plain text')
+
+    def test_entries_are_read_lazily_with_one_provider_per_backend(self):
+        plan = plan_export(Document.objects.filter(project_hub=self.hub))
+        self.assertEqual((plan.count, plan.size), (3, len(b'plain text') + len(self.data) + len(b'second')))
+        with mock.patch('documents.export.get_provider', wraps=export.get_provider) as get_provider:
+            entries = export.export_entries(plan)
+            self.assertEqual(get_provider.call_count, 0)
+            archive = b''.join(iter_zip(entries))
+        self.assertEqual(get_provider.call_count, 2)
+        self.assertEqual(len(archive), plan.length)
+
+    def test_documents_changed_after_planning_abort_the_stream(self):
+        plan = plan_export(Document.objects.filter(project_hub=self.hub))
+        self.add_document('Later', b'not planned', 'text/plain')
+        self.assertEqual(zipfile.ZipFile(io.BytesIO(b''.join(iter_export(plan)))).namelist()[-1], 'scans/Scan.pdf')
+
+        Document.objects.filter(pk=self.duplicate.pk).update(title='A much longer title than before')
+        with self.assertRaisesMessage(OSError, 'The documents changed during the export'):
+            b''.join(iter_export(plan))
@@ -0,0 +1,95 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from access_control.models import DocumentAccess
+from accounts.models import User
+from documents.models import Document, DocumentTag
+from project_hubs.models import ProjectHub, ProjectMembership
+
+HTMX = {'HX-Request': 'true'}
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+            ProjectMembership.objects.create(project_hub=self.hub, user=self.viewer, role=ProjectMembership.Role.VIEWER)
+            self.document = self._document('Quarterly report')
+        self.list_url = reverse('documents:list', kwargs={'slug': self.hub.slug})
+        self.recent_url = reverse('project_hubs:recent_documents', kwargs={'slug': self.hub.slug})
+
+    def _document(self, title):
+        return Document.objects.create(
+            owner=self.owner,
+            project_hub=self.hub,
+            title=title,
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+
+    def test_repeat_render_skips_database_and_templates(self):
+        self.client.force_login(self.owner)
+        first = self.client.get(self.list_url, headers=HTMX)
+        with self.assertNumQueries(2):
+            # session, user; the table comes from the fragment cache
+            cached = self.client.get(self.list_url, headers=HTMX)
+        self.assertEqual(cached.content, first.content)
+        self.assertContains(cached, 'Quarterly report')
+
+        # Query parameters are part of the key.
+        filtered = self.client.get(self.list_url, {'q': 'missing'}, headers=HTMX)
+        self.assertNotContains(filtered, 'Quarterly report')
+
+    def test_full_page_is_not_cached(self):
+        self.client.force_login(self.owner)
+        self.client.get(self.list_url)
+        with self.assertNumQueries(3):
+            # session, user, documents; only the tag facets are served from the cache
+            self.client.get(self.list_url)
+
+    def test_document_and_tag_changes_invalidate_the_hub(self):
+        self.client.force_login(self.owner)
+        self.client.get(self.list_url, headers=HTMX)
+        self.client.get(self.recent_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._document('Budget draft')
+        self.assertContains(self.client.get(self.list_url, headers=HTMX), 'Budget draft')
+        self.assertContains(self.client.get(self.recent_url), 'Budget draft')
+
+        self.client.get(self.list_url, {'tags': 'finance'}, headers=HTMX)
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentTag.objects.create(document=self.document, tag='finance')
+        self.assertContains(self.client.get(self.list_url, {'tags': 'finance'}, headers=HTMX), 'Quarterly report')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.document.delete()
+        self.assertNotContains(self.client.get(self.list_url, headers=HTMX), 'Quarterly report')
+
+    def test_bulk_operations_invalidate_the_hub(self):
+        self.client.force_login(self.owner)
+        self.client.get(self.list_url, headers=HTMX)
+        bulk_url = reverse('documents_api:documents_bulk', kwargs={'slug': self.hub.slug})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                bulk_url,
+                {'operations': [{'op': 'update', 'id': str(self.document.pk), 'data': {'title': 'Annual report'}}]},
+                content_type='application/json',
+            )
+        response = self.client.get(self.list_url, headers=HTMX)
+        self.assertContains(response, 'Annual report')
+        self.assertNotContains(response, 'Quarterly report')
+
+    def test_access_changes_invalidate_the_grantee(self):
+        self.client.force_login(self.viewer)
+        self.assertNotContains(self.client.get(self.list_url, headers=HTMX), 'Quarterly report')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentAccess.objects.create(
+                document=self.document, subject_user=self.viewer, role=DocumentAccess.Role.VIEWER
+            )
+        self.assertContains(self.client.get(self.list_url, headers=HTMX), 'Quarterly report')
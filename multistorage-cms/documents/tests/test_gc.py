@@ -0,0 +1,171 @@
+import io
+import random
+import shutil
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from documents import gc
+from documents.gc import collect_garbage
+from documents.models import Document, DocumentVersion, StorageChunk, StorageTombstone, VersionChunk
+from documents.tasks import upload_document_version_task
+from project_hubs.models import ProjectHub, ProjectMembership
+from storage_backends.models import StorageBackend
+from storage_backends.providers import LocalStorageProvider
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGE_GC_BATCHES_PER_SECOND=0,
+    DOCUMENT_CHUNK_MIN_SIZE=1024,
+    DOCUMENT_CHUNK_AVG_SIZE=4096,
+    DOCUMENT_CHUNK_MAX_SIZE=16384,
+)
+class StorageGarbageCollectionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.user, role=ProjectMembership.Role.OWNER)
+        self.root = MEDIA_ROOT / 'gc-tests'
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = StorageBackend.objects.create(
+            name='Local',
+            kind=StorageBackend.Kind.LOCAL,
+            config_encrypted={'root_dir': str(self.root)},
+            created_by=self.user,
+        )
+        self.chunked_backend = StorageBackend.objects.create(
+            name='Chunked',
+            kind=StorageBackend.Kind.LOCAL,
+            config_encrypted={'root_dir': str(self.root / 'chunked'), 'chunked': True},
+            created_by=self.user,
+        )
+
+    def upload(self, data, backend):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(
+                owner=self.user, project_hub=self.hub, title='Doc', mime_type='text/plain', size_bytes=len(data), checksum_sha256=''
+            )
+        version = DocumentVersion.objects.create(
+            document=document,
+            version_number=1,
+            storage_backend=backend,
+            storage_key=f'hub/{document.pk}/file.bin',
+            size_bytes=len(data),
+            uploaded_by=self.user,
+        )
+        document.current_version = version
+        document.save(update_fields=['current_version', 'updated_at'])
+        source = MEDIA_ROOT / f'gc-source-{document.pk}.bin'
+        source.parent.mkdir(parents=True, exist_ok=True)
+        source.write_bytes(data)
+        upload_document_version_task.run(version.id, str(source))
+        document.refresh_from_db()
+        return document
+
+    def test_delete_view_leaves_objects_to_the_collector(self):
+        document = self.upload(b'hello', self.backend)
+        stored = MEDIA_ROOT / document.current_version.storage_key
+        self.client.force_login(self.user)
+        self.client.post(reverse('documents:delete', kwargs={'slug': self.hub.slug, 'pk': document.pk}))
+
+        self.assertFalse(Document.objects.filter(pk=document.pk).exists())
+        self.assertTrue(stored.exists())
+        self.assertEqual(StorageTombstone.objects.count(), 1)
+        self.assertEqual(collect_garbage(), 1)
+        self.assertFalse(stored.exists())
+        self.assertFalse(StorageTombstone.objects.exists())
+
+    def test_failed_deletes_are_retried_with_backoff(self):
+        self.upload(b'hello', self.backend).delete()
+        now = timezone.now()
+        provider = mock.Mock()
+        provider.delete.side_effect = RuntimeError('throttled')
+        with mock.patch('documents.gc.get_provider', return_value=provider):
+            self.assertEqual(collect_garbage(now), 0)
+            tombstone = StorageTombstone.objects.get()
+            self.assertEqual((tombstone.attempts, tombstone.last_error), (1, 'throttled'))
+            self.assertEqual(tombstone.next_attempt_at, now + timedelta(seconds=60))
+            collect_garbage(now + timedelta(seconds=30))
+            self.assertEqual(provider.delete.call_count, 1)
+
+        self.assertEqual(collect_garbage(now + timedelta(seconds=61)), 1)
+
+    def test_unreferenced_chunks_are_retired(self):
+        data = random.Random(3).randbytes(60_000)
+        first = self.upload(data, self.chunked_backend)
+        second = self.upload(data[:30_000] + b'changed' + data[30_000:], self.chunked_backend)
+        shared = set(second.current_version.chunk_refs.values_list('chunk_id', flat=True))
+        only_first = set(first.current_version.chunk_refs.values_list('chunk_id', flat=True)) - shared
+        self.assertTrue(only_first)
+
+        first.delete()
+        # Released chunks wait for the grace period, like new ones: an upload may be about to reuse them.
+        collect_garbage()
+        self.assertEqual(StorageChunk.objects.filter(pk__in=only_first).count(), len(only_first))
+
+        later = timezone.now() + timedelta(days=2)
+        collect_garbage(later)
+        self.assertFalse(StorageChunk.objects.filter(pk__in=only_first).exists())
+        self.assertEqual(StorageChunk.objects.filter(pk__in=shared).count(), len(shared))
+        self.assertFalse(StorageChunk.objects.filter(orphan_check_at__isnull=False).exists())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('documents:open', kwargs={'slug': self.hub.slug, 'pk': second.pk}))
+        self.assertEqual(b''.join(response.streaming_content), data[:30_000] + b'changed' + data[30_000:])
+
+    def test_chunk_referenced_during_collection_is_skipped(self):
+        document = self.upload(random.Random(4).randbytes(40_000), self.chunked_backend)
+        version = document.current_version
+        chunk_ids = list(version.chunk_refs.values_list('chunk_id', flat=True))
+        self.assertGreater(len(chunk_ids), 2)
+        document.delete()
+        StorageTombstone.objects.all().delete()
+        reused = chunk_ids[0]
+        other = self.upload(b'unrelated', self.backend).current_version
+
+        real_delete = gc._delete_chunk
+
+        def delete_racing_a_manifest(chunk_id):
+            if chunk_id == reused:
+                # A concurrent upload saves a manifest that points at this chunk.
+                VersionChunk.objects.create(version=other, position=0, offset=0, chunk_id=reused)
+            return real_delete(chunk_id)
+
+        with mock.patch('documents.gc._delete_chunk', side_effect=delete_racing_a_manifest):
+            retired = gc.retire_orphan_chunks(timezone.now() + timedelta(days=2))
+
+        self.assertEqual(retired, len(chunk_ids) - 1)
+        self.assertEqual(list(StorageChunk.objects.values_list('pk', 'orphan_check_at')), [(reused, None)])
+        self.assertEqual(StorageTombstone.objects.count(), len(chunk_ids) - 1)
+
+    def test_released_chunk_reused_by_an_upload_outlives_its_check(self):
+        data = random.Random(5).randbytes(40_000)
+        self.upload(data, self.chunked_backend).delete()
+        # Released almost a grace period ago: the check is due in a minute.
+        due = timezone.now() + timedelta(minutes=1)
+        StorageChunk.objects.update(orphan_check_at=due)
+        real_upload = LocalStorageProvider.upload
+
+        def upload_then_collect(provider, path, key, *args, **kwargs):
+            # The collector runs after the reused chunks were resolved, before the manifest is saved.
+            gc.retire_orphan_chunks(due + timedelta(minutes=1))
+            return real_upload(provider, path, key, *args, **kwargs)
+
+        with mock.patch.object(LocalStorageProvider, 'upload', upload_then_collect):
+            document = self.upload(data + random.Random(6).randbytes(20_000), self.chunked_backend)
+
+        version = document.current_version
+        self.assertEqual(version.upload_state, DocumentVersion.UploadState.READY)
+        manifest = set(version.chunk_refs.values_list('chunk_id', flat=True))
+        self.assertEqual(StorageChunk.objects.filter(pk__in=manifest).count(), len(manifest))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('documents:open', kwargs={'slug': self.hub.slug, 'pk': document.pk}))
+        self.assertEqual(b''.join(response.streaming_content), data + random.Random(6).randbytes(20_000))
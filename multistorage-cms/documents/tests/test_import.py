@@ -0,0 +1,135 @@
+import hashlib
+import io
+import json
+import shutil
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from documents.counters import reconcile_storage_counters
+from documents.models import Document, DocumentSearchEntry, DocumentVersion, ImportedFile
+from documents.tasks import upload_document_version_task
+from project_hubs.models import ProjectHub, ProjectMembership
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImportDocumentsCommandTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.owner, role=ProjectMembership.Role.OWNER)
+        self.root = MEDIA_ROOT / 'import-tests'
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.source = self.root / 'source'
+        StorageBackend.objects.create(
+            name='Local',
+            kind=StorageBackend.Kind.LOCAL,
+            config_encrypted={'root_dir': str(self.root / 'stored')},
+            created_by=self.owner,
+        )
+
+    def write(self, relative, content):
+        path = self.source / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def run_import(self, source, **options):
+        out = io.StringIO()
+        call_command(
+            'import_documents', str(source), hub='hub', owner='owner@example.com', backend='Local', stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_imports_directory_tree_and_uploads_originals(self):
+        files = {'a.txt': b'alpha', 'nested/b.pdf': b'%PDF bravo', 'nested/deeper/c.txt': b'charlie'}
+        paths = [self.write(name, content) for name, content in files.items()]
+
+        with mock.patch(
+            'documents.tasks.upload_document_version_task.delay', side_effect=upload_document_version_task.run
+        ) as delay:
+            output = self.run_import(self.source, workers=1, batch_size=2)
+
+        self.assertEqual(delay.call_count, 3)
+        self.assertTrue(all(call.kwargs == {'keep_source': True} for call in delay.call_args_list))
+        self.assertTrue(all(path.exists() for path in paths))
+        self.assertIn('files/s', output)
+        self.assertIn('MB/s', output)
+        documents = {document.title: document for document in Document.objects.select_related('current_version')}
+        self.assertEqual(set(documents), set(files))
+        pdf = documents['nested/b.pdf']
+        self.assertEqual(pdf.mime_type, 'application/pdf')
+        self.assertEqual(pdf.checksum_sha256, hashlib.sha256(b'%PDF bravo').hexdigest())
+        self.assertEqual(pdf.current_version.upload_state, DocumentVersion.UploadState.READY)
+        self.assertEqual(DocumentSearchEntry.objects.count(), 3)
+        self.assertEqual(reconcile_storage_counters(), 0)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('documents:detail', kwargs={'slug': 'hub', 'pk': pdf.pk}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_manifest_import_resumes_from_checkpoint(self):
+        self.write('one.txt', b'one')
+        self.write('two.txt', b'two')
+        manifest = self.source / 'manifest.jsonl'
+        rows = [
+            {'path': 'one.txt', 'title': 'First', 'description': 'from the manifest'},
+            {'path': 'two.txt'},
+            {'path': 'three.txt', 'mime_type': 'text/markdown'},
+        ]
+        manifest.write_text('\n'.join(json.dumps(row) for row in rows) + '\n')
+        checkpoint = self.root / 'import.checkpoint'
+
+        with mock.patch('documents.tasks.upload_document_version_task.delay'):
+            with self.assertRaises(CommandError):
+                self.run_import(manifest, workers=2, batch_size=2, checkpoint=str(checkpoint))
+            self.assertEqual(Document.objects.count(), 2)
+
+            self.write('three.txt', b'three')
+            output = self.run_import(manifest, workers=2, batch_size=2, checkpoint=str(checkpoint))
+
+        self.assertIn('skipped 2', output)
+        self.assertEqual(
+            sorted(Document.objects.values_list('title', 'description', 'mime_type')),
+            [('First', 'from the manifest', 'text/plain'), ('three.txt', '', 'text/markdown'), ('two.txt', '', 'text/plain')],
+        )
+        self.assertEqual(len(checkpoint.read_text().splitlines()), 3)
+
+    def test_interrupted_import_is_resumed_without_duplicates(self):
+        self.write('a.txt', b'alpha')
+        self.write('b.txt', b'bravo')
+        checkpoint = self.root / 'import.checkpoint'
+
+        # The batch commits, then the process dies before its uploads are queued.
+        with mock.patch('documents.importer._dispatch', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(self.source, workers=1, checkpoint=str(checkpoint))
+        self.assertEqual(ImportedFile.objects.filter(queued_at__isnull=True).count(), 2)
+        self.assertFalse(checkpoint.exists())
+
+        self.write('c.txt', b'charlie')
+        with mock.patch('documents.tasks.upload_document_version_task.delay') as delay:
+            output = self.run_import(self.source, workers=1, checkpoint=str(checkpoint))
+            self.assertIn('Queued 2 uploads left unqueued', output)
+            self.assertIn('Imported 1 files, skipped 2', output)
+            self.assertEqual(delay.call_count, 3)
+
+            # Without a checkpoint the source paths and checksums in the database still match.
+            output = self.run_import(self.source, workers=1)
+            self.assertIn('Imported 0 files, skipped 3', output)
+            self.assertEqual(delay.call_count, 3)
+        self.assertEqual(Document.objects.count(), 3)
+        self.assertFalse(ImportedFile.objects.filter(queued_at__isnull=True).exists())
+
+    def test_csv_manifest_requires_path_column(self):
+        manifest = self.write('manifest.csv', b'title\nNo path\n')
+        with self.assertRaisesMessage(CommandError, 'needs a "path"'):
+            self.run_import(manifest, workers=1)
+        self.assertFalse(Document.objects.exists())
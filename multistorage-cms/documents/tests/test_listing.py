@@ -0,0 +1,78 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from documents.api import DocumentSerializer
+from documents.listing import finalize_rows, list_values
+from documents.models import Document, DocumentVersion
+from documents.renderers import FastJSONRenderer
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+
+class DocumentListingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+            backend = StorageBackend.objects.create(
+                name='Local',
+                kind=StorageBackend.Kind.LOCAL,
+                created_by=self.user,
+                project_hub=self.hub,
+            )
+            self.pending = self._document('Pending')
+            self.ready = self._document('Ready')
+            version = DocumentVersion.objects.create(
+                document=self.ready,
+                version_number=1,
+                storage_backend=backend,
+                storage_key='hub/ready.txt',
+                upload_state=DocumentVersion.UploadState.READY,
+                uploaded_by=self.user,
+            )
+            self.ready.current_version = version
+            self.ready.save(update_fields=['current_version'])
+        self.client.force_login(self.user)
+
+    def _document(self, title):
+        return Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title=title,
+            description='Ünïcode "quoted"',
+            mime_type='text/plain',
+            size_bytes=12,
+            checksum_sha256='abc',
+        )
+
+    def serializer_payload(self):
+        documents = Document.objects.select_related('current_version').order_by('-created_at', '-id')
+        return json.loads(JSONRenderer().render(DocumentSerializer(documents, many=True).data))
+
+    def test_fast_payload_matches_serializer(self):
+        rows = finalize_rows(list(list_values(Document.objects.order_by('-created_at', '-id'))))
+        self.assertEqual(json.loads(FastJSONRenderer().render(rows)), self.serializer_payload())
+        with override_settings(ORJSON_AVAILABLE=False):
+            self.assertEqual(json.loads(FastJSONRenderer().render(rows)), self.serializer_payload())
+
+    def test_api_list_uses_fast_path(self):
+        response = self.client.get(reverse('documents_api:documents', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(response.json(), self.serializer_payload())
+
+        response = self.client.get(
+            reverse('documents_api:documents', kwargs={'slug': self.hub.slug}), {'q': 'ready'}
+        )
+        self.assertEqual([row['title'] for row in response.json()], ['Ready'])
+        self.assertNotIn('search_rank', response.json()[0])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_document_list', '--hub', self.hub.slug, '--repeat', '1', stdout=out)
+        self.assertIn('rows: 2', out.getvalue())
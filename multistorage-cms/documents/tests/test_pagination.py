@@ -0,0 +1,77 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from documents.models import Document
+from documents.pagination import document_paginator
+from project_hubs.models import ProjectHub
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+            self.documents = [
+                Document.objects.create(
+                    owner=self.user,
+                    project_hub=self.hub,
+                    title=f'Doc {index}',
+                    mime_type='text/plain',
+                    size_bytes=1,
+                    checksum_sha256='',
+                )
+                for index in range(5)
+            ]
+        # Force ties on created_at so the primary key has to break them.
+        Document.objects.filter(pk__in=[doc.pk for doc in self.documents[1:4]]).update(created_at=timezone.now())
+        self.expected = list(
+            Document.objects.accessible_to(self.user, self.hub).order_by('-created_at', '-pk').values_list('pk', flat=True)
+        )
+        self.client.force_login(self.user)
+
+    def test_paginator_walks_every_row_once(self):
+        queryset = Document.objects.accessible_to(self.user, self.hub)
+        seen, cursor = [], None
+        while True:
+            page = document_paginator.paginate(queryset, cursor=cursor, page_size=2)
+            seen.extend(doc.pk for doc in page.items)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+
+    def test_api_follows_next_cursor(self):
+        url = reverse('documents_api:documents', kwargs={'slug': self.hub.slug})
+        seen, params = [], {'page_size': 2}
+        while True:
+            response = self.client.get(url, params)
+            seen.extend(row['id'] for row in response.json())
+            if 'X-Next-Cursor' not in response:
+                break
+            self.assertIn('rel="next"', response['Link'])
+            params['cursor'] = response['X-Next-Cursor']
+        self.assertEqual(seen, [str(pk) for pk in self.expected])
+
+    def test_api_rejects_malformed_cursor(self):
+        url = reverse('documents_api:documents', kwargs={'slug': self.hub.slug})
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_htmx_load_more_returns_rows_only(self):
+        url = reverse('documents:list', kwargs={'slug': self.hub.slug})
+        first = self.client.get(url, {'page_size': 3}, HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(first, 'documents/partials/document_table.html')
+        self.assertEqual([doc.pk for doc in first.context['documents']], self.expected[:3])
+
+        second = self.client.get(
+            url,
+            {'page_size': 3, 'cursor': first.context['next_cursor']},
+            HTTP_HX_REQUEST='true',
+        )
+        self.assertTemplateUsed(second, 'documents/partials/document_rows.html')
+        self.assertTemplateNotUsed(second, 'documents/partials/document_table.html')
+        self.assertEqual([doc.pk for doc in second.context['documents']], self.expected[3:])
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertNotContains(second, 'document-load-more')
@@ -0,0 +1,198 @@
+import hashlib
+import importlib.util
+import io
+import shutil
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from documents.gc import collect_garbage
+from documents.models import Document, DocumentPreview, DocumentVersion, StorageTombstone
+from documents.previews import generate_preview, render_image, text_snippet
+from documents.retention import prune_hub
+from documents.tasks import generate_preview_task, upload_document_version_task
+from project_hubs.models import ProjectHub, ProjectMembership
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PREVIEW_MAX_SOURCE_BYTES=1000, STORAGE_GC_BATCHES_PER_SECOND=0)
+class DocumentPreviewTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.outsider = User.objects.create_user(email='outsider@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.owner, role=ProjectMembership.Role.OWNER)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.outsider, role=ProjectMembership.Role.VIEWER)
+        self.root = MEDIA_ROOT / 'preview-tests'
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = StorageBackend.objects.create(
+            name='Local', kind=StorageBackend.Kind.LOCAL, config_encrypted={'root_dir': str(self.root)}, created_by=self.owner
+        )
+        self.client.force_login(self.owner)
+
+    def add_document(self, data, mime_type, title='Doc'):
+        with self.captureOnCommitCallbacks(execute=True):
+            document = Document.objects.create(
+                owner=self.owner,
+                project_hub=self.hub,
+                title=title,
+                mime_type=mime_type,
+                size_bytes=len(data),
+                checksum_sha256=hashlib.sha256(data).hexdigest(),
+            )
+        self.add_version(document, 1, data)
+        return document
+
+    def add_version(self, document, number, data):
+        checksum = hashlib.sha256(data).hexdigest()
+        version = DocumentVersion.objects.create(
+            document=document,
+            version_number=number,
+            storage_backend=self.backend,
+            storage_key=f'hub/{document.pk}/v{number}/file',
+            size_bytes=len(data),
+            checksum_sha256=checksum,
+            uploaded_by=self.owner,
+        )
+        document.current_version = version
+        document.checksum_sha256 = checksum
+        document.save(update_fields=['current_version', 'checksum_sha256', 'updated_at'])
+        source = MEDIA_ROOT / f'preview-source-{document.pk}-{number}'
+        source.parent.mkdir(parents=True, exist_ok=True)
+        source.write_bytes(data)
+        with mock.patch('documents.tasks.generate_preview_task.delay', side_effect=generate_preview_task.run) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                upload_document_version_task.run(version.id, str(source))
+        self.preview_calls = delay.call_count
+
+    def preview_url(self, document, digest):
+        return reverse('documents:preview', kwargs={'slug': 'hub', 'pk': document.pk, 'digest': digest})
+
+    def test_text_snippet_is_generated_once_the_upload_is_ready(self):
+        document = self.add_document(b'Quarterly\n\n  numbers   look good.', 'text/plain')
+
+        self.assertEqual(self.preview_calls, 1)
+        preview = DocumentPreview.objects.get()
+        self.assertEqual(preview.state, DocumentPreview.State.READY)
+        self.assertEqual(preview.text_snippet, 'Quarterly numbers look good.')
+        response = self.client.get(reverse('documents:detail', kwargs={'slug': 'hub', 'pk': document.pk}))
+        self.assertContains(response, 'Quarterly numbers look good.')
+
+    def test_thumbnails_are_stored_by_content_hash_and_cached_by_clients(self):
+        with mock.patch('documents.previews.render_image', return_value=b'png-bytes') as render:
+            document = self.add_document(b'image-bytes', 'image/png')
+            copy = self.add_document(b'image-bytes', 'image/png', title='Copy')
+
+        # The second document has the same checksum and reuses the first rendition.
+        render.assert_called_once_with(b'image-bytes')
+        digest = hashlib.sha256(b'png-bytes').hexdigest()
+        preview = DocumentPreview.objects.get()
+        self.assertEqual(preview.thumbnail_sha256, digest)
+        self.assertTrue(preview.thumbnail_key.endswith(f'previews/{digest[:2]}/{digest}.png'))
+
+        response = self.client.get(self.preview_url(copy, digest))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'png-bytes')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        revalidated = self.client.get(self.preview_url(copy, digest), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get(self.preview_url(copy, '0' * 64)).status_code, 404)
+
+        listing = self.client.get(reverse('documents:list', kwargs={'slug': 'hub'}))
+        self.assertContains(listing, self.preview_url(document, digest), count=1)
+        self.assertContains(listing, self.preview_url(copy, digest), count=1)
+
+    def test_preview_is_collected_with_the_last_version_of_its_content(self):
+        with mock.patch('documents.previews.render_image', return_value=b'png-bytes'):
+            document = self.add_document(b'image-bytes', 'image/png')
+            copy = self.add_document(b'image-bytes', 'image/png', title='Copy')
+        key = DocumentPreview.objects.get().thumbnail_key
+        thumbnail = MEDIA_ROOT / key
+        self.assertTrue(thumbnail.exists())
+
+        document.delete()
+        self.assertTrue(DocumentPreview.objects.exists())
+        self.assertFalse(StorageTombstone.objects.filter(storage_key=key).exists())
+
+        copy.delete()
+        self.assertFalse(DocumentPreview.objects.exists())
+        self.assertTrue(StorageTombstone.objects.filter(storage_key=key).exists())
+        collect_garbage()
+        self.assertFalse(thumbnail.exists())
+
+    def test_preview_is_collected_with_a_pruned_version(self):
+        with mock.patch('documents.previews.render_image', side_effect=[b'old-png', b'new-png']):
+            document = self.add_document(b'old-image', 'image/png')
+            self.add_version(document, 2, b'new-image')
+        old = DocumentPreview.objects.get(checksum_sha256=hashlib.sha256(b'old-image').hexdigest())
+
+        self.hub.keep_last_versions = 1
+        self.hub.save(update_fields=['keep_last_versions'])
+        self.assertEqual(prune_hub(self.hub), 1)
+
+        self.assertFalse(DocumentPreview.objects.filter(pk=old.pk).exists())
+        self.assertTrue(StorageTombstone.objects.filter(storage_key=old.thumbnail_key).exists())
+        self.assertEqual(DocumentPreview.objects.get().checksum_sha256, hashlib.sha256(b'new-image').hexdigest())
+
+    def test_preview_requires_document_access(self):
+        with mock.patch('documents.previews.render_image', return_value=b'png-bytes'):
+            document = self.add_document(b'image-bytes', 'image/png')
+        self.client.force_login(self.outsider)
+        response = self.client.get(self.preview_url(document, hashlib.sha256(b'png-bytes').hexdigest()))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unsupported_large_and_broken_sources(self):
+        self.add_document(b'PK\x03\x04', 'application/zip')
+        self.add_document(b'x' * 2000, 'image/png')
+        with mock.patch('documents.previews.render_pdf', side_effect=ValueError('not a PDF')), self.assertLogs(
+            'documents.previews', 'WARNING'
+        ):
+            self.add_document(b'%PDF-broken', 'application/pdf')
+
+        self.assertEqual(
+            sorted(DocumentPreview.objects.values_list('state', 'error_message')),
+            [
+                ('FAILED', 'not a PDF'),
+                ('UNSUPPORTED', ''),
+                ('UNSUPPORTED', 'Larger than PREVIEW_MAX_SOURCE_BYTES (2000 bytes).'),
+            ],
+        )
+
+    def test_backfill_command_queues_one_document_per_content(self):
+        with mock.patch('documents.tasks.generate_preview_task.delay'):
+            first = self.add_document(b'same', 'text/plain')
+            self.add_document(b'same', 'text/plain', title='Again')
+        DocumentPreview.objects.all().delete()
+
+        out = io.StringIO()
+        with mock.patch('documents.tasks.generate_preview_task.delay') as delay:
+            call_command('generate_previews', hub='hub', stdout=out)
+        self.assertIn('Queued 1 previews', out.getvalue())
+        self.assertEqual(delay.call_count, 1)
+        generate_preview(delay.call_args.args[0])
+        self.assertEqual(DocumentPreview.objects.get().text_snippet, 'same')
+        self.assertIsNone(generate_preview(first.pk))
+
+    def test_text_snippet_is_truncated(self):
+        snippet = text_snippet(b'word ' * 500)
+        self.assertTrue(snippet.endswith('word…'))
+        self.assertLessEqual(len(snippet), 501)
+
+    @unittest.skipUnless(importlib.util.find_spec('PIL'), 'Pillow is not installed')
+    def test_render_image_fits_thumbnail_box(self):
+        from PIL import Image
+
+        source = io.BytesIO()
+        Image.new('RGB', (1200, 600), 'red').save(source, 'JPEG')
+        with override_settings(PREVIEW_THUMBNAIL_SIZE=100):
+            thumbnail = Image.open(io.BytesIO(render_image(source.getvalue())))
+        self.assertEqual((thumbnail.format, thumbnail.size), ('PNG', (100, 50)))
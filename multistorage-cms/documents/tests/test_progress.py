@@ -0,0 +1,75 @@
+import sys
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from documents.progress import UploadProgressReporter, get_upload_progress, progress_cache_key, summarize_progress
+
+
+@override_settings(UPLOAD_PROGRESS_STALL_SECONDS=60)
+class UploadProgressTests(SimpleTestCase):
+    def tearDown(self):
+        cache.delete(progress_cache_key(1))
+
+    def test_reporter_throttles_cache_writes(self):
+        reporter = UploadProgressReporter(1, total_bytes=1000, min_interval=60)
+        with mock.patch('documents.progress.cache.set') as cache_set:
+            reporter.start()
+            for _ in range(9):
+                reporter(100)
+            self.assertEqual(cache_set.call_count, 1)
+            reporter(100)
+        self.assertEqual(cache_set.call_count, 2)
+        self.assertEqual(cache_set.call_args.args[1]['bytes_done'], 1000)
+
+    def test_reporter_counts_callbacks_from_concurrent_threads(self):
+        reporter = UploadProgressReporter(1, total_bytes=8 * 5000, min_interval=60)
+        start = threading.Barrier(8)
+        # Switch threads as often as possible so unsynchronized updates would interleave.
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+
+        def send():
+            start.wait()
+            for _ in range(5000):
+                reporter(1)
+
+        # Cache connections are per thread, so replace the module's cache rather than its set().
+        with mock.patch('documents.progress.cache') as patched_cache:
+            cache_set = patched_cache.set
+            reporter.start()
+            threads = [threading.Thread(target=send) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(reporter.bytes_done, 8 * 5000)
+        # The start snapshot and exactly one final write once every byte is counted.
+        self.assertEqual(cache_set.call_count, 2)
+        self.assertEqual(cache_set.call_args.args[1]['bytes_done'], 8 * 5000)
+
+    def test_summary_computes_throughput_and_eta(self):
+        summary = summarize_progress(
+            {'bytes_done': 250, 'total_bytes': 1000, 'started_at': 100.0, 'updated_at': 110.0},
+            now=111.0,
+        )
+        self.assertEqual(summary['percent'], 25.0)
+        self.assertEqual(summary['throughput_bps'], 25)
+        self.assertEqual(summary['eta_seconds'], 30)
+        self.assertFalse(summary['stalled'])
+
+    def test_summary_flags_stalled_transfer(self):
+        summary = summarize_progress(
+            {'bytes_done': 10, 'total_bytes': 1000, 'started_at': 100.0, 'updated_at': 110.0},
+            now=500.0,
+        )
+        self.assertTrue(summary['stalled'])
+
+    def test_clear_removes_progress(self):
+        reporter = UploadProgressReporter(1, total_bytes=10, min_interval=0)
+        reporter(5)
+        self.assertEqual(get_upload_progress(1)['bytes_done'], 5)
+        reporter.clear()
+        self.assertIsNone(get_upload_progress(1))
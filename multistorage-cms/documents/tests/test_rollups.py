@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from documents.models import Document, DocumentVersion, UploadRollup
+from documents.rollups import percentile, run_upload_rollups
+from project_hubs.models import ProjectHub
+from storage_backends.models import StorageBackend
+
+BASE = datetime(2026, 3, 2, 10, 0, tzinfo=dt_timezone.utc)
+
+
+class UploadRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+        self.backend = StorageBackend.objects.create(name='Local', kind=StorageBackend.Kind.LOCAL, created_by=self.user)
+        self.document = Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title='Report',
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+        self.versions = 0
+
+    def finish(self, finished_at, seconds=1, size=10, state=DocumentVersion.UploadState.READY):
+        self.versions += 1
+        version = DocumentVersion.objects.create(
+            document=self.document,
+            version_number=self.versions,
+            storage_backend=self.backend,
+            storage_key=f'hub/{self.versions}',
+            size_bytes=size,
+            upload_state=state,
+            uploaded_by=self.user,
+        )
+        DocumentVersion.objects.filter(pk=version.pk).update(
+            created_at=finished_at - timedelta(seconds=seconds), finished_at=finished_at
+        )
+
+    def rollup(self, granularity, start, **scope):
+        return UploadRollup.objects.get(granularity=granularity, bucket_start=start, **(scope or {'project_hub': self.hub}))
+
+    def test_percentile_nearest_rank(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([5], 0.95), 5)
+        self.assertEqual(percentile(list(range(1, 101)), 0.5), 50)
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+
+    def test_hour_and_day_buckets_per_hub_and_backend(self):
+        for seconds in (1, 2, 3, 4):
+            self.finish(BASE + timedelta(minutes=5), seconds=seconds)
+        self.finish(BASE + timedelta(minutes=10), state=DocumentVersion.UploadState.FAILED)
+        self.finish(BASE + timedelta(hours=2), seconds=10, size=50)
+
+        self.assertEqual(run_upload_rollups(now=BASE + timedelta(hours=3)), 3)
+
+        hour = self.rollup(UploadRollup.Granularity.HOUR, BASE)
+        self.assertEqual((hour.uploads, hour.bytes_uploaded, hour.failures), (4, 40, 1))
+        self.assertEqual((hour.p50_duration_ms, hour.p95_duration_ms), (2000, 4000))
+        self.assertEqual(hour.failure_rate, 0.2)
+
+        day = self.rollup(UploadRollup.Granularity.DAY, BASE.replace(hour=0))
+        self.assertEqual((day.uploads, day.bytes_uploaded, day.failures), (5, 90, 1))
+        self.assertEqual(day.p95_duration_ms, 10000)
+        backend_day = self.rollup(UploadRollup.Granularity.DAY, BASE.replace(hour=0), storage_backend=self.backend)
+        self.assertEqual(backend_day.uploads, 5)
+
+    def test_watermark_limits_work_to_new_and_late_rows(self):
+        self.finish(BASE)
+        run_upload_rollups(now=BASE + timedelta(hours=1))
+        UploadRollup.objects.filter(granularity=UploadRollup.Granularity.HOUR).update(uploads=99)
+
+        # Nothing new: untouched buckets are not rebuilt.
+        self.assertEqual(run_upload_rollups(now=BASE + timedelta(hours=2)), 0)
+        self.assertEqual(self.rollup(UploadRollup.Granularity.HOUR, BASE).uploads, 99)
+
+        # A row committed late, but inside the settle window, still lands in its bucket.
+        self.finish(BASE + timedelta(hours=2) - timedelta(seconds=60))
+        with self.settings(UPLOAD_ROLLUP_SETTLE_SECONDS=300):
+            self.assertEqual(run_upload_rollups(now=BASE + timedelta(hours=2, minutes=3)), 2)
+        self.assertEqual(self.rollup(UploadRollup.Granularity.HOUR, BASE + timedelta(hours=1)).uploads, 1)
+        self.assertEqual(self.rollup(UploadRollup.Granularity.DAY, BASE.replace(hour=0)).uploads, 2)
+
+    def test_dashboard_partial_renders_rollups(self):
+        self.finish(BASE)
+        run_upload_rollups(now=BASE + timedelta(hours=1))
+        UploadRollup.objects.update(bucket_start=datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('project_hubs:dashboard', kwargs={'slug': self.hub.slug}))
+        self.assertEqual([widget['title'] for widget in response.context['widgets']], ['Uploads per day', 'Uploads per hour'])
+        self.assertEqual(len(response.context['widgets'][1]['rows']), 1)
+        self.assertContains(response, '1000 / 1000 ms')
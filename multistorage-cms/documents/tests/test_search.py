@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from documents.models import Document, DocumentSearchEntry, DocumentTag
+from documents.search import search_documents, search_paginator
+from project_hubs.models import ProjectHub
+
+
+class DocumentSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='owner@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.user)
+            self.invoice = self._document('Quarterly invoice', 'Payment terms for Q3')
+            self.contract = self._document('Supplier contract', 'Mentions the invoice schedule once')
+            self.notes = self._document('Meeting notes', 'Nothing relevant')
+            DocumentTag.objects.create(document=self.notes, tag='finance')
+        self.client.force_login(self.user)
+
+    def _document(self, title, description):
+        return Document.objects.create(
+            owner=self.user,
+            project_hub=self.hub,
+            title=title,
+            description=description,
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+
+    def search(self, query):
+        queryset = search_documents(Document.objects.accessible_to(self.user, self.hub), query)
+        return [doc.pk for doc in search_paginator.paginate(queryset).items]
+
+    def test_entries_follow_document_and_tag_changes(self):
+        entry = DocumentSearchEntry.objects.get(document=self.notes)
+        self.assertEqual(entry.tags, 'finance')
+
+        self.notes.title = 'Board minutes'
+        self.notes.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentTag.objects.filter(document=self.notes).delete()
+            DocumentTag.objects.create(document=self.notes, tag='governance')
+        entry.refresh_from_db()
+        self.assertEqual((entry.title, entry.tags), ('Board minutes', 'governance'))
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('invoice'), [self.invoice.pk, self.contract.pk])
+
+    def test_prefix_and_tag_matches(self):
+        self.assertEqual(self.search('quart'), [self.invoice.pk])
+        self.assertEqual(self.search('finance'), [self.notes.pk])
+        self.assertEqual(self.search('invoice payment'), [self.invoice.pk])
+
+    def test_list_view_and_api_use_search_index(self):
+        response = self.client.get(reverse('documents:list', kwargs={'slug': self.hub.slug}), {'q': 'invoice'})
+        self.assertEqual([doc.pk for doc in response.context['documents']], [self.invoice.pk, self.contract.pk])
+
+        response = self.client.get(
+            reverse('documents_api:documents', kwargs={'slug': self.hub.slug}),
+            {'q': 'invoice', 'page_size': 1},
+        )
+        self.assertEqual([row['id'] for row in response.json()], [str(self.invoice.pk)])
+        response = self.client.get(
+            reverse('documents_api:documents', kwargs={'slug': self.hub.slug}),
+            {'q': 'invoice', 'page_size': 1, 'cursor': response['X-Next-Cursor']},
+        )
+        self.assertEqual([row['id'] for row in response.json()], [str(self.contract.pk)])
+        self.assertNotIn('X-Next-Cursor', response)
@@ -0,0 +1,182 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from access_control import indexing
+from access_control.models import DocumentAccess, UserDocumentAccess
+from accounts.models import User
+from documents.fragments import invalidate_hubs
+from documents.models import Document, DocumentTag, HubTagCount, UserTagCount
+from documents.tags import access_tag_totals, filter_by_tags, tag_facets
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class TagTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+            self.other_hub = ProjectHub.objects.create(name='Other', slug='other', owner=self.owner)
+            ProjectMembership.objects.create(
+                project_hub=self.hub, user=self.viewer, role=ProjectMembership.Role.VIEWER
+            )
+            self.report = self._document('Report', ['finance', 'q3'])
+            self.budget = self._document('Budget', ['finance'])
+            self.notes = self._document('Notes', ['q3'])
+            DocumentAccess.objects.create(
+                document=self.budget, subject_user=self.viewer, role=DocumentAccess.Role.VIEWER
+            )
+
+    def _document(self, title, tags, hub=None):
+        document = Document.objects.create(
+            owner=self.owner,
+            project_hub=hub or self.hub,
+            title=title,
+            mime_type='text/plain',
+            size_bytes=1,
+            checksum_sha256='',
+        )
+        for tag in tags:
+            DocumentTag.objects.create(document=document, tag=tag)
+        return document
+
+    def counts(self, hub=None):
+        return dict(
+            HubTagCount.objects.filter(project_hub=hub or self.hub, document_count__gt=0)
+            .values_list('tag', 'document_count')
+        )
+
+    def test_counters_follow_tag_changes(self):
+        self.assertEqual(self.counts(), {'finance': 2, 'q3': 2})
+
+        tag = DocumentTag.objects.get(document=self.notes, tag='q3')
+        tag.tag = 'archive'
+        tag.save()
+        DocumentTag.objects.filter(document=self.budget).delete()
+        self.assertEqual(self.counts(), {'finance': 1, 'q3': 1, 'archive': 1})
+
+    def test_counters_follow_document_moves_and_deletes(self):
+        self.report.project_hub = self.other_hub
+        self.report.save()
+        self.assertEqual(self.counts(), {'finance': 1, 'q3': 1})
+        self.assertEqual(self.counts(self.other_hub), {'finance': 1, 'q3': 1})
+
+        self.notes.delete()
+        self.assertEqual(self.counts(), {'finance': 1})
+
+    def test_filter_all_and_any(self):
+        documents = Document.objects.filter(project_hub=self.hub)
+        self.assertEqual(set(filter_by_tags(documents, ['finance', 'q3'])), {self.report})
+        self.assertEqual(
+            set(filter_by_tags(documents, ['finance', 'q3'], mode='any')),
+            {self.report, self.budget, self.notes},
+        )
+        self.assertEqual(set(filter_by_tags(documents, [])), {self.report, self.budget, self.notes})
+
+    def test_facets_cover_only_accessible_documents(self):
+        self.assertEqual(
+            tag_facets(self.owner, self.hub),
+            [{'tag': 'finance', 'count': 2}, {'tag': 'q3', 'count': 2}],
+        )
+        self.assertEqual(tag_facets(self.viewer, self.hub), [{'tag': 'finance', 'count': 1}])
+
+    def test_facets_are_aggregated_once_per_change(self):
+        self.assertEqual(tag_facets(self.viewer, self.hub), [{'tag': 'finance', 'count': 1}])
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_facets(self.viewer, self.hub), [{'tag': 'finance', 'count': 1}])
+            tag_facets(self.viewer, self.hub)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentTag.objects.create(document=self.budget, tag='q3')
+        self.assertEqual(
+            tag_facets(self.viewer, self.hub),
+            [{'tag': 'finance', 'count': 1}, {'tag': 'q3', 'count': 1}],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentAccess.objects.create(document=self.notes, subject_user=self.viewer, role=DocumentAccess.Role.VIEWER)
+        self.assertEqual(
+            tag_facets(self.viewer, self.hub),
+            [{'tag': 'q3', 'count': 2}, {'tag': 'finance', 'count': 1}],
+        )
+
+    def user_counts(self, user):
+        return dict(
+            UserTagCount.objects.filter(user=user, project_hub=self.hub, document_count__gt=0)
+            .values_list('tag', 'document_count')
+        )
+
+    def assertUserCountsMatchIndex(self):
+        recorded = {
+            (user_id, hub_id, tag): count
+            for user_id, hub_id, tag, count in UserTagCount.objects.filter(document_count__gt=0).values_list(
+                'user_id', 'project_hub_id', 'tag', 'document_count'
+            )
+        }
+        self.assertEqual(recorded, dict(access_tag_totals(UserDocumentAccess.objects.all())))
+
+    def test_user_counters_follow_tags_access_moves_and_deletes(self):
+        self.assertEqual(self.user_counts(self.viewer), {'finance': 1})
+        self.assertEqual(self.user_counts(self.owner), {'finance': 2, 'q3': 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = DocumentTag.objects.get(document=self.budget, tag='finance')
+            tag.tag = 'archive'
+            tag.save()
+            DocumentTag.objects.create(document=self.budget, tag='q3')
+            DocumentAccess.objects.create(document=self.report, subject_user=self.viewer, role=DocumentAccess.Role.VIEWER)
+        self.assertEqual(self.user_counts(self.viewer), {'archive': 1, 'finance': 1, 'q3': 2})
+        self.assertUserCountsMatchIndex()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.project_hub = self.other_hub
+            self.report.save()
+            self.budget.delete()
+            DocumentTag.objects.filter(document=self.notes).delete()
+        self.assertEqual(self.user_counts(self.viewer), {})
+        self.assertEqual(self.user_counts(self.owner), {})
+        self.assertUserCountsMatchIndex()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectMembership.objects.filter(user=self.viewer).delete()
+        indexing.rebuild()
+        self.assertUserCountsMatchIndex()
+
+    def test_restricted_facets_read_precomputed_counts(self):
+        self.assertEqual(tag_facets(self.viewer, self.hub), [{'tag': 'finance', 'count': 1}])
+        invalidate_hubs([self.hub.pk])
+        # One indexed read of the user's counters, no aggregate over the documents.
+        with self.assertNumQueries(1):
+            self.assertEqual(tag_facets(self.viewer, self.hub), [{'tag': 'finance', 'count': 1}])
+
+    def test_list_view_and_api_filter_by_tags(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(
+            reverse('documents:list', kwargs={'slug': self.hub.slug}), {'tags': 'q3', 'tag_mode': 'any'}
+        )
+        self.assertEqual({doc.pk for doc in response.context['documents']}, {self.report.pk, self.notes.pk})
+        self.assertEqual(response.context['tag_facets'][0], {'tag': 'finance', 'count': 2})
+
+        response = self.client.get(
+            reverse('documents_api:documents', kwargs={'slug': self.hub.slug}), {'tags': 'finance,q3'}
+        )
+        self.assertEqual([row['id'] for row in response.json()], [str(self.report.pk)])
+
+        response = self.client.get(reverse('documents_api:tag_facets', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(response.json(), [{'tag': 'finance', 'count': 2}, {'tag': 'q3', 'count': 2}])
+
+    def test_drifted_counter_does_not_block_deletes(self):
+        HubTagCount.objects.filter(project_hub=self.hub, tag='q3').update(document_count=0)
+        self.notes.delete()
+        self.assertFalse(Document.objects.filter(pk=self.notes.pk).exists())
+        self.assertEqual(HubTagCount.objects.get(project_hub=self.hub, tag='q3').document_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        HubTagCount.objects.filter(project_hub=self.hub, tag='finance').update(document_count=9)
+        HubTagCount.objects.filter(project_hub=self.hub, tag='q3').delete()
+        UserTagCount.objects.filter(user=self.viewer).update(document_count=5)
+        call_command('reconcile_tag_counts', '--hub', self.hub.slug, stdout=StringIO())
+        self.assertEqual(self.counts(), {'finance': 2, 'q3': 2})
+        self.assertUserCountsMatchIndex()
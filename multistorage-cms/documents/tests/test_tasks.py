@@ -4,7 +4,7 @@ from unittest import mock
 from django.test import TestCase, override_settings
 
 from accounts.models import User
-from documents.models import Document, DocumentVersion
+from documents.models import Document, DocumentVersion, StorageTombstone
 from documents.tasks import upload_document_version_task
 from project_hubs.models import ProjectHub, ProjectMembership
 from storage_backends.models import StorageBackend
@@ -85,3 +85,41 @@ class UploadDocumentVersionTaskTests(TestCase):
         self.assertIn('upload exploded', version.error_message)
         self.assertTrue(source.exists())
         source.unlink(missing_ok=True)
+
+    def test_document_deleted_during_upload_leaves_the_stored_object_to_gc(self):
+        version = self._create_version()
+        source = Path('/tmp/multistorage-cms-task-source-deleted.txt')
+        source.write_text('content', encoding='utf-8')
+
+        def upload_while_deleting(*args, **kwargs):
+            self.document.delete()
+            return 'storage/local/hub/doc/file.txt'
+
+        fake_provider = mock.Mock()
+        fake_provider.upload.side_effect = upload_while_deleting
+        with mock.patch('documents.tasks.get_provider', return_value=fake_provider):
+            upload_document_version_task.run(version.id, str(source))
+
+        self.assertFalse(DocumentVersion.objects.filter(pk=version.pk).exists())
+        self.assertEqual(
+            set(StorageTombstone.objects.values_list('storage_key', flat=True)),
+            {'hub/doc/file.txt', 'storage/local/hub/doc/file.txt'},
+        )
+        self.assertFalse(source.exists())
+
+    def test_failed_upload_of_a_deleted_document_is_not_retried(self):
+        version = self._create_version()
+        source = Path('/tmp/multistorage-cms-task-source-deleted-fail.txt')
+        source.write_text('content', encoding='utf-8')
+
+        def fail_after_delete(*args, **kwargs):
+            self.document.delete()
+            raise RuntimeError('upload exploded')
+
+        fake_provider = mock.Mock()
+        fake_provider.upload.side_effect = fail_after_delete
+        with mock.patch('documents.tasks.get_provider', return_value=fake_provider):
+            upload_document_version_task.run(version.id, str(source))
+
+        self.assertFalse(DocumentVersion.objects.filter(pk=version.pk).exists())
+        source.unlink(missing_ok=True)
@@ -0,0 +1,136 @@
+import shutil
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from documents.models import BackendStorageCounter, Document, DocumentVersion, HubStorageCounter, StorageTombstone
+from documents.gc import collect_garbage
+from documents.retention import expired_versions, prune_hub, prune_versions
+from project_hubs.models import ProjectHub, ProjectMembership
+from storage_backends.models import StorageBackend
+
+MEDIA_ROOT = Path('/tmp/multistorage-cms-test-media')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DocumentVersionTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='x')
+        self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.owner, role=ProjectMembership.Role.OWNER)
+        ProjectMembership.objects.create(project_hub=self.hub, user=self.viewer, role=ProjectMembership.Role.VIEWER)
+        self.root = MEDIA_ROOT / 'version-tests'
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = StorageBackend.objects.create(
+            name='Local',
+            kind=StorageBackend.Kind.LOCAL,
+            config_encrypted={'root_dir': str(self.root)},
+            created_by=self.owner,
+        )
+        self.document = Document.objects.create(
+            owner=self.owner,
+            project_hub=self.hub,
+            title='Report',
+            mime_type='text/plain',
+            size_bytes=0,
+            checksum_sha256='',
+        )
+
+    def add_version(self, number, age_days=0, state=DocumentVersion.UploadState.READY):
+        path = self.root / f'v{number}.txt'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'v{number}')
+        version = DocumentVersion.objects.create(
+            document=self.document,
+            version_number=number,
+            storage_backend=self.backend,
+            storage_key=str(path),
+            size_bytes=2,
+            upload_state=state,
+            uploaded_by=self.owner,
+        )
+        DocumentVersion.objects.filter(pk=version.pk).update(created_at=timezone.now() - timedelta(days=age_days))
+        self.document.current_version = version
+        self.document.save(update_fields=['current_version', 'updated_at'])
+        return version
+
+    def test_new_version_upload_gets_next_number(self):
+        self.add_version(1)
+        self.client.force_login(self.owner)
+        url = reverse('documents:new_version', kwargs={'slug': self.hub.slug, 'pk': self.document.pk})
+        with mock.patch('documents.tasks.upload_document_version_task.delay') as delay:
+            response = self.client.post(
+                url,
+                {'file': SimpleUploadedFile('report.txt', b'second', content_type='text/plain'), 'storage_backend': self.backend.pk},
+            )
+        detail_url = reverse('documents:detail', kwargs={'slug': self.hub.slug, 'pk': self.document.pk})
+        self.assertRedirects(response, detail_url, fetch_redirect_response=False)
+        self.document.refresh_from_db()
+        version = self.document.current_version
+        self.assertEqual(version.version_number, 2)
+        self.assertEqual(version.storage_key, f'hub/{self.document.pk}/v2/report.txt')
+        self.assertEqual(self.document.size_bytes, 6)
+        delay.assert_called_once()
+        self.assertEqual(delay.call_args.args[0], version.id)
+        Path(delay.call_args.args[1]).unlink()
+
+        self.client.force_login(self.viewer)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_retention_rules_combine(self):
+        old = [self.add_version(number, age_days=30) for number in (1, 2, 3)]
+        recent = self.add_version(4, age_days=1)
+        pending = self.add_version(5, age_days=30, state=DocumentVersion.UploadState.PENDING)
+        self.add_version(6)
+
+        self.hub.keep_last_versions = 2
+        self.assertEqual(set(expired_versions(self.hub)), {*old, recent})
+        self.hub.keep_versions_days = 7
+        self.assertEqual(set(expired_versions(self.hub)), set(old))
+        self.hub.keep_last_versions = None
+        self.assertNotIn(pending, set(expired_versions(self.hub)))
+
+    @override_settings(VERSION_PRUNE_BATCH_SIZE=2, STORAGE_GC_BATCHES_PER_SECOND=0)
+    def test_prune_deletes_rows_and_objects_in_batches(self):
+        old = [self.add_version(number, age_days=30) for number in range(1, 6)]
+        current = self.add_version(6, age_days=30)
+        self.hub.keep_last_versions = 1
+        self.hub.save()
+
+        self.assertEqual(prune_versions(), 5)
+        self.assertEqual(list(self.document.versions.all()), [current])
+        self.assertTrue(all(Path(version.storage_key).exists() for version in old))
+        self.assertEqual(collect_garbage(), 5)
+        self.assertFalse(any(Path(version.storage_key).exists() for version in old))
+        self.assertTrue(Path(current.storage_key).exists())
+        counter = HubStorageCounter.objects.get(project_hub=self.hub)
+        self.assertEqual((counter.version_count, counter.ready_bytes), (1, 2))
+
+    def test_prune_queries_do_not_grow_with_batch_size(self):
+        self.hub.keep_last_versions = 1
+        self.hub.save()
+        self.add_version(1, age_days=30)
+
+        def prune(count, start):
+            # The previous current version and all but the last new one expire.
+            for number in range(start, start + count):
+                self.add_version(number, age_days=30)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(prune_hub(self.hub, batch_size=100), count)
+            return len(queries)
+
+        self.assertEqual(prune(2, 2), prune(8, 4))
+        self.assertEqual(StorageTombstone.objects.count(), 10)
+        hub_counter = HubStorageCounter.objects.get(project_hub=self.hub)
+        backend_counter = BackendStorageCounter.objects.get(storage_backend=self.backend)
+        self.assertEqual((hub_counter.version_count, hub_counter.ready_bytes), (1, 2))
+        self.assertEqual((backend_counter.version_count, backend_counter.ready_bytes), (1, 2))
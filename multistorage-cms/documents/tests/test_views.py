@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from documents.models import Document
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class HubFixtureMixin:
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.editor = User.objects.create_user(email='editor@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hub = ProjectHub.objects.create(name='Hub', slug='hub', owner=self.owner)
+            ProjectMembership.objects.create(
+                project_hub=self.hub,
+                user=self.editor,
+                role=ProjectMembership.Role.EDITOR,
+            )
+            self.document = Document.objects.create(
+                owner=self.editor,
+                project_hub=self.hub,
+                title='Doc',
+                mime_type='text/plain',
+                size_bytes=3,
+                checksum_sha256='abc',
+            )
+        self.client.force_login(self.editor)
+        # Warm the cross-request hub authorization cache.
+        self.client.get(reverse('project_hubs:detail', kwargs={'slug': self.hub.slug}))
+
+
+class DocumentViewQueryCountTests(HubFixtureMixin, TestCase):
+    """Hub and roles come from the authorization cache and are resolved once per request."""
+
+    def test_list_view_query_count(self):
+        # session, user, documents, tag facets
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('documents:list', kwargs={'slug': self.hub.slug}))
+        self.assertContains(response, 'Doc')
+
+    def test_detail_view_query_count(self):
+        # session, user, document
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('documents:detail', kwargs={'slug': self.hub.slug, 'pk': self.document.pk})
+            )
+        self.assertTrue(response.context['can_manage_document'])
+        self.assertTrue(response.context['can_delete_document'])
+
+    def test_status_partial_query_count(self):
+        # session, user, document
+        with self.assertNumQueries(3):
+            self.client.get(reverse('documents:status', kwargs={'slug': self.hub.slug, 'pk': self.document.pk}))
+
+    def test_cache_miss_query_count(self):
+        cache.clear()
+        # session, user, owned hubs, memberships, groups, documents, tag facets
+        with self.assertNumQueries(7):
+            self.client.get(reverse('documents:list', kwargs={'slug': self.hub.slug}))
+
+    def test_membership_changes_invalidate_cached_roles(self):
+        url = reverse('documents:upload', kwargs={'slug': self.hub.slug})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        ProjectMembership.objects.filter(user=self.editor).update(role=ProjectMembership.Role.VIEWER)
+        # Queryset updates bypass signals, so the cached role is still served...
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # ...until a saved membership bumps the user's cache version.
+        membership = ProjectMembership.objects.get(user=self.editor)
+        membership.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        membership.delete()
+        response = self.client.get(reverse('documents:list', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_member_gets_404(self):
+        outsider = User.objects.create_user(email='outsider@example.com', password='x')
+        self.client.force_login(outsider)
+        response = self.client.get(reverse('documents:list', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(response.status_code, 404)
+
+
+class DocumentAPIQueryCountTests(HubFixtureMixin, TestCase):
+    def test_list_view_query_count(self):
+        # session, user, validators, documents
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('documents_api:documents', kwargs={'slug': self.hub.slug}))
+        self.assertEqual(len(response.json()), 1)
+
+    def test_detail_query_count(self):
+        # session, user, document
+        with self.assertNumQueries(3):
+            self.client.get(
+                reverse('documents_api:document_detail', kwargs={'slug': self.hub.slug, 'pk': self.document.pk})
+            )
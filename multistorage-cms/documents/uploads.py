@@ -0,0 +1,77 @@
+"""Staging uploaded files and creating the versions that `upload_document_version_task` stores."""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Document, DocumentVersion
+
+
+def stage_upload(uploaded_file) -> tuple[str, Path]:
+    """Copy ``uploaded_file`` to the worker's staging area. Returns ``(sha256, path)``."""
+    tmp_root = Path(settings.MEDIA_ROOT) / 'tmp_uploads'
+    tmp_root.mkdir(parents=True, exist_ok=True)
+    temp_file = tmp_root / f'{uuid.uuid4()}_{uploaded_file.name}'
+    sha256 = hashlib.sha256()
+    with temp_file.open('wb') as out:
+        for chunk in uploaded_file.chunks():
+            sha256.update(chunk)
+            out.write(chunk)
+    return sha256.hexdigest(), temp_file
+
+
+def fail_dispatch(version: DocumentVersion) -> None:
+    version.upload_state = DocumentVersion.UploadState.FAILED
+    version.error_message = 'Background worker unavailable. Install/start Celery worker.'
+    version.finished_at = timezone.now()
+    version.save(update_fields=['upload_state', 'error_message', 'finished_at'])
+
+
+def dispatch_upload(version: DocumentVersion, temp_file: Path, keep_source: bool = False) -> bool:
+    """Queue the upload of ``temp_file``. Returns ``False`` (and fails the version) if no broker is reachable."""
+    try:
+        from .tasks import upload_document_version_task
+
+        upload_document_version_task.delay(version.id, str(temp_file), keep_source=keep_source)
+    except Exception:
+        fail_dispatch(version)
+        return False
+    return True
+
+
+def add_version(document: Document, uploaded_file, storage_backend, uploaded_by) -> DocumentVersion:
+    """Stage a new file for ``document`` and make it the current version.
+
+    The document row is locked while the next ``version_number`` is chosen, so concurrent
+    uploads get consecutive numbers instead of colliding.
+    """
+    checksum, temp_file = stage_upload(uploaded_file)
+    with transaction.atomic():
+        locked = Document.objects.select_for_update().select_related('project_hub').get(pk=document.pk)
+        number = (locked.versions.aggregate(top=Max('version_number'))['top'] or 0) + 1
+        hub_slug = locked.project_hub.slug if locked.project_hub else 'unassigned'
+        version = DocumentVersion.objects.create(
+            document=locked,
+            version_number=number,
+            storage_backend=storage_backend,
+            # Versioned path: providers overwrite existing keys.
+            storage_key=f'{hub_slug}/{locked.pk}/v{number}/{uploaded_file.name}',
+            size_bytes=uploaded_file.size,
+            checksum_sha256=checksum,
+            upload_state=DocumentVersion.UploadState.PENDING,
+            uploaded_by=uploaded_by,
+        )
+        locked.current_version = version
+        locked.mime_type = uploaded_file.content_type or 'application/octet-stream'
+        locked.size_bytes = uploaded_file.size
+        locked.checksum_sha256 = checksum
+        locked.save(update_fields=['current_version', 'mime_type', 'size_bytes', 'checksum_sha256', 'updated_at'])
+    dispatch_upload(version, temp_file)
+    return version
@@ -1,4 +1,3 @@
-import hashlib
 import os
 import uuid
 from pathlib import Path
@@ -7,25 +6,45 @@ from urllib.parse import urlparse
 from django.contrib import messages
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
-from django.http import FileResponse, Http404, JsonResponse
+from django.core.exceptions import BadRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from django.views import View
 from django.views.generic import DeleteView, DetailView, FormView, ListView, UpdateView
 
-from project_hubs.models import ProjectHub, ProjectMembership
+from audit.writer import record_event
+from project_hubs.authz import get_hub_authorization
+from storage_backends.providers import get_provider
 
-from .forms import DocumentEditForm, DocumentUploadForm
+from .chunking import stream_version
+from .conditional import not_modified, set_validators
+from .export import plan_export, stream_export
+from .forms import DocumentEditForm, DocumentUploadForm, DocumentVersionUploadForm
+from .fragments import CachedFragmentMixin
 from .models import Document, DocumentVersion
+from .pagination import InvalidCursor, clamp_page_size, document_paginator
+from .previews import preview_for, with_previews
+from .progress import get_upload_progress
+from .search import search_documents, search_paginator
+from .tags import filter_by_tags, parse_tags, tag_facets
+from .uploads import add_version, dispatch_upload, stage_upload
+
+
+def upload_progress_for(document):
+    version = document.current_version
+    if not version or version.upload_state != DocumentVersion.UploadState.UPLOADING:
+        return None
+    return get_upload_progress(version.id)
 
 
 class HubMembershipMixin(LoginRequiredMixin):
+    def get_authorization(self):
+        return get_hub_authorization(self.request, self.kwargs['slug'])
+
     def get_hub(self):
-        return get_object_or_404(
-            ProjectHub.objects.filter(Q(owner=self.request.user) | Q(memberships__user=self.request.user)).distinct(),
-            slug=self.kwargs['slug'],
-        )
+        return self.get_authorization().hub
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -33,69 +52,74 @@ class HubMembershipMixin(LoginRequiredMixin):
         return context
 
     def hub_roles_for_user(self):
-        hub = self.get_hub()
-        if hub.owner_id == self.request.user.id:
-            return {ProjectMembership.Role.OWNER}
-        return set(
-            ProjectMembership.objects.filter(project_hub=hub, user=self.request.user).values_list('role', flat=True)
-        )
+        return set(self.get_authorization().roles)
 
     def can_manage_documents(self):
-        return bool(
-            self.hub_roles_for_user()
-            & {
-                ProjectMembership.Role.OWNER,
-                ProjectMembership.Role.ADMIN,
-                ProjectMembership.Role.EDITOR,
-            }
-        )
+        return self.get_authorization().can_manage
 
     def can_delete_documents(self):
-        return bool(
-            self.hub_roles_for_user()
-            & {
-                ProjectMembership.Role.OWNER,
-                ProjectMembership.Role.ADMIN,
-            }
-        )
+        return self.get_authorization().can_delete
 
 
-class DocumentListView(HubMembershipMixin, ListView):
+class DocumentListView(CachedFragmentMixin, HubMembershipMixin, ListView):
     model = Document
     template_name = 'documents/list.html'
     context_object_name = 'documents'
+    fragment_name = 'document_table'
+
+    def fragment_cacheable(self):
+        # Only the HTMX table/rows fragments; the full page also carries messages and facets.
+        return self.request.headers.get('HX-Request') == 'true'
 
     def get_queryset(self):
         hub = self.get_hub()
-        queryset = (
-            Document.objects.filter(project_hub=hub)
-            .filter(
-                Q(owner=self.request.user)
-                | Q(access_rules__subject_user=self.request.user)
-                | Q(access_rules__subject_group__in=self.request.user.groups.all())
-            )
-            .select_related('owner', 'current_version', 'project_hub')
-            .distinct()
-            .order_by('-created_at')
+        queryset = with_previews(Document.objects.accessible_to(self.request.user, hub)).select_related(
+            'owner', 'current_version', 'project_hub'
         )
         query = self.request.GET.get('q', '').strip()
         visibility = self.request.GET.get('visibility', '').strip()
-        if query:
-            queryset = queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
         if visibility:
             queryset = queryset.filter(visibility=visibility)
+        queryset = filter_by_tags(
+            queryset,
+            parse_tags(self.request.GET.get('tags', '')),
+            self.request.GET.get('tag_mode', 'all'),
+        )
+        if query:
+            queryset = search_documents(queryset, query)
         return queryset
 
     def get_template_names(self):
         if self.request.headers.get('HX-Request') == 'true':
+            if self.request.GET.get('cursor'):
+                return ['documents/partials/document_rows.html']
             return ['documents/partials/document_table.html']
         return [self.template_name]
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        try:
+            paginator = search_paginator if self.request.GET.get('q', '').strip() else document_paginator
+            page = paginator.paginate(
+                self.object_list,
+                cursor=self.request.GET.get('cursor') or None,
+                page_size=clamp_page_size(self.request.GET.get('page_size')),
+            )
+        except InvalidCursor as exc:
+            raise BadRequest(str(exc)) from exc
+        context = super().get_context_data(object_list=page.items, **kwargs)
         context['q'] = self.request.GET.get('q', '').strip()
         context['visibility'] = self.request.GET.get('visibility', '').strip()
         context['visibility_choices'] = Document.Visibility.choices
+        context['tags'] = self.request.GET.get('tags', '').strip()
+        context['tag_mode'] = self.request.GET.get('tag_mode', 'all')
+        if self.request.headers.get('HX-Request') != 'true':
+            context['tag_facets'] = tag_facets(self.request.user, self.get_hub(), limit=20)
+        context['cursor'] = self.request.GET.get('cursor', '')
+        context['next_cursor'] = page.next_cursor
+        if page.next_cursor:
+            params = self.request.GET.copy()
+            params['cursor'] = page.next_cursor
+            context['next_page_query'] = params.urlencode()
         return context
 
 
@@ -107,14 +131,8 @@ class DocumentDetailView(HubMembershipMixin, DetailView):
     def get_queryset(self):
         hub = self.get_hub()
         return (
-            Document.objects.filter(project_hub=hub)
-            .filter(
-                Q(owner=self.request.user)
-                | Q(access_rules__subject_user=self.request.user)
-                | Q(access_rules__subject_group__in=self.request.user.groups.all())
-            )
+            with_previews(Document.objects.accessible_to(self.request.user, hub), snippet=True)
             .select_related('owner', 'current_version', 'project_hub')
-            .distinct()
         )
 
     def get_context_data(self, **kwargs):
@@ -127,6 +145,7 @@ class DocumentDetailView(HubMembershipMixin, DetailView):
             }
         )
         context['can_open_file'] = bool(current_version and current_version.upload_state == DocumentVersion.UploadState.READY)
+        context['upload_progress'] = upload_progress_for(self.object)
         context['can_manage_document'] = self.can_manage_documents() or self.object.owner_id == self.request.user.id
         context['can_delete_document'] = self.can_delete_documents() or self.object.owner_id == self.request.user.id
         return context
@@ -140,29 +159,22 @@ class DocumentStatusPartialView(HubMembershipMixin, DetailView):
     def get_queryset(self):
         hub = self.get_hub()
         return (
-            Document.objects.filter(project_hub=hub)
-            .filter(
-                Q(owner=self.request.user)
-                | Q(access_rules__subject_user=self.request.user)
-                | Q(access_rules__subject_group__in=self.request.user.groups.all())
-            )
+            Document.objects.accessible_to(self.request.user, hub)
             .select_related('owner', 'current_version', 'project_hub')
-            .distinct()
         )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['upload_progress'] = upload_progress_for(self.object)
+        return context
+
 
 class DocumentFileAccessMixin(HubMembershipMixin):
     def get_document(self):
         hub = self.get_hub()
         return get_object_or_404(
-            Document.objects.filter(project_hub=hub)
-            .filter(
-                Q(owner=self.request.user)
-                | Q(access_rules__subject_user=self.request.user)
-                | Q(access_rules__subject_group__in=self.request.user.groups.all())
-            )
-            .select_related('current_version__storage_backend')
-            .distinct(),
+            Document.objects.accessible_to(self.request.user, hub)
+            .select_related('current_version__storage_backend'),
             pk=self.kwargs['pk'],
         )
 
@@ -184,7 +196,9 @@ class DocumentFileAccessMixin(HubMembershipMixin):
             'document_id': str(document.pk),
             'version_id': version.id,
         }
-        if backend.kind == 'S3':
+        if version.is_chunked:
+            info['location_type'] = 'chunk_manifest'
+        elif backend.kind == 'S3':
             info['location_type'] = 's3_uri'
         elif backend.kind == 'GDRIVE':
             info['location_type'] = 'google_drive_file'
@@ -209,6 +223,16 @@ class DocumentOpenView(DocumentFileAccessMixin, View):
         version = document.current_version
         backend = version.storage_backend
         storage_key = version.storage_key
+        record_event(
+            'document.opened',
+            actor=request.user,
+            document=document,
+            project_hub=document.project_hub_id,
+            payload={'version_id': version.id, 'backend_kind': backend.kind},
+        )
+
+        if version.is_chunked:
+            return stream_version(version, document.mime_type)
 
         if backend.kind == backend.Kind.LOCAL:
             path = Path(storage_key)
@@ -256,6 +280,45 @@ class DocumentOpenView(DocumentFileAccessMixin, View):
         return JsonResponse({'ready': False, 'reason': 'unsupported_backend'}, status=400)
 
 
+class DocumentPreviewView(DocumentFileAccessMixin, View):
+    """The thumbnail of the current version. The URL names its content hash, so it never goes stale."""
+
+    def get(self, request, *args, **kwargs):
+        document = self.get_document()
+        preview = preview_for(document)
+        if preview is None or preview.thumbnail_sha256 != kwargs['digest']:
+            raise Http404('No such preview.')
+        etag = f'"{preview.thumbnail_sha256}"'
+        response = not_modified(request, etag)
+        if response is None:
+            data = get_provider(document.current_version.storage_backend).read(preview.thumbnail_key)
+            response = set_validators(HttpResponse(data, content_type='image/png'), etag)
+        patch_cache_control(response, private=True, max_age=settings.PREVIEW_CACHE_SECONDS, immutable=True)
+        return response
+
+
+class DocumentExportView(HubMembershipMixin, View):
+    """ZIP of the accessible documents of the hub, or of those selected with ``?id=``."""
+
+    def get(self, request, *args, **kwargs):
+        hub = self.get_hub()
+        documents = Document.objects.accessible_to(request.user, hub)
+        selected = request.GET.getlist('id')
+        if selected:
+            try:
+                documents = documents.filter(pk__in=[uuid.UUID(value) for value in selected])
+            except ValueError as exc:
+                raise BadRequest('Invalid document id.') from exc
+        plan = plan_export(documents)
+        record_event(
+            'document.exported',
+            actor=request.user,
+            project_hub=hub,
+            payload={'document_count': plan.count, 'size_bytes': plan.size},
+        )
+        return stream_export(plan, f'{hub.slug}.zip')
+
+
 class DocumentUploadView(HubMembershipMixin, FormView):
     form_class = DocumentUploadForm
     template_name = 'documents/upload.html'
@@ -275,10 +338,7 @@ class DocumentUploadView(HubMembershipMixin, FormView):
     def form_valid(self, form):
         uploaded_file = form.cleaned_data['file']
         storage_backend = form.cleaned_data['storage_backend']
-
-        sha256 = hashlib.sha256()
-        for chunk in uploaded_file.chunks():
-            sha256.update(chunk)
+        checksum, temp_file = stage_upload(uploaded_file)
 
         document = Document.objects.create(
             owner=self.request.user,
@@ -287,7 +347,7 @@ class DocumentUploadView(HubMembershipMixin, FormView):
             description=form.cleaned_data['description'],
             mime_type=uploaded_file.content_type or 'application/octet-stream',
             size_bytes=uploaded_file.size,
-            checksum_sha256=sha256.hexdigest(),
+            checksum_sha256=checksum,
             visibility=form.cleaned_data['visibility'],
         )
 
@@ -296,28 +356,22 @@ class DocumentUploadView(HubMembershipMixin, FormView):
             version_number=1,
             storage_backend=storage_backend,
             storage_key=f'{self.hub.slug}/{document.id}/{uploaded_file.name}',
+            size_bytes=uploaded_file.size,
+            checksum_sha256=checksum,
             upload_state=DocumentVersion.UploadState.PENDING,
             uploaded_by=self.request.user,
         )
 
         document.current_version = version
-        document.save(update_fields=['current_version'])
-
-        tmp_root = Path(settings.MEDIA_ROOT) / 'tmp_uploads'
-        tmp_root.mkdir(parents=True, exist_ok=True)
-        temp_file = tmp_root / f'{uuid.uuid4()}_{uploaded_file.name}'
-        with temp_file.open('wb') as out:
-            for chunk in uploaded_file.chunks():
-                out.write(chunk)
-
-        try:
-            from .tasks import upload_document_version_task
-
-            upload_document_version_task.delay(version.id, str(temp_file))
-        except Exception:
-            version.upload_state = DocumentVersion.UploadState.FAILED
-            version.error_message = 'Background worker unavailable. Install/start Celery worker.'
-            version.save(update_fields=['upload_state', 'error_message'])
+        document.save(update_fields=['current_version', 'updated_at'])
+        record_event(
+            'document.uploaded',
+            actor=self.request.user,
+            document=document,
+            project_hub=self.hub,
+            payload={'version_id': version.id, 'size_bytes': uploaded_file.size, 'storage_backend_id': storage_backend.id},
+        )
+        dispatch_upload(version, temp_file)
 
         messages.success(self.request, 'Document upload was initiated successfully.')
         return redirect('documents:detail', slug=self.hub.slug, pk=document.pk)
@@ -328,6 +382,49 @@ class DocumentUploadView(HubMembershipMixin, FormView):
         return context
 
 
+class DocumentVersionUploadView(HubMembershipMixin, FormView):
+    form_class = DocumentVersionUploadForm
+    template_name = 'documents/new_version.html'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.hub = self.get_hub()
+        self.document = get_object_or_404(
+            Document.objects.filter(project_hub=self.hub).select_related('current_version'),
+            pk=self.kwargs['pk'],
+        )
+        can_upload = self.document.owner_id == request.user.id or self.can_manage_documents()
+        if not can_upload:
+            raise Http404('You do not have permission to upload versions of this document.')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['project_hub'] = self.hub
+        return kwargs
+
+    def get_initial(self):
+        version = self.document.current_version
+        return {'storage_backend': version.storage_backend_id} if version else {}
+
+    def form_valid(self, form):
+        uploaded_file = form.cleaned_data['file']
+        version = add_version(self.document, uploaded_file, form.cleaned_data['storage_backend'], self.request.user)
+        record_event(
+            'document.version_uploaded',
+            actor=self.request.user,
+            document=self.document,
+            project_hub=self.hub,
+            payload={'version_id': version.id, 'version_number': version.version_number, 'size_bytes': uploaded_file.size},
+        )
+        messages.success(self.request, f'Version {version.version_number} upload was initiated successfully.')
+        return redirect('documents:detail', slug=self.hub.slug, pk=self.document.pk)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['document'] = self.document
+        return context
+
+
 class DocumentUpdateView(HubMembershipMixin, UpdateView):
     model = Document
     form_class = DocumentEditForm
@@ -345,6 +442,17 @@ class DocumentUpdateView(HubMembershipMixin, UpdateView):
             raise Http404('You do not have permission to edit this document.')
         return super().dispatch(request, *args, **kwargs)
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        record_event(
+            'document.updated',
+            actor=self.request.user,
+            document=self.object,
+            project_hub=self.object.project_hub_id,
+            payload={'fields': form.changed_data},
+        )
+        return response
+
     def get_success_url(self):
         messages.success(self.request, 'Document metadata updated.')
         return reverse('documents:detail', kwargs={'slug': self.kwargs['slug'], 'pk': self.object.pk})
@@ -366,6 +474,18 @@ class DocumentDeleteView(HubMembershipMixin, DeleteView):
             raise Http404('You do not have permission to delete this document.')
         return super().dispatch(request, *args, **kwargs)
 
+    def form_valid(self, form):
+        document_id, hub_id, title = self.object.pk, self.object.project_hub_id, self.object.title
+        response = super().form_valid(form)
+        record_event(
+            'document.deleted',
+            actor=self.request.user,
+            document=document_id,
+            project_hub=hub_id,
+            payload={'title': title},
+        )
+        return response
+
     def get_success_url(self):
         messages.success(self.request, 'Document deleted.')
         return reverse('documents:list', kwargs={'slug': self.kwargs['slug']})
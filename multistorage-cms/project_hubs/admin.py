@@ -1,11 +1,14 @@
 from django.contrib import admin
 
+from documents.admin import counter_documents, counter_stored, counter_versions
+
 from .models import ProjectDashboard, ProjectHub, ProjectMembership
 
 
 @admin.register(ProjectHub)
 class ProjectHubAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'slug', 'owner', 'created_at')
+    list_display = ('id', 'name', 'slug', 'owner', counter_documents, counter_versions, counter_stored, 'created_at')
+    list_select_related = ('owner', 'storage_counter')
     search_fields = ('name', 'slug', 'owner__email')
     list_filter = ('created_at',)
 
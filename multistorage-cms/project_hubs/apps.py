@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProjectHubsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'project_hubs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,135 @@
+"""Resolution of the current user's hub, hub roles and group ids.
+
+Each user's hub slug -> roles map and group ids are cached across requests under a
+versioned key; `project_hubs.signals` bumps the version whenever memberships, hubs or
+group assignments change. Within a request the resolved values are memoized on the
+request object as well.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import ProjectHub, ProjectMembership
+
+MANAGE_ROLES = frozenset({ProjectMembership.Role.OWNER, ProjectMembership.Role.ADMIN, ProjectMembership.Role.EDITOR})
+DELETE_ROLES = frozenset({ProjectMembership.Role.OWNER, ProjectMembership.Role.ADMIN})
+
+
+class HubAuthorization:
+    def __init__(self, user, hub: ProjectHub, roles: frozenset[str], group_ids: tuple[int, ...]):
+        self.user = user
+        self.hub = hub
+        self.roles = roles
+        self.group_ids = group_ids
+
+    @property
+    def can_manage(self) -> bool:
+        return bool(self.roles & MANAGE_ROLES)
+
+    @property
+    def can_delete(self) -> bool:
+        return bool(self.roles & DELETE_ROLES)
+
+
+def _version_key(user_id: int) -> str:
+    return f'authz:version:{user_id}'
+
+
+def _data_key(user_id: int, version: int) -> str:
+    return f'authz:user:{user_id}:{version}'
+
+
+def user_version(user_id: int) -> int:
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # A fresh, time-based version so data cached under an evicted version is never reused.
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
+def invalidate_user(user_id: int) -> None:
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def _hub_fields(hub: ProjectHub) -> dict:
+    return {field.attname: getattr(hub, field.attname) for field in hub._meta.concrete_fields}
+
+
+def _hub_from_fields(fields: dict) -> ProjectHub:
+    hub = ProjectHub(**fields)
+    hub._state.adding = False
+    hub._state.db = 'default'
+    return hub
+
+
+def build_user_authz(user) -> dict:
+    hubs: dict[str, dict] = {}
+    for hub in ProjectHub.objects.filter(owner=user):
+        hubs[hub.slug] = {'hub': _hub_fields(hub), 'roles': [ProjectMembership.Role.OWNER]}
+    for membership in ProjectMembership.objects.filter(user=user).select_related('project_hub'):
+        hub = membership.project_hub
+        if hub.owner_id == user.id:
+            continue
+        entry = hubs.setdefault(hub.slug, {'hub': _hub_fields(hub), 'roles': []})
+        entry['roles'].append(membership.role)
+    return {'hubs': hubs, 'group_ids': list(user.groups.values_list('id', flat=True))}
+
+
+def load_user_authz(user) -> dict:
+    key = _data_key(user.id, user_version(user.id))
+    data = cache.get(key)
+    if data is None:
+        data = build_user_authz(user)
+        cache.set(key, data, settings.HUB_AUTHZ_CACHE_TIMEOUT)
+    return data
+
+
+def _request_state(request) -> dict:
+    # DRF wraps the Django request; keep the memo on the underlying object so
+    # views, context processors and API views of one request share it.
+    request = getattr(request, '_request', request)
+    state = getattr(request, '_hub_authz', None)
+    if state is None:
+        state = request._hub_authz = {'data': load_user_authz(request.user), 'authorizations': {}}
+    return state
+
+
+def user_hubs(request) -> list[ProjectHub]:
+    """Every hub the user owns or belongs to, by name, from the cached authorization data."""
+    if not request.user.is_authenticated:
+        return []
+    hubs = [_hub_from_fields(entry['hub']) for entry in _request_state(request)['data']['hubs'].values()]
+    return sorted(hubs, key=lambda hub: hub.name)
+
+
+def get_hub_authorization(request, slug: str) -> HubAuthorization:
+    """Return the user's authorization for hub ``slug``.
+
+    Raises `Http404` when the hub does not exist or the user is neither owner nor member.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        raise Http404('Project hub not found.')
+    state = _request_state(request)
+    authorizations = state['authorizations']
+    if slug not in authorizations:
+        entry = state['data']['hubs'].get(slug)
+        if entry is None:
+            raise Http404('Project hub not found.')
+        authorizations[slug] = HubAuthorization(
+            user,
+            _hub_from_fields(entry['hub']),
+            frozenset(entry['roles']),
+            tuple(state['data']['group_ids']),
+        )
+    return authorizations[slug]
+
@@ -1,11 +1,11 @@
-from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
 
-from .models import ProjectHub
+from .authz import user_hubs as cached_user_hubs
 
 
 def user_hubs(request):
-    if not request.user.is_authenticated:
+    # HTMX partials (but not boosted full-page navigations) never render the nav.
+    if request.headers.get('HX-Request') == 'true' and request.headers.get('HX-Boosted') != 'true':
         return {'nav_hubs': []}
-
-    hubs = ProjectHub.objects.filter(Q(owner=request.user) | Q(memberships__user=request.user)).distinct().order_by('name')
-    return {'nav_hubs': hubs}
+    # Resolved only if a template reads `nav_hubs`; served from the authorization cache.
+    return {'nav_hubs': SimpleLazyObject(lambda: cached_user_hubs(request))}
@@ -0,0 +1,34 @@
+"""Hub dashboard widgets, rendered from the upload rollup rows (see `documents.rollups`)."""
+
+from __future__ import annotations
+
+from django.utils import timezone
+
+from documents.models import UploadRollup
+from documents.rollups import BUCKET_LENGTHS
+
+from .models import ProjectDashboard
+
+DEFAULT_LAYOUT = {
+    'widgets': [
+        {'type': 'uploads', 'title': 'Uploads per day', 'granularity': UploadRollup.Granularity.DAY, 'buckets': 14},
+        {'type': 'uploads', 'title': 'Uploads per hour', 'granularity': UploadRollup.Granularity.HOUR, 'buckets': 24},
+    ]
+}
+
+
+def dashboard_widgets(hub) -> list[dict]:
+    dashboard = ProjectDashboard.objects.filter(project_hub=hub, is_default=True).only('layout_json').first()
+    layout = (dashboard.layout_json if dashboard else None) or DEFAULT_LAYOUT
+    now = timezone.now()
+    widgets = []
+    for widget in layout.get('widgets', []):
+        granularity = widget.get('granularity')
+        if widget.get('type') != 'uploads' or granularity not in BUCKET_LENGTHS:
+            continue
+        since = now - BUCKET_LENGTHS[granularity] * int(widget.get('buckets', 24))
+        rows = UploadRollup.objects.filter(
+            project_hub=hub, granularity=granularity, bucket_start__gt=since
+        ).order_by('-bucket_start')
+        widgets.append({'title': widget.get('title', 'Uploads'), 'granularity': granularity, 'rows': list(rows)})
+    return widgets
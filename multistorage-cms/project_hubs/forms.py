@@ -6,4 +6,4 @@ from .models import ProjectHub
 class ProjectHubForm(forms.ModelForm):
     class Meta:
         model = ProjectHub
-        fields = ['name', 'description']
+        fields = ['name', 'description', 'keep_last_versions', 'keep_versions_days']
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_hubs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projecthub',
+            name='keep_last_versions',
+            field=models.PositiveIntegerField(blank=True, help_text='Keep this many most recent versions of each document.', null=True),
+        ),
+        migrations.AddField(
+            model_name='projecthub',
+            name='keep_versions_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Keep versions uploaded within this many days.', null=True),
+        ),
+    ]
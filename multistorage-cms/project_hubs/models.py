@@ -12,6 +12,18 @@ class ProjectHub(models.Model):
         on_delete=models.CASCADE,
         related_name='owned_project_hubs',
     )
+    # Version retention, applied by `documents.retention`: a version is pruned only when it
+    # falls outside every rule that is set. Current versions are always kept.
+    keep_last_versions = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Keep this many most recent versions of each document.',
+    )
+    keep_versions_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Keep versions uploaded within this many days.',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,61 @@
+"""Invalidate cached hub authorization when hubs, memberships or user groups change."""
+
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import authz
+from .models import ProjectHub, ProjectMembership
+
+
+def _invalidate(user_ids) -> None:
+    # Bump now so this process stops serving stale data, and again after commit so a
+    # concurrent request cannot re-cache the pre-commit state under the new version.
+    user_ids = {user_id for user_id in user_ids if user_id}
+    for user_id in user_ids:
+        authz.invalidate_user(user_id)
+    transaction.on_commit(partial(_invalidate_now, user_ids))
+
+
+def _invalidate_now(user_ids) -> None:
+    for user_id in user_ids:
+        authz.invalidate_user(user_id)
+
+
+@receiver(post_save, sender=ProjectMembership, dispatch_uid='hub_authz_membership_saved')
+@receiver(post_delete, sender=ProjectMembership, dispatch_uid='hub_authz_membership_deleted')
+def membership_changed(sender, instance, **kwargs):
+    _invalidate([instance.user_id])
+
+
+@receiver(pre_save, sender=ProjectHub, dispatch_uid='hub_previous_owner')
+def remember_previous_owner(sender, instance, **kwargs):
+    instance._previous_owner_id = None
+    if instance.pk:
+        instance._previous_owner_id = (
+            ProjectHub.objects.filter(pk=instance.pk).values_list('owner_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ProjectHub, dispatch_uid='hub_authz_hub_saved')
+@receiver(post_delete, sender=ProjectHub, dispatch_uid='hub_authz_hub_deleted')
+def hub_changed(sender, instance, **kwargs):
+    user_ids = {instance.owner_id, getattr(instance, '_previous_owner_id', None)}
+    if not kwargs.get('created'):
+        user_ids |= set(ProjectMembership.objects.filter(project_hub_id=instance.pk).values_list('user_id', flat=True))
+    _invalidate(user_ids)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through, dispatch_uid='hub_authz_user_groups')
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            _invalidate([instance.pk])
+        return
+    if action == 'pre_clear':
+        _invalidate(instance.user_set.values_list('pk', flat=True))
+    elif action in {'post_add', 'post_remove'}:
+        _invalidate(pk_set or [])
@@ -0,0 +1,39 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from project_hubs.models import ProjectHub, ProjectMembership
+
+
+class NavHubsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='member@example.com', password='x')
+        self.other = User.objects.create_user(email='other@example.com', password='x')
+        self.own = ProjectHub.objects.create(name='Beta', slug='beta', owner=self.user)
+        self.shared = ProjectHub.objects.create(name='Alpha', slug='alpha', owner=self.other)
+        ProjectMembership.objects.create(project_hub=self.shared, user=self.user, role=ProjectMembership.Role.VIEWER)
+        self.client.force_login(self.user)
+
+    def nav_names(self, **headers):
+        response = self.client.get(reverse('project_hubs:create'), headers=headers)
+        return [hub.name for hub in response.context['nav_hubs']]
+
+    def test_lists_owned_and_member_hubs_by_name(self):
+        self.assertEqual(self.nav_names(), ['Alpha', 'Beta'])
+
+    def test_cached_list_follows_hub_and_membership_changes(self):
+        self.nav_names()
+        with self.assertNumQueries(2):
+            # session, user; the nav comes from the cache
+            self.nav_names()
+
+        self.shared.name = 'Gamma'
+        self.shared.save()
+        self.assertEqual(self.nav_names(), ['Beta', 'Gamma'])
+
+        ProjectMembership.objects.filter(project_hub=self.shared, user=self.user).delete()
+        self.assertEqual(self.nav_names(), ['Beta'])
+
+    def test_htmx_partials_skip_nav(self):
+        self.assertEqual(self.nav_names(HX_Request='true'), [])
+        self.assertEqual(self.nav_names(HX_Request='true', HX_Boosted='true'), ['Alpha', 'Beta'])
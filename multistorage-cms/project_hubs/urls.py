@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    HubDashboardPartialView,
     HubRecentDocumentsPartialView,
     ProjectHubCreateView,
     ProjectHubDetailView,
@@ -15,5 +16,6 @@ urlpatterns = [
     path('create/', ProjectHubCreateView.as_view(), name='create'),
     path('<slug:slug>/', ProjectHubDetailView.as_view(), name='detail'),
     path('<slug:slug>/recent-documents/', HubRecentDocumentsPartialView.as_view(), name='recent_documents'),
+    path('<slug:slug>/dashboard/', HubDashboardPartialView.as_view(), name='dashboard'),
     path('<slug:slug>/open/', choose_hub_redirect, name='open'),
 ]
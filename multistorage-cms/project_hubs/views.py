@@ -1,21 +1,27 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Q
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.urls import reverse
 from django.views.generic import CreateView, DetailView, ListView
 
-from documents.models import Document
+from documents.fragments import CachedFragmentMixin
+from documents.models import Document, HubStorageCounter
 
+from .authz import get_hub_authorization
+from .dashboards import DEFAULT_LAYOUT, dashboard_widgets
 from .forms import ProjectHubForm
 from .models import ProjectDashboard, ProjectHub, ProjectMembership
 
 
 class HubAccessMixin(LoginRequiredMixin):
+    def get_authorization(self):
+        return get_hub_authorization(self.request, self.kwargs['slug'])
+
     def get_hub(self):
-        return get_object_or_404(
-            ProjectHub.objects.filter(Q(owner=self.request.user) | Q(memberships__user=self.request.user)).distinct(),
-            slug=self.kwargs['slug'],
-        )
+        return self.get_authorization().hub
+
+    def get_object(self, queryset=None):
+        return self.get_hub()
 
 
 class ProjectHubListView(LoginRequiredMixin, ListView):
@@ -45,7 +51,7 @@ class ProjectHubCreateView(LoginRequiredMixin, CreateView):
         ProjectDashboard.objects.get_or_create(
             project_hub=self.object,
             name='Overview',
-            defaults={'created_by': self.request.user, 'is_default': True},
+            defaults={'created_by': self.request.user, 'is_default': True, 'layout_json': DEFAULT_LAYOUT},
         )
         return response
 
@@ -57,27 +63,19 @@ class ProjectHubDetailView(HubAccessMixin, DetailView):
     model = ProjectHub
     template_name = 'project_hubs/detail.html'
     context_object_name = 'hub'
-    slug_field = 'slug'
-    slug_url_kwarg = 'slug'
-
-    def get_queryset(self):
-        return ProjectHub.objects.filter(Q(owner=self.request.user) | Q(memberships__user=self.request.user)).distinct()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['memberships'] = self.object.memberships.select_related('user').order_by('role', 'user__email')
+        context['storage_counter'] = HubStorageCounter.objects.filter(project_hub=self.object).first()
         return context
 
 
-class HubRecentDocumentsPartialView(HubAccessMixin, DetailView):
+class HubRecentDocumentsPartialView(CachedFragmentMixin, HubAccessMixin, DetailView):
     model = ProjectHub
     template_name = 'project_hubs/partials/recent_documents.html'
     context_object_name = 'hub'
-    slug_field = 'slug'
-    slug_url_kwarg = 'slug'
-
-    def get_queryset(self):
-        return ProjectHub.objects.filter(Q(owner=self.request.user) | Q(memberships__user=self.request.user)).distinct()
+    fragment_name = 'recent_documents'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -85,5 +83,16 @@ class HubRecentDocumentsPartialView(HubAccessMixin, DetailView):
         return context
 
 
+class HubDashboardPartialView(HubAccessMixin, DetailView):
+    model = ProjectHub
+    template_name = 'project_hubs/partials/dashboard.html'
+    context_object_name = 'hub'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['widgets'] = dashboard_widgets(self.object)
+        return context
+
+
 def choose_hub_redirect(request, slug):
     return redirect('documents:list', slug=slug)
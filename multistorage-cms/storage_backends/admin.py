@@ -1,10 +1,24 @@
 from django.contrib import admin
 
+from documents.admin import counter_documents, counter_stored, counter_versions
+
 from .models import StorageBackend
 
 
 @admin.register(StorageBackend)
 class StorageBackendAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'kind', 'status', 'project_hub', 'created_by', 'updated_at')
+    list_display = (
+        'id',
+        'name',
+        'kind',
+        'status',
+        'project_hub',
+        'created_by',
+        counter_documents,
+        counter_versions,
+        counter_stored,
+        'updated_at',
+    )
+    list_select_related = ('project_hub', 'created_by', 'storage_counter')
     list_filter = ('kind', 'status', 'project_hub')
     search_fields = ('name', 'created_by__email')
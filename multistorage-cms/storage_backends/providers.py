@@ -1,21 +1,49 @@
 from __future__ import annotations
 
+import io
 import json
 import os
+import shutil
+from collections import defaultdict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 from django.conf import settings
 
 from storage_backends.models import StorageBackend
 
+ProgressCallback = Callable[[int], None]
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+S3_DELETE_BATCH = 1000  # DeleteObjects limit
+DRIVE_DELETE_BATCH = 100  # batch request limit
+
 
 class StorageProvider:
     def __init__(self, storage_backend: StorageBackend):
         self.storage_backend = storage_backend
         self.config = storage_backend.config_encrypted or {}
 
-    def upload(self, local_path: Path, storage_key: str) -> str:
+    def upload(self, local_path: Path, storage_key: str, progress: ProgressCallback | None = None) -> str:
+        """Store ``local_path`` and return the provider key.
+
+        ``progress`` is called with the number of bytes sent since the previous call.
+        """
+        raise NotImplementedError
+
+    def download(self, storage_key: str, local_path: Path) -> None:
+        """Copy the object stored under ``storage_key`` (as returned by `upload`) to ``local_path``."""
+        raise NotImplementedError
+
+    def read(self, storage_key: str) -> bytes:
+        """Return the content of a small object, such as a chunk of a chunked version."""
+        raise NotImplementedError
+
+    def stream(self, storage_key: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the content of an object of any size, at most ``chunk_size`` bytes at a time."""
+        raise NotImplementedError
+
+    def delete(self, storage_keys: list[str]) -> None:
+        """Remove the given objects. Keys that are already gone are ignored."""
         raise NotImplementedError
 
     def _resolve_config_value(self, direct_key: str, env_key_name_key: str) -> Any:
@@ -29,68 +57,125 @@ class StorageProvider:
 
 
 class LocalStorageProvider(StorageProvider):
-    def upload(self, local_path: Path, storage_key: str) -> str:
+    def upload(self, local_path: Path, storage_key: str, progress: ProgressCallback | None = None) -> str:
         root_override = self.config.get('root_dir')
         root = Path(root_override) if root_override else Path(settings.MEDIA_ROOT) / 'storage' / 'local'
         target = root / storage_key
         target.parent.mkdir(parents=True, exist_ok=True)
-        target.write_bytes(local_path.read_bytes())
+        with local_path.open('rb') as src, target.open('wb') as dst:
+            while chunk := src.read(COPY_CHUNK_SIZE):
+                dst.write(chunk)
+                if progress:
+                    progress(len(chunk))
         try:
             return str(target.relative_to(settings.MEDIA_ROOT))
         except Exception:
             return str(target)
 
+    def _path(self, storage_key: str) -> Path:
+        source = Path(storage_key)
+        return source if source.is_absolute() else Path(settings.MEDIA_ROOT) / storage_key
+
+    def download(self, storage_key: str, local_path: Path) -> None:
+        with self._path(storage_key).open('rb') as src, local_path.open('wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+    def read(self, storage_key: str) -> bytes:
+        return self._path(storage_key).read_bytes()
+
+    def stream(self, storage_key: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        with self._path(storage_key).open('rb') as src:
+            while chunk := src.read(chunk_size):
+                yield chunk
+
+    def delete(self, storage_keys: list[str]) -> None:
+        for storage_key in storage_keys:
+            self._path(storage_key).unlink(missing_ok=True)
+
 
 class S3StorageProvider(StorageProvider):
-    def upload(self, local_path: Path, storage_key: str) -> str:
+    def _client(self):
         try:
             import boto3
         except Exception as exc:
             raise RuntimeError('boto3 is required for S3 uploads.') from exc
 
+        client_kwargs: dict[str, Any] = {
+            'service_name': 's3',
+            'region_name': self.config.get('region'),
+            'endpoint_url': self.config.get('endpoint_url'),
+            'aws_access_key_id': self._resolve_config_value('access_key', 'access_key_env'),
+            'aws_secret_access_key': self._resolve_config_value('secret_key', 'secret_key_env'),
+        }
+        return boto3.client(**{k: v for k, v in client_kwargs.items() if v})
+
+    def upload(self, local_path: Path, storage_key: str, progress: ProgressCallback | None = None) -> str:
+        client = self._client()
         bucket = self.config.get('bucket')
-        region = self.config.get('region')
-        endpoint_url = self.config.get('endpoint_url')
-        access_key = self._resolve_config_value('access_key', 'access_key_env')
-        secret_key = self._resolve_config_value('secret_key', 'secret_key_env')
         object_prefix = self.config.get('object_prefix', '').strip('/')
 
         if not bucket:
             raise ValueError('S3 storage backend requires `bucket` in config_encrypted.')
 
         object_key = f'{object_prefix}/{storage_key}' if object_prefix else storage_key
-        client_kwargs: dict[str, Any] = {
-            'service_name': 's3',
-            'region_name': region,
-            'endpoint_url': endpoint_url,
-            'aws_access_key_id': access_key,
-            'aws_secret_access_key': secret_key,
-        }
-        client = boto3.client(**{k: v for k, v in client_kwargs.items() if v})
         extra_args = {}
         content_type = self.config.get('content_type')
         if content_type:
             extra_args['ContentType'] = content_type
-        client.upload_file(str(local_path), bucket, object_key, ExtraArgs=extra_args or None)
+        client.upload_file(str(local_path), bucket, object_key, ExtraArgs=extra_args or None, Callback=progress)
         return f's3://{bucket}/{object_key}'
 
+    def _location(self, storage_key: str) -> tuple[str, str]:
+        if storage_key.startswith('s3://'):
+            bucket, _, object_key = storage_key.removeprefix('s3://').partition('/')
+            return bucket, object_key
+        return self.config.get('bucket'), storage_key
+
+    def download(self, storage_key: str, local_path: Path) -> None:
+        bucket, object_key = self._location(storage_key)
+        self._client().download_file(bucket, object_key, str(local_path))
+
+    def read(self, storage_key: str) -> bytes:
+        bucket, object_key = self._location(storage_key)
+        return self._client().get_object(Bucket=bucket, Key=object_key)['Body'].read()
+
+    def stream(self, storage_key: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        bucket, object_key = self._location(storage_key)
+        body = self._client().get_object(Bucket=bucket, Key=object_key)['Body']
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, storage_keys: list[str]) -> None:
+        by_bucket: dict[str, list[str]] = defaultdict(list)
+        for storage_key in storage_keys:
+            bucket, object_key = self._location(storage_key)
+            by_bucket[bucket].append(object_key)
+        client = self._client()
+        for bucket, object_keys in by_bucket.items():
+            for start in range(0, len(object_keys), S3_DELETE_BATCH):
+                batch = object_keys[start:start + S3_DELETE_BATCH]
+                response = client.delete_objects(
+                    Bucket=bucket,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                )
+                if response.get('Errors'):
+                    raise RuntimeError(f'S3 could not delete {len(response["Errors"])} objects from {bucket}.')
+
 
 class GoogleDriveStorageProvider(StorageProvider):
-    def upload(self, local_path: Path, storage_key: str) -> str:
+    def _drive(self):
         try:
             from google.oauth2 import service_account
             from googleapiclient.discovery import build
-            from googleapiclient.http import MediaFileUpload
         except Exception as exc:
             raise RuntimeError(
                 'google-api-python-client and google-auth are required for Google Drive uploads.'
             ) from exc
 
-        folder_id = self._resolve_config_value('folder_id', 'folder_id_env')
         service_account_json = self._resolve_config_value('service_account_json', 'service_account_json_env')
         service_account_file = self._resolve_config_value('service_account_file', 'service_account_file_env')
-        if not folder_id:
-            raise ValueError('Google Drive backend requires `folder_id` in config_encrypted.')
         if not service_account_json and not service_account_file:
             raise ValueError(
                 'Google Drive backend requires either `service_account_json` or `service_account_file`.'
@@ -105,19 +190,90 @@ class GoogleDriveStorageProvider(StorageProvider):
             credentials = service_account.Credentials.from_service_account_info(service_account_info, scopes=scopes)
         else:
             credentials = service_account.Credentials.from_service_account_file(service_account_file, scopes=scopes)
+        return build('drive', 'v3', credentials=credentials, cache_discovery=False)
 
-        drive = build('drive', 'v3', credentials=credentials, cache_discovery=False)
+    def upload(self, local_path: Path, storage_key: str, progress: ProgressCallback | None = None) -> str:
+        try:
+            from googleapiclient.http import MediaFileUpload
+        except Exception as exc:
+            raise RuntimeError(
+                'google-api-python-client and google-auth are required for Google Drive uploads.'
+            ) from exc
+
+        folder_id = self._resolve_config_value('folder_id', 'folder_id_env')
+        if not folder_id:
+            raise ValueError('Google Drive backend requires `folder_id` in config_encrypted.')
+        drive = self._drive()
         file_name = Path(storage_key).name
         metadata = {'name': file_name, 'parents': [folder_id]}
         media = MediaFileUpload(str(local_path), resumable=True)
-        created = drive.files().create(
+        request = drive.files().create(
             body=metadata,
             media_body=media,
             fields='id,name',
             supportsAllDrives=True,
-        ).execute()
+        )
+        if progress is None:
+            created = request.execute()
+        else:
+            created = None
+            reported = 0
+            while created is None:
+                chunk_status, created = request.next_chunk()
+                sent = chunk_status.resumable_progress if chunk_status else local_path.stat().st_size
+                if sent > reported:
+                    progress(sent - reported)
+                    reported = sent
         return f'gdrive://{created["id"]}:{created["name"]}'
 
+    @staticmethod
+    def _file_id(storage_key: str) -> str:
+        return storage_key.removeprefix('gdrive://').split(':', 1)[0]
+
+    def download(self, storage_key: str, local_path: Path) -> None:
+        from googleapiclient.http import MediaIoBaseDownload
+
+        request = self._drive().files().get_media(fileId=self._file_id(storage_key), supportsAllDrives=True)
+        with local_path.open('wb') as out:
+            downloader = MediaIoBaseDownload(out, request, chunksize=COPY_CHUNK_SIZE)
+            done = False
+            while not done:
+                _status, done = downloader.next_chunk()
+
+    def read(self, storage_key: str) -> bytes:
+        return self._drive().files().get_media(fileId=self._file_id(storage_key), supportsAllDrives=True).execute()
+
+    def stream(self, storage_key: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        from googleapiclient.http import MediaIoBaseDownload
+
+        request = self._drive().files().get_media(fileId=self._file_id(storage_key), supportsAllDrives=True)
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=chunk_size)
+        done = False
+        while not done:
+            _status, done = downloader.next_chunk()
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    def delete(self, storage_keys: list[str]) -> None:
+        from googleapiclient.errors import HttpError
+
+        drive = self._drive()
+        failures = []
+
+        def collect(_request_id, _response, exception):
+            if exception is not None and not (isinstance(exception, HttpError) and exception.resp.status == 404):
+                failures.append(exception)
+
+        for start in range(0, len(storage_keys), DRIVE_DELETE_BATCH):
+            batch = drive.new_batch_http_request(callback=collect)
+            for storage_key in storage_keys[start:start + DRIVE_DELETE_BATCH]:
+                batch.add(drive.files().delete(fileId=self._file_id(storage_key), supportsAllDrives=True))
+            batch.execute()
+        if failures:
+            raise RuntimeError(f'Google Drive could not delete {len(failures)} files: {failures[0]}')
+
 
 def get_provider(storage_backend: StorageBackend) -> StorageProvider:
     if storage_backend.kind == StorageBackend.Kind.LOCAL:
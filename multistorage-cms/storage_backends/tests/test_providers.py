@@ -34,6 +34,41 @@ class LocalStorageProviderTests(TestCase):
         finally:
             source.unlink(missing_ok=True)
 
+    def test_local_provider_downloads_stored_key(self):
+        backend = StorageBackend.objects.create(
+            name='Local Download',
+            kind=StorageBackend.Kind.LOCAL,
+            created_by=self.user,
+        )
+        provider = LocalStorageProvider(backend)
+
+        source = Path('/tmp/multistorage-cms-test-download-source.txt')
+        target = Path('/tmp/multistorage-cms-test-download-target.txt')
+        source.write_text('round trip', encoding='utf-8')
+        try:
+            provider.download(provider.upload(source, 'hub/doc/round-trip.txt'), target)
+            self.assertEqual(target.read_text(encoding='utf-8'), 'round trip')
+        finally:
+            source.unlink(missing_ok=True)
+            target.unlink(missing_ok=True)
+
+    def test_local_provider_reports_progress(self):
+        backend = StorageBackend.objects.create(
+            name='Local Progress',
+            kind=StorageBackend.Kind.LOCAL,
+            created_by=self.user,
+        )
+        provider = LocalStorageProvider(backend)
+
+        source = Path('/tmp/multistorage-cms-test-progress.txt')
+        source.write_text('x' * 100, encoding='utf-8')
+        progress = mock.Mock()
+        try:
+            provider.upload(source, 'hub/doc/progress.txt', progress=progress)
+            self.assertEqual(sum(call.args[0] for call in progress.call_args_list), 100)
+        finally:
+            source.unlink(missing_ok=True)
+
 
 class CloudProviderTests(TestCase):
     def setUp(self):
@@ -76,6 +111,46 @@ class CloudProviderTests(TestCase):
             finally:
                 source.unlink(missing_ok=True)
 
+    def test_s3_provider_deletes_in_batches_of_1000(self):
+        backend = StorageBackend.objects.create(
+            name='S3 Delete',
+            kind=StorageBackend.Kind.S3,
+            created_by=self.user,
+            config_encrypted={'bucket': 'demo-bucket'},
+        )
+        fake_client = mock.Mock()
+        fake_client.delete_objects.return_value = {}
+        fake_boto3 = ModuleType('boto3')
+        fake_boto3.client = mock.Mock(return_value=fake_client)
+        keys = [f's3://demo-bucket/uploads/{number}' for number in range(2500)]
+        with mock.patch.dict('sys.modules', {'boto3': fake_boto3}):
+            S3StorageProvider(backend).delete(keys)
+
+        batches = [call.kwargs['Delete']['Objects'] for call in fake_client.delete_objects.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [1000, 1000, 500])
+        self.assertEqual(batches[0][0], {'Key': 'uploads/0'})
+
+    def test_s3_provider_streams_object_body(self):
+        backend = StorageBackend.objects.create(
+            name='S3 Stream',
+            kind=StorageBackend.Kind.S3,
+            created_by=self.user,
+            config_encrypted={'bucket': 'demo-bucket'},
+        )
+        body = mock.Mock()
+        body.iter_chunks.return_value = iter([b'ab', b'cd'])
+        fake_client = mock.Mock()
+        fake_client.get_object.return_value = {'Body': body}
+        fake_boto3 = ModuleType('boto3')
+        fake_boto3.client = mock.Mock(return_value=fake_client)
+        with mock.patch.dict('sys.modules', {'boto3': fake_boto3}):
+            chunks = list(S3StorageProvider(backend).stream('s3://demo-bucket/uploads/doc.txt', chunk_size=2))
+
+        self.assertEqual(chunks, [b'ab', b'cd'])
+        fake_client.get_object.assert_called_once_with(Bucket='demo-bucket', Key='uploads/doc.txt')
+        body.iter_chunks.assert_called_once_with(2)
+        body.close.assert_called_once()
+
     def test_google_drive_provider_supports_service_account_json_env(self):
         service_json = (
             '{"type":"service_account","project_id":"demo-project","private_key_id":"k",'